@@ -1,10 +1,12 @@
 import pandas as pd
 import numpy as np
-from openpyxl import Workbook, load_workbook
+from openpyxl import Workbook
 from openpyxl.styles import PatternFill, Font
 from openpyxl.utils.dataframe import dataframe_to_rows
 import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog
+from comparison_engine import diff_frames
+from sheet_loader import sheet_names
 
 # Define highlighting styles
 HEADER_DIFF_FILL = PatternFill(start_color="FFD700", end_color="FFD700", fill_type="solid")  # Gold
@@ -30,14 +32,14 @@ def compare_excel_files():
         return
     
     # Process files
-    wb1 = load_workbook(file1)
-    wb2 = load_workbook(file2)
+    sheets1 = sheet_names(file1)
+    sheets2 = sheet_names(file2)
     
     # Sheet selection
     sheet1_name = simpledialog.askstring("Sheet Selection", "Enter sheet name for first file:", 
-                                         initialvalue=wb1.sheetnames[0])
+                                         initialvalue=sheets1[0])
     sheet2_name = simpledialog.askstring("Sheet Selection", "Enter sheet name for second file:", 
-                                         initialvalue=wb2.sheetnames[0])
+                                         initialvalue=sheets2[0])
     
     # Read data
     df1 = pd.read_excel(file1, sheet_name=sheet1_name)
@@ -132,15 +134,13 @@ def compare_row_data(df1, df2, output_wb):
         for col in df2.columns:
             val = df2[col].iloc[row_idx]
             ws2.cell(row_idx+2, col_pos2[col], val)
-        
-        # Highlight differences in common columns
-        for col in common_cols:
-            val1 = df1[col].iloc[row_idx]
-            val2 = df2[col].iloc[row_idx]
-            
-            if not are_equal(val1, val2):
-                ws1.cell(row_idx+2, col_pos1[col]).fill = CELL_DIFF_FILL
-                ws2.cell(row_idx+2, col_pos2[col]).fill = CELL_DIFF_FILL
+    
+    # Highlight differences in common columns
+    _, diff_rows, diff_cols = diff_frames(df1, df2, common_cols)
+    for r, c in zip(diff_rows, diff_cols):
+        col = common_cols[c]
+        ws1.cell(r+2, col_pos1[col]).fill = CELL_DIFF_FILL
+        ws2.cell(r+2, col_pos2[col]).fill = CELL_DIFF_FILL
 
 def compare_numeric_values(df1, df2, output_wb):
     """Create numerical comparison table for common numeric columns"""
@@ -2,12 +2,14 @@ import pandas as pd
 import numpy as np
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, simpledialog
-from openpyxl import Workbook, load_workbook
+from openpyxl import Workbook
 from openpyxl.styles import PatternFill, Font
 import os
 from PIL import Image, ImageTk
 import io
 import base64
+from comparison_engine import diff_frames
+from sheet_loader import read_sheets, sheet_names
 
 # Define highlighting styles
 HEADER_DIFF_FILL = PatternFill(start_color="FFD700", end_color="FFD700", fill_type="solid")  # Gold
@@ -387,17 +389,13 @@ class ExcelComparator:
             if file_num == 1:
                 self.file1_path.set(file_path)
                 try:
-                    wb = load_workbook(file_path, read_only=True)
-                    self.sheet1_name.set(wb.sheetnames[0])
-                    wb.close()
+                    self.sheet1_name.set(sheet_names(file_path)[0])
                 except:
                     self.sheet1_name.set("Sheet1")
             else:
                 self.file2_path.set(file_path)
                 try:
-                    wb = load_workbook(file_path, read_only=True)
-                    self.sheet2_name.set(wb.sheetnames[0])
-                    wb.close()
+                    self.sheet2_name.set(sheet_names(file_path)[0])
                 except:
                     self.sheet2_name.set("Sheet1")
     
@@ -424,8 +422,7 @@ class ExcelComparator:
         
         try:
             # Read data
-            df1 = pd.read_excel(file1, sheet_name=sheet1)
-            df2 = pd.read_excel(file2, sheet_name=sheet2)
+            df1, df2 = read_sheets([(file1, sheet1), (file2, sheet2)])
             
             # Pad dataframes to same length
             max_len = max(len(df1), len(df2))
@@ -561,19 +558,16 @@ class ExcelComparator:
                 if not pd.isna(row_key2) and row_key2 in keys1:
                     for col in df2.columns:
                         ws2.cell(row_idx+2, col_pos2[col]).fill = ROW_MATCH_FILL
-            
-            # Highlight differences in common columns
-            if self.highlight_cell_diffs.get():
-                for col in common_cols:
-                    val1 = df1[col].iloc[row_idx]
-                    val2 = df2[col].iloc[row_idx]
-                    
-                    if not self.are_equal(val1, val2):
-                        if key_col and col == key_col:
-                            # Don't highlight key column differences
-                            continue
-                        ws1.cell(row_idx+2, col_pos1[col]).fill = CELL_DIFF_FILL
-                        ws2.cell(row_idx+2, col_pos2[col]).fill = CELL_DIFF_FILL
+        
+        # Highlight differences in common columns
+        if self.highlight_cell_diffs.get():
+            # Don't highlight key column differences
+            diff_columns = [col for col in common_cols if not (key_col and col == key_col)]
+            _, diff_rows, diff_cols = diff_frames(df1, df2, diff_columns)
+            for r, c in zip(diff_rows, diff_cols):
+                col = diff_columns[c]
+                ws1.cell(r+2, col_pos1[col]).fill = CELL_DIFF_FILL
+                ws2.cell(r+2, col_pos2[col]).fill = CELL_DIFF_FILL
     
     def analyze_row_matches(self, df1, df2, output_wb):
         """Analyze and highlight row matches between files"""
@@ -2,10 +2,12 @@ import pandas as pd
 import numpy as np
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from openpyxl import Workbook, load_workbook
+from openpyxl import Workbook
 from openpyxl.styles import PatternFill, Font
 import os
 from datetime import datetime
+from comparison_engine import build_concat_keys, build_key_index, hash_row_keys, verify_hash_matches, diff_frames, pair_key_rows, numeric_differences
+from sheet_loader import read_sheets, SheetCache, sheet_names
 
 # Define highlighting styles
 HEADER_DIFF_FILL = PatternFill(start_color="FFD700", end_color="FFD700", fill_type="solid")  # Gold
@@ -29,9 +31,14 @@ class ExcelComparator:
         self.sheet2_name = tk.StringVar()
         self.status = tk.StringVar(value="Ready to compare files")
         self.concat_columns = []
+        self.key_index1 = None
+        self.key_index2 = None
         self.df1 = None
         self.df2 = None
         
+        # Parsed sheets shared by the column refresh and the comparison
+        self.sheet_cache = SheetCache()
+        
         # Create UI
         self.create_widgets()
         
@@ -264,6 +271,36 @@ class ExcelComparator:
             font=("Arial", 10)
         ).pack(anchor="w", pady=3)
         
+        num_limit_frame = tk.Frame(options_frame, bg="#f0f2f5")
+        num_limit_frame.pack(anchor="w", pady=3)
+        
+        tk.Label(
+            num_limit_frame, 
+            text="Largest numerical differences per column (0 = all):", 
+            font=("Arial", 10), 
+            bg="#f0f2f5"
+        ).pack(side="left")
+        
+        self.num_diff_limit = tk.IntVar(value=0)
+        tk.Spinbox(
+            num_limit_frame, 
+            from_=0, 
+            to=1000000, 
+            increment=100, 
+            textvariable=self.num_diff_limit, 
+            width=10, 
+            font=("Arial", 10)
+        ).pack(side="left", padx=5)
+        
+        self.use_hash_keys = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            options_frame, 
+            text="Use hashed row keys (lower memory on large files)", 
+            variable=self.use_hash_keys, 
+            bg="#f0f2f5", 
+            font=("Arial", 10)
+        ).pack(anchor="w", pady=3)
+        
         # Action buttons
         button_frame = tk.Frame(main_frame, bg="#f0f2f5")
         button_frame.pack(fill="x", pady=20)
@@ -418,17 +455,13 @@ class ExcelComparator:
             if file_num == 1:
                 self.file1_path.set(file_path)
                 try:
-                    wb = load_workbook(file_path, read_only=True)
-                    self.sheet1_name.set(wb.sheetnames[0])
-                    wb.close()
+                    self.sheet1_name.set(sheet_names(file_path)[0])
                 except:
                     self.sheet1_name.set("Sheet1")
             else:
                 self.file2_path.set(file_path)
                 try:
-                    wb = load_workbook(file_path, read_only=True)
-                    self.sheet2_name.set(wb.sheetnames[0])
-                    wb.close()
+                    self.sheet2_name.set(sheet_names(file_path)[0])
                 except:
                     self.sheet2_name.set("Sheet1")
     
@@ -445,8 +478,7 @@ class ExcelComparator:
         
         try:
             # Read data
-            df1 = pd.read_excel(file1, sheet_name=sheet1)
-            df2 = pd.read_excel(file2, sheet_name=sheet2)
+            df1, df2 = read_sheets([(file1, sheet1), (file2, sheet2)], cache=self.sheet_cache)
             
             # Find common columns that are string type and not dates
             common_cols = list(set(df1.columns) & set(df2.columns))
@@ -486,6 +518,36 @@ class ExcelComparator:
         """Check if a value is a date"""
         return isinstance(value, (datetime, pd.Timestamp))
     
+    def build_key_indexes(self, df1, df2):
+        """Index both files by concatenation key (or row hash) -> row positions"""
+        cols = self.concat_columns
+        if self.use_hash_keys.get():
+            hashes1, has_key1 = hash_row_keys(df1, cols, skip_na=False)
+            hashes2, has_key2 = hash_row_keys(df2, cols, skip_na=False)
+            key_index1 = build_key_index(hashes1, has_key1)
+            key_index2 = build_key_index(hashes2, has_key2)
+            
+            # Check the first row pair of every shared hash against the real values
+            common = [key for key in key_index1 if key in key_index2]
+            rows1 = np.array([key_index1[key][0] for key in common], dtype=np.int64)
+            rows2 = np.array([key_index2[key][0] for key in common], dtype=np.int64)
+            verify_hash_matches(df1, rows1, df2, rows2, cols, skip_na=False)
+            return key_index1, key_index2
+        
+        key_index1 = build_key_index(build_concat_keys(df1, cols, skip_na=False))
+        key_index2 = build_key_index(build_concat_keys(df2, cols, skip_na=False))
+        return key_index1, key_index2
+    
+    def key_labels(self, keys, key_index, df):
+        """Return (key text, first row position, key) for each key, sorted by key text"""
+        rows = [key_index[key][0] for key in keys]
+        if self.use_hash_keys.get():
+            # Key text is only built for the rows that are reported
+            labels = build_concat_keys(df.iloc[rows], self.concat_columns, skip_na=False).tolist()
+        else:
+            labels = list(keys)
+        return sorted(zip(labels, rows, keys), key=lambda item: str(item[0]))
+    
     def compare_files(self):
         file1 = self.file1_path.get()
         file2 = self.file2_path.get()
@@ -510,14 +572,17 @@ class ExcelComparator:
         
         try:
             # Read data
-            self.df1 = pd.read_excel(file1, sheet_name=sheet1)
-            self.df2 = pd.read_excel(file2, sheet_name=sheet2)
+            self.df1, self.df2 = read_sheets([(file1, sheet1), (file2, sheet2)], cache=self.sheet_cache)
             
             # Pad dataframes to same length
             max_len = max(len(self.df1), len(self.df2))
             df1_padded = self.df1.reindex(range(max_len))
             df2_padded = self.df2.reindex(range(max_len))
             
+            # Index rows by key once for every sheet
+            if self.concat_columns:
+                self.key_index1, self.key_index2 = self.build_key_indexes(df1_padded, df2_padded)
+            
             # Create comparison workbook
             output_wb = Workbook()
             output_wb.remove(output_wb.active)
@@ -606,29 +671,14 @@ class ExcelComparator:
         col_pos1 = {col: idx for idx, col in enumerate(df1.columns, 1)}
         col_pos2 = {col: idx for idx, col in enumerate(df2.columns, 1)}
         
-        # Create concatenation keys if columns are selected
-        concat_keys1 = {}
-        concat_keys2 = {}
-        
+        # Mark rows whose key also occurs in the other file
+        matched1 = np.zeros(len(df1), dtype=bool)
+        matched2 = np.zeros(len(df2), dtype=bool)
         if self.concat_columns:
-            # Create concatenated keys
-            for idx, row in df1.iterrows():
-                key_parts = []
-                for col in self.concat_columns:
-                    if col in df1.columns and not self.is_date(row[col]):
-                        key_parts.append(str(row[col]))
-                concat_keys1[idx] = "_".join(key_parts) if key_parts else None
-            
-            for idx, row in df2.iterrows():
-                key_parts = []
-                for col in self.concat_columns:
-                    if col in df2.columns and not self.is_date(row[col]):
-                        key_parts.append(str(row[col]))
-                concat_keys2[idx] = "_".join(key_parts) if key_parts else None
-            
-            # Create sets of keys for matching
-            keys1_set = set(concat_keys1.values())
-            keys2_set = set(concat_keys2.values())
+            for key, rows in self.key_index1.items():
+                if key in self.key_index2:
+                    matched1[rows] = True
+                    matched2[self.key_index2[key]] = True
         
         # Write data and highlight differences
         for row_idx in range(len(df1)):
@@ -644,28 +694,23 @@ class ExcelComparator:
             
             # Highlight row matching status if enabled
             if self.highlight_row_matches.get() and self.concat_columns:
-                key1 = concat_keys1.get(row_idx)
-                key2 = concat_keys2.get(row_idx)
-                
                 # Highlight if row exists in both files
-                if key1 and key1 in keys2_set:
+                if matched1[row_idx]:
                     for col in df1.columns:
                         ws1.cell(row_idx+2, col_pos1[col]).fill = ROW_MATCH_FILL
                 
                 # Highlight if row exists in both files
-                if key2 and key2 in keys1_set:
+                if matched2[row_idx]:
                     for col in df2.columns:
                         ws2.cell(row_idx+2, col_pos2[col]).fill = ROW_MATCH_FILL
-            
-            # Highlight differences in common columns
-            if self.highlight_cell_diffs.get():
-                for col in common_cols:
-                    val1 = df1[col].iloc[row_idx]
-                    val2 = df2[col].iloc[row_idx]
-                    
-                    if not self.are_equal(val1, val2):
-                        ws1.cell(row_idx+2, col_pos1[col]).fill = CELL_DIFF_FILL
-                        ws2.cell(row_idx+2, col_pos2[col]).fill = CELL_DIFF_FILL
+        
+        # Highlight differences in common columns
+        if self.highlight_cell_diffs.get():
+            _, diff_rows, diff_cols = diff_frames(df1, df2, common_cols)
+            for r, c in zip(diff_rows, diff_cols):
+                col = common_cols[c]
+                ws1.cell(r+2, col_pos1[col]).fill = CELL_DIFF_FILL
+                ws2.cell(r+2, col_pos2[col]).fill = CELL_DIFF_FILL
     
     def analyze_row_matches(self, df1, df2, output_wb):
         """Analyze and highlight row matches between files using concatenated keys"""
@@ -680,62 +725,30 @@ class ExcelComparator:
         for cell in ws[1]:
             cell.font = Font(bold=True)
         
-        # Create concatenated keys
-        concat_keys1 = {}
-        concat_keys2 = {}
-        
-        for idx, row in df1.iterrows():
-            key_parts = []
-            for col in self.concat_columns:
-                if col in df1.columns and not self.is_date(row[col]):
-                    key_parts.append(str(row[col]))
-            concat_keys1[idx] = "_".join(key_parts) if key_parts else None
-        
-        for idx, row in df2.iterrows():
-            key_parts = []
-            for col in self.concat_columns:
-                if col in df2.columns and not self.is_date(row[col]):
-                    key_parts.append(str(row[col]))
-            concat_keys2[idx] = "_".join(key_parts) if key_parts else None
+        key_index1 = self.key_index1
+        key_index2 = self.key_index2
         
-        # Get unique keys from both files
-        keys1 = set(concat_keys1.values())
-        keys2 = set(concat_keys2.values())
-        
-        # Remove None values
-        keys1.discard(None)
-        keys2.discard(None)
-        
-        # Find common keys
-        common_keys = keys1 & keys2
-        
-        # Find keys only in file1
-        only_in_file1 = keys1 - keys2
-        
-        # Find keys only in file2
-        only_in_file2 = keys2 - keys1
+        # Find common keys and keys only in one of the files
+        common_keys = [key for key in key_index1 if key in key_index2]
+        only_in_file1 = [key for key in key_index1 if key not in key_index2]
+        only_in_file2 = [key for key in key_index2 if key not in key_index1]
+        key_components = ", ".join(self.concat_columns)
         
         # Add common rows
-        for key in sorted(common_keys):
-            row1 = [idx for idx, k in concat_keys1.items() if k == key][0] + 1
-            row2 = [idx for idx, k in concat_keys2.items() if k == key][0] + 1
-            key_components = ", ".join(self.concat_columns)
-            ws.append([key, "Present in both files", row1, row2, key_components])
+        for label, row1, key in self.key_labels(common_keys, key_index1, df1):
+            row2 = key_index2[key][0] + 1
+            ws.append([label, "Present in both files", row1 + 1, row2, key_components])
             ws.cell(ws.max_row, 1).fill = CONCAT_KEY_FILL
         
         # Add rows only in file1
-        for key in sorted(only_in_file1):
-            row1 = [idx for idx, k in concat_keys1.items() if k == key][0] + 1
-            key_components = ", ".join(self.concat_columns)
-            ws.append([key, "Only in File 1", row1, "N/A", key_components])
+        for label, row1, _ in self.key_labels(only_in_file1, key_index1, df1):
+            ws.append([label, "Only in File 1", row1 + 1, "N/A", key_components])
             ws.cell(ws.max_row, 1).fill = ROW_MISSING_FILL
         
         # Add rows only in file2
-        for key in sorted(only_in_file2):
-            row2 = [idx for idx, k in concat_keys2.items() if k == key][0] + 1
-            key_components = ", ".join(self.concat_columns)
-            ws.append([key, "Only in File 2", "N/A", row2, key_components])
-            ws.cell(ws.max_row, 1).fill = ROW_MISSING_FILL)
+        for label, row2, _ in self.key_labels(only_in_file2, key_index2, df2):
+            ws.append([label, "Only in File 2", "N/A", row2 + 1, key_components])
+            ws.cell(ws.max_row, 1).fill = ROW_MISSING_FILL
     
     def compare_numeric_values(self, df1, df2, output_wb):
         """Create numerical comparison table for common numeric columns"""
@@ -750,30 +763,26 @@ class ExcelComparator:
         
         # Create sheet
         ws = output_wb.create_sheet("Numeric Comparison")
-        headers = ["Column", "Row", "File1 Value", "File2 Value", "Absolute Diff", "Relative Diff"]
+        headers = ["Column", "File1 Row", "File2 Row", "File1 Value", "File2 Value", "Absolute Diff", "Relative Diff"]
         ws.append(headers)
         
         # Apply header formatting
         for cell in ws[1]:
             cell.font = Font(bold=True)
         
-        # Compare values
+        # Compare values of key-matched rows, or by position without key columns
+        rows1 = rows2 = None
+        if self.concat_columns:
+            rows1, rows2 = pair_key_rows(self.key_index1, self.key_index2)
+        differences = numeric_differences(df1, df2, num_cols, rows1, rows2, top_k=self.num_diff_limit.get())
+        
         for col in num_cols:
-            for i in range(min(len(df1), len(df2))):
-                val1 = df1[col].iloc[i]
-                val2 = df2[col].iloc[i]
-                
-                if pd.isna(val1) or pd.isna(val2) or val1 == val2:
-                    continue
-                    
-                abs_diff = abs(val1 - val2)
-                rel_diff = abs_diff / max(abs(val1), abs(val2)) if max(abs(val1), abs(val2)) != 0 else float('inf')
-                
-                ws.append([col, i+1, val1, val2, abs_diff, rel_diff])
+            for row in differences[col].itertuples(index=False):
+                ws.append([col] + list(row))
                 
                 # Highlight significant differences (>10%)
-                if rel_diff > 0.1:
-                    for col_idx in range(1, 7):
+                if row[-1] > 0.1:
+                    for col_idx in range(1, len(headers) + 1):
                         ws.cell(ws.max_row, col_idx).fill = NUM_DIFF_FILL
 
 if __name__ == "__main__":
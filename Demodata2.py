@@ -1,10 +1,11 @@
 import pandas as pd
 import tkinter as tk
 from tkinter import filedialog, messagebox
-from openpyxl import Workbook, load_workbook
+from openpyxl import Workbook
 from openpyxl.styles import PatternFill, Font, Border, Side
 from openpyxl.utils import get_column_letter
 from datetime import datetime
+from sheet_loader import sheet_names
 
 # Define highlighting styles
 HEADER_DIFF_FILL = PatternFill(start_color="FFD700", end_color="FFD700", fill_type="solid")  # Gold
@@ -60,17 +61,13 @@ class ExcelComparator:
             if file_number == 1:
                 self.file1_path.set(path)
                 try:
-                    wb = load_workbook(path, read_only=True)
-                    self.sheet1_name.set(wb.sheetnames[0])
-                    wb.close()
+                    self.sheet1_name.set(sheet_names(path)[0])
                 except:
                     self.sheet1_name.set("Sheet1")
             else:
                 self.file2_path.set(path)
                 try:
-                    wb = load_workbook(path, read_only=True)
-                    self.sheet2_name.set(wb.sheetnames[0])
-                    wb.close()
+                    self.sheet2_name.set(sheet_names(path)[0])
                 except:
                     self.sheet2_name.set("Sheet1")
 
@@ -0,0 +1,110 @@
+import argparse
+import os
+import tempfile
+import time
+import pandas as pd
+import numpy as np
+from comparison_engine import build_concat_keys, match_status
+from sheet_loader import read_sheets
+from xlsx_reader import read_xlsx
+
+
+def make_ledger(n_rows, seed=0):
+    """Create a synthetic ledger with string key columns and numeric amounts"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Region": rng.choice(["North", "South", "East", "West"], n_rows).astype(object),
+        "Account": np.char.add("ACC", rng.integers(0, n_rows, n_rows).astype(str)).astype(object),
+        "Product": np.char.add("P", rng.integers(0, 500, n_rows).astype(str)).astype(object),
+        "Amount": rng.normal(1000, 250, n_rows).round(2),
+    })
+
+
+def bench_match_status(sizes):
+    """Time key building plus match status assignment for growing row counts"""
+    key_cols = ["Region", "Account", "Product"]
+    print(f"{'Rows':>10} {'Keys (s)':>10} {'Status (s)':>11} {'us/row':>8}")
+
+    for n_rows in sizes:
+        df1 = make_ledger(n_rows, seed=1)
+        df2 = make_ledger(n_rows, seed=2)
+
+        start = time.perf_counter()
+        keys1 = build_concat_keys(df1, key_cols)
+        keys2 = build_concat_keys(df2, key_cols)
+        keys_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        status1, status2 = match_status(keys1, keys2)
+        df1["Match Status"] = status1
+        df2["Match Status"] = status2
+        status_time = time.perf_counter() - start
+
+        per_row = (keys_time + status_time) / n_rows * 1e6
+        print(f"{n_rows:>10} {keys_time:>10.3f} {status_time:>11.3f} {per_row:>8.2f}")
+
+
+def bench_parallel_load(sizes):
+    """Time loading two workbooks one after the other versus in the process pool"""
+    print(f"{'Rows':>10} {'Serial (s)':>11} {'Parallel (s)':>13} {'Speedup':>8}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in sizes:
+            paths = [os.path.join(tmp, f"ledger{i}_{n_rows}.xlsx") for i in (1, 2)]
+            for seed, path in enumerate(paths, 1):
+                make_ledger(n_rows, seed=seed).to_excel(path, index=False)
+            requests = [(path, 0) for path in paths]
+
+            start = time.perf_counter()
+            read_sheets(requests, parallel=False)
+            serial_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            read_sheets(requests, parallel=True)
+            parallel_time = time.perf_counter() - start
+
+            print(f"{n_rows:>10} {serial_time:>11.3f} {parallel_time:>13.3f} {serial_time / parallel_time:>7.2f}x")
+
+
+def bench_xml_reader(sizes):
+    """Time pd.read_excel versus the direct sheet-XML reader; sizes are cell counts"""
+    print(f"{'Cells':>10} {'read_excel (s)':>15} {'read_xlsx (s)':>14} {'Speedup':>8}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_cells in sizes:
+            df = make_ledger(n_cells // 4)
+            path = os.path.join(tmp, f"ledger_{n_cells}.xlsx")
+            df.to_excel(path, index=False)
+
+            start = time.perf_counter()
+            expected = pd.read_excel(path)
+            pandas_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            result = read_xlsx(path)
+            reader_time = time.perf_counter() - start
+
+            pd.testing.assert_frame_equal(result, expected)
+            print(f"{n_cells:>10} {pandas_time:>15.3f} {reader_time:>14.3f} {pandas_time / reader_time:>7.2f}x")
+
+
+BENCHMARKS = {
+    "match-status": bench_match_status,
+    "parallel-load": bench_parallel_load,
+    "xml-reader": bench_xml_reader,
+}
+
+# Benchmarks measured in something other than rows bring their own default sizes
+DEFAULT_SIZES = {
+    "xml-reader": [100_000, 1_000_000, 5_000_000],
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the comparison engine")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        help="Row counts to run (default: 10k, 100k, 1M; xml-reader: 100k, 1M, 5M cells)")
+    args = parser.parse_args()
+
+    BENCHMARKS[args.benchmark](args.sizes or DEFAULT_SIZES.get(args.benchmark, [10_000, 100_000, 1_000_000]))
@@ -1,7 +1,82 @@
+import argparse
+import sys
 import pandas as pd
 import numpy as np
+from comparison_engine import check_frames, make_verdict, EXIT_ERROR
+from sheet_loader import read_sheets, same_file, same_sheet
 
-def compare_excel_files(file1_path, file2_path, sheet_name1=None, sheet_name2=None, key_columns=None, output_path='excel_differences.xlsx'):
+
+def check_excel_files(file1_path, file2_path, sheet_name1=None, sheet_name2=None, key_columns=None, max_differences=1):
+    """
+    Answer whether two sheets hold the same data, without writing a report.
+
+    Identical files or sheet XML are recognised from their hashes without
+    parsing. Otherwise rows are paired by key_columns (by position when no
+    keys are given) and the check stops after max_differences differences.
+
+    Args:
+        file1_path, file2_path (str): Workbooks to check
+        sheet_name1, sheet_name2 (str or int, optional): Sheets to check. Default the first sheet.
+        key_columns (list, optional): Columns identifying a row in both files
+        max_differences (int, optional): Stop after this many differences. Default 1; None lists all.
+
+    Returns:
+        dict: Verdict with equal, reason, differences and exit_code (0 equal, 1 different)
+    """
+    sheet_name1 = 0 if sheet_name1 is None else sheet_name1
+    sheet_name2 = 0 if sheet_name2 is None else sheet_name2
+    if sheet_name1 == sheet_name2 and same_file(file1_path, file2_path):
+        return make_verdict(True, "identical inputs (file hash)")
+    if same_sheet(file1_path, sheet_name1, file2_path, sheet_name2):
+        return make_verdict(True, "identical inputs (sheet hash)")
+
+    df1, df2 = read_sheets([(file1_path, sheet_name1), (file2_path, sheet_name2)])
+    if not key_columns:
+        return check_frames(df1, df2, max_differences=max_differences)
+
+    if list(df1.columns) != list(df2.columns):
+        return make_verdict(False, "columns differ")
+    missing = [col for col in key_columns if col not in df1.columns]
+    if missing:
+        raise ValueError(f"Key columns {missing} not found in the files.")
+
+    # Count the rows of every key in both files; a key whose count differs
+    # has rows removed or added (including extra duplicates)
+    keys1 = pd.MultiIndex.from_frame(df1[key_columns])
+    keys2 = pd.MultiIndex.from_frame(df2[key_columns])
+    codes, _ = keys1.append(keys2).factorize()
+    codes1, codes2 = codes[:len(df1)], codes[len(df1):]
+    n_keys = int(codes.max()) + 1 if len(codes) else 0
+    counts1 = np.bincount(codes1, minlength=n_keys)
+    counts2 = np.bincount(codes2, minlength=n_keys)
+    if (counts1 != counts2).any():
+        # Report the rows past the shorter count of their key
+        occurrence1 = pd.Series(codes1).groupby(codes1).cumcount().to_numpy()
+        occurrence2 = pd.Series(codes2).groupby(codes2).cumcount().to_numpy()
+        only1 = np.flatnonzero(occurrence1 >= counts2[codes1])
+        only2 = np.flatnonzero(occurrence2 >= counts1[codes2])
+        differences = [{"row1": int(pos) + 1, "row2": None, "column": None, "value1": df1[key_columns].iloc[pos].tolist(), "value2": None}
+                       for pos in only1] + \
+                      [{"row1": None, "row2": int(pos) + 1, "column": None, "value1": None, "value2": df2[key_columns].iloc[pos].tolist()}
+                       for pos in only2]
+        return make_verdict(False, "rows removed or added", differences[:max_differences])
+
+    # Pair the k-th File1 row of every key with the k-th File2 row of that key;
+    # with equal counts per key this pairs every row of both files exactly once
+    rows1 = np.argsort(codes1, kind="stable")
+    rows2 = np.argsort(codes2, kind="stable")
+    by_file1 = np.argsort(rows1)
+    rows1, rows2 = rows1[by_file1], rows2[by_file1]
+    base_columns = [col for col in df1.columns if col not in key_columns]
+    return check_frames(df1, df2, base_columns, rows1, rows2, max_differences=max_differences)
+
+
+def compare_excel_files(file1_path, file2_path, sheet_name1=None, sheet_name2=None, key_columns=None, output_path='excel_differences.xlsx',
+                        check=False, max_differences=1):
+    # Only answer whether the files are equal; no sheets are built
+    if check:
+        return check_excel_files(file1_path, file2_path, sheet_name1, sheet_name2, key_columns, max_differences)
+    
     # Read Excel files
     df1 = pd.read_excel(file1_path, sheet_name=sheet_name1)
     df2 = pd.read_excel(file2_path, sheet_name=sheet_name2)
@@ -77,7 +152,27 @@ def compare_excel_files(file1_path, file2_path, sheet_name1=None, sheet_name2=No
 
 # Example usage
 if __name__ == "__main__":
-    file1 = "file1.xlsx"
-    file2 = "file2.xlsx"
-    output = compare_excel_files(file1, file2, key_columns=['ID'], output_path='differences.xlsx')
+    parser = argparse.ArgumentParser(description="Compare two Excel files")
+    parser.add_argument("file1", nargs="?", default="file1.xlsx")
+    parser.add_argument("file2", nargs="?", default="file2.xlsx")
+    parser.add_argument("--key", nargs="+", default=["ID"], help="Key columns (default: %(default)s)")
+    parser.add_argument("--output", default="differences.xlsx", help="Report path (default: %(default)s)")
+    parser.add_argument("--check", action="store_true",
+                        help="Only check equality; exit code 0 when equal, 1 when different, 2 on errors")
+    parser.add_argument("--max-diffs", type=int, default=1, help="Differences to find before stopping (default: 1)")
+    args = parser.parse_args()
+
+    if args.check:
+        try:
+            verdict = check_excel_files(args.file1, args.file2, key_columns=args.key, max_differences=args.max_diffs)
+        except Exception as e:
+            print(f"Error during check: {e}")
+            sys.exit(EXIT_ERROR)
+        print("Equal" if verdict["equal"] else "Different", f"({verdict['reason']})")
+        for diff in verdict["differences"]:
+            print(f"  File1 row {diff['row1']}, File2 row {diff['row2']}, {diff['column']}: "
+                  f"{diff['value1']} != {diff['value2']}")
+        sys.exit(verdict["exit_code"])
+
+    output = compare_excel_files(args.file1, args.file2, key_columns=args.key, output_path=args.output)
     print(f"Differences saved to {output}")
@@ -1,10 +1,12 @@
 import pandas as pd
 import numpy as np
-from openpyxl import Workbook, load_workbook
+from openpyxl import Workbook
 from openpyxl.styles import PatternFill, Font
 from openpyxl.utils.dataframe import dataframe_to_rows
 import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog
+from comparison_engine import diff_frames, align_frames, numeric_differences, NUMERIC_DIFF_COLUMNS
+from sheet_loader import sheet_names
 
 # Define highlighting styles
 HEADER_DIFF_FILL = PatternFill(start_color="FFD700", end_color="FFD700", fill_type="solid")  # Gold
@@ -30,14 +32,14 @@ def compare_excel_files():
     same_structure = sheet_type == "1" if sheet_type else True
     
     # Process files
-    wb1 = load_workbook(file1)
-    wb2 = load_workbook(file2)
+    sheets1 = sheet_names(file1)
+    sheets2 = sheet_names(file2)
     
     # Sheet selection
     sheet1_name = simpledialog.askstring("Sheet Selection", "Enter sheet name for first file:", 
-                                         initialvalue=wb1.sheetnames[0])
+                                         initialvalue=sheets1[0])
     sheet2_name = simpledialog.askstring("Sheet Selection", "Enter sheet name for second file:", 
-                                         initialvalue=wb2.sheetnames[0])
+                                         initialvalue=sheets2[0])
     
     # Read data
     df1 = pd.read_excel(file1, sheet_name=sheet1_name)
@@ -110,20 +112,25 @@ def compare_row_data(df1, df2, output_wb, same_structure=True):
         ws1.cell(1, col_idx).font = Font(bold=True)
         ws2.cell(1, col_idx).font = Font(bold=True)
     
-    # Compare and highlight cells
+    # Write values
     for row_idx in range(len(df1)):
         for col_idx, col in enumerate(df1.columns, 1):
-            val1 = df1.iloc[row_idx, col_idx-1]
-            val2 = df2.iloc[row_idx, col_idx-1]
+            ws1.cell(row_idx+2, col_idx, df1.iloc[row_idx, col_idx-1])
+            ws2.cell(row_idx+2, col_idx, df2.iloc[row_idx, col_idx-1])
             
-            # Write values
-            ws1.cell(row_idx+2, col_idx, val1)
-            ws2.cell(row_idx+2, col_idx, val2)
-            
-            # Highlight differences
-            if not same_structure or (val1 != val2 and not (pd.isna(val1) and pd.isna(val2))):
+            # Different structures highlight every cell
+            if not same_structure:
                 ws1.cell(row_idx+2, col_idx).fill = CELL_DIFF_FILL
                 ws2.cell(row_idx+2, col_idx).fill = CELL_DIFF_FILL
+    
+    # Highlight differences, comparing columns by position
+    if same_structure:
+        n_cols = min(len(df1.columns), len(df2.columns))
+        df2_by_position = df2.iloc[:, :n_cols].set_axis(df1.columns[:n_cols], axis=1)
+        _, diff_rows, diff_cols = diff_frames(df1.iloc[:, :n_cols], df2_by_position, list(df1.columns[:n_cols]))
+        for r, c in zip(diff_rows, diff_cols):
+            ws1.cell(r+2, c+1).fill = CELL_DIFF_FILL
+            ws2.cell(r+2, c+1).fill = CELL_DIFF_FILL
 
 def compare_numeric_values(df1, df2, output_wb):
     """Create numerical comparison table"""
@@ -137,39 +144,36 @@ def compare_numeric_values(df1, df2, output_wb):
     
     # Create sheet
     ws = output_wb.create_sheet("Numeric Comparison")
-    headers = ["Column", "Row", "File1 Value", "File2 Value", "Absolute Diff", "Relative Diff"]
+    headers = ["Column"] + NUMERIC_DIFF_COLUMNS
     ws.append(headers)
     
     # Apply header formatting
     for cell in ws[1]:
         cell.font = Font(bold=True)
     
-    # Compare values
+    # Compare values of rows aligned by content; inserted and deleted rows have no counterpart
+    slots1, slots2 = align_frames(df1, df2)
+    paired = (slots1 >= 0) & (slots2 >= 0)
+    differences = numeric_differences(df1, df2, num_cols, slots1[paired], slots2[paired])
     for col in num_cols:
-        for i in range(min(len(df1), len(df2))):
-            val1 = df1[col].iloc[i]
-            val2 = df2[col].iloc[i]
-            
-            if pd.isna(val1) or pd.isna(val2) or val1 == val2:
-                continue
-                
-            abs_diff = abs(val1 - val2)
-            rel_diff = abs_diff / max(abs(val1), abs(val2)) if max(abs(val1), abs(val2)) != 0 else float('inf')
-            
-            ws.append([col, i+1, val1, val2, abs_diff, rel_diff])
+        for row in differences[col].itertuples(index=False):
+            ws.append([col, *row])
             
-            # Highlight significant differences
-            if rel_diff > 0.1:  > 10% difference
-                for col_idx in range(1, 7):
+            # Highlight significant differences (> 10%)
+            if row[-1] > 0.1:
+                for col_idx in range(1, len(headers) + 1):
                     ws.cell(ws.max_row, col_idx).fill = NUM_DIFF_FILL
 
 def align_data(df1, df2, same_structure):
     """Align dataframes based on structure type"""
     if same_structure:
-        # Pad with NaN to match lengths
-        max_len = max(len(df1), len(df2))
-        df1 = df1.reindex(range(max_len))
-        df2 = df2.reindex(range(max_len))
+        # Pair rows by content (columns by position), so an inserted or deleted
+        # row does not shift every later row; the missing side becomes an empty row
+        n_cols = min(len(df1.columns), len(df2.columns))
+        df2_by_position = df2.iloc[:, :n_cols].set_axis(df1.columns[:n_cols], axis=1)
+        slots1, slots2 = align_frames(df1.iloc[:, :n_cols], df2_by_position)
+        df1 = df1.reset_index(drop=True).reindex(slots1).reset_index(drop=True)
+        df2 = df2.reset_index(drop=True).reindex(slots2).reset_index(drop=True)
         return df1, df2
     
     # Different structures - align by columns
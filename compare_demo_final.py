@@ -1,9 +1,11 @@
 import pandas as pd
 import numpy as np
-from openpyxl import Workbook, load_workbook
+from openpyxl import Workbook
 from openpyxl.styles import PatternFill, Font, Border, Side, Alignment
 from openpyxl.utils import get_column_letter
 from datetime import datetime
+from comparison_engine import diff_frames
+from sheet_loader import read_sheets, sheet_names
 
 # Define highlighting styles
 HEADER_DIFF_FILL = PatternFill(start_color="FFD700", end_color="FFD700", fill_type="solid")  # Gold
@@ -33,14 +35,10 @@ class ExcelComparator:
         self.create_num_table = create_num_table
         
         if not self.sheet1_name:
-            wb = load_workbook(file1_path, read_only=True)
-            self.sheet1_name = wb.sheetnames[0]
-            wb.close()
+            self.sheet1_name = sheet_names(file1_path)[0]
             
         if not self.sheet2_name:
-            wb = load_workbook(file2_path, read_only=True)
-            self.sheet2_name = wb.sheetnames[0]
-            wb.close()
+            self.sheet2_name = sheet_names(file2_path)[0]
     
     def are_equal(self, a, b):
         """Check if two values are equal, handling NaN and date cases"""
@@ -107,6 +105,9 @@ class ExcelComparator:
             cell.font = Font(bold=True)
             cell.border = THIN_BORDER
         
+        # Find differing cells over the common columns in one pass
+        diff_values = diff_frames(df1, df2, common_cols)[0].to_numpy()
+        
         # Track row match status
         file1_match_status = []
         max_rows = max(len(df1), len(df2))
@@ -133,13 +134,8 @@ class ExcelComparator:
                 row_match = False
             
             # Compare values for common columns
-            if i < len(df1) and i < len(df2):
-                for col in common_cols:
-                    val1 = df1.at[i, col]
-                    val2 = df2.at[i, col]
-                    if not self.are_equal(val1, val2):
-                        row_match = False
-                        break
+            if i < len(diff_values) and diff_values[i].any():
+                row_match = False
             
             # Set match status
             status = "Matched" if row_match else "Not Matched"
@@ -181,19 +177,16 @@ class ExcelComparator:
                 ws.cell(row=row_idx, column=match_status_col).fill = fill
             
             # Highlight cell differences
-            if self.highlight_cell_diffs and i < min(len(df1), len(df2)):
-                for col in common_cols:
-                    val1 = df1.at[i, col]
-                    val2 = df2.at[i, col]
+            if self.highlight_cell_diffs and i < len(diff_values):
+                for c in np.flatnonzero(diff_values[i]):
+                    # Find column positions
+                    col = common_cols[c]
+                    col_idx1 = list(df1.columns).index(col) + 1
+                    col_idx2 = list(df2.columns).index(col) + len(df1.columns) + 2
                     
-                    if not self.are_equal(val1, val2):
-                        # Find column positions
-                        col_idx1 = list(df1.columns).index(col) + 1
-                        col_idx2 = list(df2.columns).index(col) + len(df1.columns) + 2
-                        
-                        # Apply highlighting
-                        ws.cell(row=row_idx, column=col_idx1).fill = CELL_DIFF_FILL
-                        ws.cell(row=row_idx, column=col_idx2).fill = CELL_DIFF_FILL
+                    # Apply highlighting
+                    ws.cell(row=row_idx, column=col_idx1).fill = CELL_DIFF_FILL
+                    ws.cell(row=row_idx, column=col_idx2).fill = CELL_DIFF_FILL
         
         # Auto-size columns
         for col_idx in range(1, len(header_row) + 1):
@@ -317,8 +310,7 @@ class ExcelComparator:
     def compare(self, output_file=None):
         try:
             # Read data
-            df1 = pd.read_excel(self.file1_path, sheet_name=self.sheet1_name)
-            df2 = pd.read_excel(self.file2_path, sheet_name=self.sheet2_name)
+            df1, df2 = read_sheets([(self.file1_path, self.sheet1_name), (self.file2_path, self.sheet2_name)])
             
             # Create comparison workbook
             output_wb = Workbook()
@@ -1,3 +1,7 @@
+import numpy as np
+from comparison_engine import build_concat_keys, diff_frames
+
+
 def create_side_by_side_sheet(self, df1, df2, output_wb):
     """Create side-by-side comparison sheet with single Match Status column at end"""
     # Create sheet
@@ -11,33 +15,13 @@ def create_side_by_side_sheet(self, df1, df2, output_wb):
     str_cols2 = self.get_string_columns(df2)
     all_str_cols = list(set(str_cols1) | set(str_cols2))
     
-    # Create concatenation keys using all string columns
-    concat_keys1 = {}
-    concat_keys2 = {}
-    
-    # Create keys for df1
-    for idx, row in df1.iterrows():
-        key_parts = []
-        for col in all_str_cols:
-            if col in df1.columns:
-                val = row[col]
-                if pd.notna(val) and not self.is_date(val):
-                    key_parts.append(str(val))
-        concat_keys1[idx] = "_".join(key_parts) if key_parts else None
-    
-    # Create keys for df2
-    for idx, row in df2.iterrows():
-        key_parts = []
-        for col in all_str_cols:
-            if col in df2.columns:
-                val = row[col]
-                if pd.notna(val) and not self.is_date(val):
-                    key_parts.append(str(val))
-        concat_keys2[idx] = "_".join(key_parts) if key_parts else None
+    # Create concatenation keys using all string columns, column by column
+    concat_keys1 = build_concat_keys(df1, all_str_cols)
+    concat_keys2 = build_concat_keys(df2, all_str_cols)
     
     # Create sets of keys for matching
-    keys1_set = set(concat_keys1.values())
-    keys2_set = set(concat_keys2.values())
+    keys1_set = set(concat_keys1)
+    keys2_set = set(concat_keys2)
     
     # Create match status for File1
     file1_match_status = []
@@ -69,6 +53,9 @@ def create_side_by_side_sheet(self, df1, df2, output_wb):
     ws.cell(row=1, column=match_status_col).fill = HEADER_FILL
     ws.cell(row=1, column=match_status_col).font = Font(bold=True)
     
+    # Find differing cells over the common columns in one pass
+    diff_values = diff_frames(df1, df2, common_cols)[0].to_numpy()
+    
     # Write data row by row
     max_rows = max(len(df1), len(df2))
     for i in range(max_rows):
@@ -124,18 +111,14 @@ def create_side_by_side_sheet(self, df1, df2, output_wb):
             ws.cell(row=i+2, column=match_status_col).fill = fill
         
         # Apply cell difference highlighting
-        if self.highlight_cell_diffs:
-            if i < len(df1) and i < len(df2):
-                for col in common_cols:
-                    val1 = df1.at[i, col]
-                    val2 = df2.at[i, col]
-                    
-                    if not self.are_equal(val1, val2):
-                        col_idx1 = list(df1.columns).index(col) + 1
-                        col_idx2 = list(df2.columns).index(col) + len(df1.columns) + 2  # +1 for separator, +1 for next column
-                        
-                        ws.cell(row=i+2, column=col_idx1).fill = CELL_DIFF_FILL
-                        ws.cell(row=i+2, column=col_idx2).fill = CELL_DIFF_FILL
+        if self.highlight_cell_diffs and i < len(diff_values):
+            for c in np.flatnonzero(diff_values[i]):
+                col = common_cols[c]
+                col_idx1 = list(df1.columns).index(col) + 1
+                col_idx2 = list(df2.columns).index(col) + len(df1.columns) + 2  # +1 for separator, +1 for next column
+                
+                ws.cell(row=i+2, column=col_idx1).fill = CELL_DIFF_FILL
+                ws.cell(row=i+2, column=col_idx2).fill = CELL_DIFF_FILL
         
         # Style the separator column
         ws.cell(row=i+2, column=separator_col).fill = PatternFill(start_color="000000", end_color="000000", fill_type="solid")
@@ -0,0 +1,942 @@
+import hashlib
+import pandas as pd
+import numpy as np
+from datetime import datetime
+
+
+# Column classes found by infer_column_type
+COLUMN_EMPTY = "empty"
+COLUMN_STRING = "string"
+COLUMN_NUMERIC = "numeric"
+COLUMN_NUMERIC_TEXT = "numeric-text"
+COLUMN_DATE = "date"
+COLUMN_MIXED = "mixed"
+
+# Classes used as concatenation key parts (numbers stored as text are usually codes;
+# mixed columns such as IDs holding both numbers and text are stringified cell by cell)
+KEY_COLUMN_TYPES = (COLUMN_STRING, COLUMN_NUMERIC_TEXT, COLUMN_MIXED, COLUMN_EMPTY)
+
+# Classes compared in the numeric difference tables
+NUMERIC_COLUMN_TYPES = (COLUMN_NUMERIC, COLUMN_NUMERIC_TEXT)
+
+# infer_dtype results that map straight onto a class
+INFERRED_TYPES = {
+    "empty": COLUMN_EMPTY,
+    "string": COLUMN_STRING,
+    "integer": COLUMN_NUMERIC,
+    "floating": COLUMN_NUMERIC,
+    "mixed-integer-float": COLUMN_NUMERIC,
+    "decimal": COLUMN_NUMERIC,
+    "datetime": COLUMN_DATE,
+    "datetime64": COLUMN_DATE,
+    "date": COLUMN_DATE,
+}
+
+
+def infer_column_type(values, sample_size=None):
+    """
+    Classify a whole column as empty, string, numeric, numeric-text, date or mixed.
+
+    The dtype decides where it can; object and string columns are inferred
+    from every cell in one vectorized pass (pd.api.types.infer_dtype), not
+    from the first rows only. String columns whose values all parse as
+    numbers are numeric-text.
+
+    Args:
+        values (Series): Column to classify
+        sample_size (int, optional): Infer object columns from this many
+            rows spread evenly over the column instead of all of them
+
+    Returns:
+        str: One of the COLUMN_* classes
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return COLUMN_DATE
+    if pd.api.types.is_numeric_dtype(values):
+        return COLUMN_NUMERIC
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = pd.Series(values.cat.categories)
+
+    if sample_size and len(values) > sample_size:
+        # Evenly spaced rows cover every part of the sheet, unlike head()
+        values = values.iloc[np.linspace(0, len(values) - 1, sample_size).astype(np.int64)]
+
+    column_type = INFERRED_TYPES.get(pd.api.types.infer_dtype(values, skipna=True), COLUMN_MIXED)
+    if column_type == COLUMN_STRING:
+        texts = pd.Series(values.dropna().unique())
+        # Most text columns already fail on their first values; only parse all of them otherwise
+        if is_numeric_text(texts.iloc[:1000]) and is_numeric_text(texts):
+            return COLUMN_NUMERIC_TEXT
+    return column_type
+
+
+def is_numeric_text(texts):
+    """Check if every text of a Series parses as a number"""
+    return bool(pd.to_numeric(texts, errors="coerce").notna().all())
+
+
+def column_types(df, sample_size=None):
+    """
+    Return the class of every column of a frame, inferring each column once.
+
+    Results are kept in df.attrs["column_types"], so later calls for the
+    same frame (key building, diffing, numeric comparison) reuse them.
+
+    Returns:
+        dict: Column -> COLUMN_* class
+    """
+    cached = df.attrs.setdefault("column_types", {})
+    for col in df.columns:
+        if col not in cached:
+            cached[col] = infer_column_type(df[col], sample_size=sample_size)
+    return {col: cached[col] for col in df.columns}
+
+
+def string_columns(df):
+    """Columns used as concatenation key parts: text and mixed columns, never dates or numbers"""
+    types = column_types(df)
+    return [col for col in df.columns if types[col] in KEY_COLUMN_TYPES]
+
+
+def numeric_columns(df1, df2):
+    """
+    Common columns to compare numerically, in df1 order.
+
+    Both sides must be numeric, or one of them numbers stored as text.
+    """
+    types1 = column_types(df1)
+    types2 = column_types(df2)
+    return [col for col in df1.columns if col in types2
+            and types1[col] in NUMERIC_COLUMN_TYPES and types2[col] in NUMERIC_COLUMN_TYPES
+            and COLUMN_NUMERIC in (types1[col], types2[col])]
+
+
+def key_part_mask(values, skip_na=True, column_type=None):
+    """Return a boolean array marking the cells of a column usable as key parts"""
+    if column_type is None:
+        column_type = infer_column_type(values)
+
+    # Whole date columns never contribute to the key
+    if column_type == COLUMN_DATE:
+        return np.zeros(len(values), dtype=bool)
+
+    if skip_na:
+        mask = values.notna().to_numpy(copy=True)
+    else:
+        mask = np.ones(len(values), dtype=bool)
+
+    # Only mixed columns may still hold individual date cells, which are left out
+    if column_type == COLUMN_MIXED:
+        is_date = values.map(lambda v: isinstance(v, (datetime, pd.Timestamp))).to_numpy(dtype=bool)
+        mask = mask & ~is_date
+
+    return mask
+
+
+def key_part_text(values, valid):
+    """
+    Return str(value) of the valid cells of a column, None elsewhere.
+
+    Categorical columns (see share_string_ids) only convert their categories
+    and pick the texts by code, so no per-cell str() call is made.
+    """
+    text = np.full(len(values), None, dtype=object)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories = np.asarray(values.cat.categories.map(str), dtype=object)
+        text[valid] = categories[values.cat.codes.to_numpy()[valid]]
+    else:
+        text[valid] = values[valid].astype(object).map(str).to_numpy(dtype=object)
+    return text
+
+
+def share_string_ids(frames, max_unique_ratio=None):
+    """
+    Map the string columns of several frames into one global integer ID space.
+
+    Every distinct string of all frames gets one int32 ID, and each pure
+    string column becomes a Categorical over the same shared category table.
+    Equal strings then have equal codes in every frame, so comparing,
+    hashing and matching string cells works on int32 arrays; the texts are
+    only looked up again when the cells are written to the report.
+    Categorical columns (e.g. from xlsx_reader.read_xlsx with
+    categorical_strings=True) are remapped through their categories, other
+    string columns are factorized once.
+
+    Args:
+        frames (list): DataFrames to encode together, e.g. both compared sheets
+        max_unique_ratio (float, optional): Only encode columns whose distinct
+            strings, counted over all frames, are at most this share of their
+            rows (codes such as region or currency). Defaults to every string column.
+
+    Returns:
+        list: Shallow copies of the frames with the string columns encoded
+    """
+    found = []
+    for df in frames:
+        columns = {}
+        for col in df.columns:
+            values = df[col]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                codes = values.cat.codes.to_numpy()
+                uniques = values.cat.categories
+                if pd.api.types.infer_dtype(uniques, skipna=True) not in ("string", "empty"):
+                    continue
+            elif pd.api.types.is_string_dtype(values) and \
+                    pd.api.types.infer_dtype(values, skipna=True) in ("string", "empty"):
+                codes, uniques = pd.factorize(values)
+            else:
+                continue
+            columns[col] = codes, uniques.tolist()
+        found.append(columns)
+
+    # A column is encoded in every frame or in none, so both sides keep comparing by code
+    if max_unique_ratio is not None:
+        distinct = {}
+        rows = {}
+        for df, columns in zip(frames, found):
+            for col, (_, uniques) in columns.items():
+                distinct.setdefault(col, set()).update(uniques)
+                rows[col] = rows.get(col, 0) + len(df)
+        found = [{col: entry for col, entry in columns.items()
+                  if len(distinct[col]) <= max_unique_ratio * rows[col]} for columns in found]
+
+    ids = {}
+    encoded = []
+    for columns in found:
+        codes_by_col = {}
+        for col, (codes, uniques) in columns.items():
+            remap = np.array([ids.setdefault(text, len(ids)) for text in uniques], dtype=np.int32)
+            codes_by_col[col] = np.where(codes >= 0, remap[np.maximum(codes, 0)], -1).astype(np.int32)
+        encoded.append(codes_by_col)
+
+    # One category table shared by every encoded column, built once all strings are known
+    dtype = pd.CategoricalDtype(pd.Index(list(ids), dtype=object))
+    shared = []
+    for df, codes_by_col in zip(frames, encoded):
+        df = df.copy(deep=False)
+        for col, codes in codes_by_col.items():
+            df[col] = pd.Categorical.from_codes(codes, dtype=dtype)
+        shared.append(df)
+    return shared
+
+
+def build_concat_keys(df, columns, sep="_", skip_na=True):
+    """
+    Build the concatenation key of every row column by column.
+
+    Produces the same keys as joining str(value) of each non-empty,
+    non-date cell with `sep` row by row, but works on whole columns.
+
+    Args:
+        df (DataFrame): Data to build keys for
+        columns (list): Key columns; columns missing from df are ignored
+        sep (str): Separator placed between key parts. Default "_".
+        skip_na (bool): Leave out empty cells instead of writing "nan". Default True.
+
+    Returns:
+        Series: Key per row (None when the row has no key parts), indexed like df
+    """
+    keys = np.full(len(df), None, dtype=object)
+    has_key = np.zeros(len(df), dtype=bool)
+    types = column_types(df)
+
+    for col in columns:
+        if col not in df.columns:
+            continue
+
+        values = df[col]
+        valid = key_part_mask(values, skip_na=skip_na, column_type=types[col])
+        if not valid.any():
+            continue
+
+        text = key_part_text(values, valid)
+
+        # Rows that already have parts get "<key><sep><part>", the rest start a new key
+        extend = valid & has_key
+        start = valid & ~has_key
+        keys[extend] = keys[extend] + sep + text[extend]
+        keys[start] = text[start]
+        has_key |= valid
+
+    return pd.Series(keys, index=df.index, dtype=object)
+
+
+def hash_row_keys(df, columns, skip_na=True):
+    """
+    Hash the key parts of every row into a single 64-bit row key.
+
+    Uses the same key parts as build_concat_keys, but stores one uint64
+    per row instead of a joined string. Parts are hashed positionally, so
+    both files must be hashed with the same column list in the same order.
+
+    Args:
+        df (DataFrame): Data to build keys for
+        columns (list): Key columns; columns missing from df count as empty
+        skip_na (bool): Treat empty cells as missing key parts. Default True.
+
+    Returns:
+        tuple: (uint64 array of row hashes, bool array marking rows with a key)
+    """
+    parts = {}
+    has_key = np.zeros(len(df), dtype=bool)
+    types = column_types(df)
+
+    for col in columns:
+        text = np.full(len(df), None, dtype=object)
+        if col in df.columns:
+            values = df[col]
+            valid = key_part_mask(values, skip_na=skip_na, column_type=types[col])
+            if valid.any() and isinstance(values.dtype, pd.CategoricalDtype):
+                # Hashed like the equivalent object column, but only once per category
+                codes = values.cat.codes.to_numpy()
+                non_empty = np.asarray(values.cat.categories != "", dtype=bool)
+                has_key |= valid & non_empty[np.maximum(codes, 0)]
+                parts[col] = values.where(valid).reset_index(drop=True)
+                continue
+            if valid.any():
+                text = key_part_text(values, valid)
+                has_key |= valid & (text != "")
+        parts[col] = text
+
+    if not parts:
+        return np.zeros(len(df), dtype=np.uint64), has_key
+
+    hashes = pd.util.hash_pandas_object(pd.DataFrame(parts), index=False)
+    return hashes.to_numpy(dtype=np.uint64), has_key
+
+
+def hash_chunk_keys(chunks, columns, skip_na=True):
+    """
+    Hash the row keys of a sheet that is streamed in chunks.
+
+    Only the hashes are kept (9 bytes per row), so the whole sheet never has
+    to be in memory. Gives the same result as hash_row_keys on the full sheet
+    as long as every chunk carries the sheet-wide dtypes and column classes
+    (iter_sheet_chunks with a schema from scan_sheet_columns); chunks that
+    infer their own dtypes can turn key part "5" into "5.0".
+
+    Args:
+        chunks (iterable): DataFrames in sheet order, e.g. from sheet_loader.iter_sheet_chunks
+        columns (list): Key columns, identical for both files
+        skip_na (bool): Treat empty cells as missing key parts. Default True.
+
+    Returns:
+        tuple: (uint64 array of row hashes, bool array marking rows with a key)
+    """
+    hashes = [np.zeros(0, dtype=np.uint64)]
+    has_key = [np.zeros(0, dtype=bool)]
+    for chunk in chunks:
+        chunk_hashes, chunk_has_key = hash_row_keys(chunk, columns, skip_na=skip_na)
+        hashes.append(chunk_hashes)
+        has_key.append(chunk_has_key)
+    return np.concatenate(hashes), np.concatenate(has_key)
+
+
+def match_row_hashes(hashes1, has_key1, hashes2, has_key2):
+    """
+    Pair the first row of every hashed key that is present in both files.
+
+    Returns:
+        tuple: (row positions in file 1, row positions in file 2), ordered by file 1 position
+    """
+    pos1 = np.flatnonzero(has_key1)
+    pos2 = np.flatnonzero(has_key2)
+
+    # np.unique reports the first occurrence of every hash
+    uniq1, first1 = np.unique(hashes1[pos1], return_index=True)
+    uniq2, first2 = np.unique(hashes2[pos2], return_index=True)
+    _, idx1, idx2 = np.intersect1d(uniq1, uniq2, assume_unique=True, return_indices=True)
+
+    rows1 = pos1[first1[idx1]]
+    rows2 = pos2[first2[idx2]]
+    order = np.argsort(rows1, kind="stable")
+    return rows1[order], rows2[order]
+
+
+def verify_hash_matches(df1, rows1, df2, rows2, columns, skip_na=True):
+    """Raise ValueError if any hash-matched row pair has different key values"""
+    keys1 = build_concat_keys(df1.iloc[rows1], columns, skip_na=skip_na).to_numpy()
+    keys2 = build_concat_keys(df2.iloc[rows2], columns, skip_na=skip_na).to_numpy()
+    collisions = np.flatnonzero(keys1 != keys2)
+    if len(collisions):
+        first = collisions[0]
+        raise ValueError(
+            f"Row key hash collision between File1 row {rows1[first] + 1} "
+            f"and File2 row {rows2[first] + 1} ({len(collisions)} in total)"
+        )
+
+
+
+def build_key_index(keys, has_key=None):
+    """
+    Map every row key to the positions of the rows that carry it.
+
+    Args:
+        keys (array-like): Row keys, either concatenation strings or row hashes
+        has_key (array, optional): Rows to index. Defaults to rows whose key is not empty.
+
+    Returns:
+        dict: Key -> list of row positions in ascending order
+    """
+    keys = np.asarray(keys)
+    if has_key is None:
+        has_key = (pd.Series(keys, dtype=object).fillna("") != "").to_numpy()
+
+    positions = np.flatnonzero(has_key)
+    index = {}
+    for pos, key in zip(positions.tolist(), keys[positions].tolist()):
+        index.setdefault(key, []).append(pos)
+    return index
+
+
+def index_chunk_keys(chunks, columns, sep="_", skip_na=True):
+    """
+    Build the key index of a sheet that is streamed in chunks.
+
+    Returns:
+        dict: Concatenation key -> list of row positions in the whole sheet,
+            as build_key_index(build_concat_keys(df, columns)) would give
+    """
+    index = {}
+    offset = 0
+    for chunk in chunks:
+        keys = build_concat_keys(chunk, columns, sep=sep, skip_na=skip_na)
+        for key, positions in build_key_index(keys).items():
+            index.setdefault(key, []).extend(pos + offset for pos in positions)
+        offset += len(chunk)
+    return index
+
+
+def match_status(keys1, keys2, matched="Matched", unmatched="Not Matched"):
+    """
+    Label every row of both files by whether its key occurs in the other file.
+
+    Works on whole key arrays with one hash lookup per row. Rows without a
+    key (None) match each other, as they did in the per-key loop, so the
+    match counts of the reports are unchanged. pair_key_rows, in contrast,
+    never pairs rows without a key: the status says that both files have
+    such rows, not which of them belong together.
+
+    Returns:
+        tuple: (status array for file 1, status array for file 2)
+    """
+    keys1 = pd.Series(keys1, dtype=object)
+    keys2 = pd.Series(keys2, dtype=object)
+    status1 = np.where(keys1.isin(keys2).to_numpy(), matched, unmatched).astype(object)
+    status2 = np.where(keys2.isin(keys1).to_numpy(), matched, unmatched).astype(object)
+    return status1, status2
+
+
+def cells_equal(values1, values2, mixed=False):
+    """
+    Elementwise a == b over two equal-length arrays, treating NaN as equal to NaN.
+
+    mixed=True goes straight to the per-cell comparison, for columns known
+    to mix value types.
+    """
+    # Strings encoded with share_string_ids compare by their int32 codes
+    if isinstance(values1, pd.Categorical) and isinstance(values2, pd.Categorical) \
+            and values1.dtype == values2.dtype:
+        return values1.codes == values2.codes
+
+    s1 = pd.Series(np.asarray(values1))
+    s2 = pd.Series(np.asarray(values2))
+    na1 = s1.isna().to_numpy()
+    na2 = s2.isna().to_numpy()
+
+    eq = None
+    if not mixed:
+        try:
+            eq = s1.eq(s2).to_numpy(dtype=bool)
+        except TypeError:
+            pass
+    if eq is None:
+        # Mixed objects that cannot be compared as a whole column
+        eq = np.array([a == b for a, b in zip(s1.tolist(), s2.tolist())], dtype=bool)
+
+    return (na1 & na2) | (eq & ~na1 & ~na2)
+
+
+def hashable_values(values):
+    """
+    Prepare a column for fingerprinting so that only value changes change its hash.
+
+    Numbers are hashed as float64: a column read as int in one file and as
+    float in the other (an empty cell elsewhere turns it into float) still
+    hashes alike for equal numbers. Excel stores every number as a double,
+    so the cast never merges distinct values.
+    """
+    if pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype) \
+            and values.dtype != np.float64:
+        return values.astype(np.float64)
+    return values
+
+
+def row_fingerprints(df, columns):
+    """
+    Hash the cells of every row over the given columns into one uint64.
+
+    Columns are hashed positionally, so fingerprints of two files are only
+    comparable for the same column list. Equal cells of equal dtypes give
+    equal fingerprints (strings hash alike as object, string or categorical
+    columns, numbers alike as int or float columns); anything else only
+    makes rows look changed, never unchanged.
+
+    Returns:
+        array: uint64 fingerprint per row
+    """
+    if not columns:
+        return np.zeros(len(df), dtype=np.uint64)
+    frame = pd.DataFrame({i: hashable_values(df[col]).reset_index(drop=True) for i, col in enumerate(columns)})
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy(dtype=np.uint64)
+
+
+def column_fingerprint(values, rows=None):
+    """
+    Hash a whole column, or its cells at the given row positions, into one digest.
+
+    Two columns holding equal cells in the same order have the same
+    fingerprint, also when one was read as int and the other as float.
+
+    Returns:
+        str: Hex digest
+    """
+    if rows is not None:
+        values = pd.Series(values.array.take(np.asarray(rows, dtype=np.int64)))
+    cell_hashes = pd.util.hash_pandas_object(hashable_values(values), index=False).to_numpy(dtype=np.uint64)
+    return hashlib.blake2b(cell_hashes.tobytes(), digest_size=16).hexdigest()
+
+
+def changed_columns(df1, df2, columns=None, rows1=None, rows2=None):
+    """
+    List the columns whose aligned values differ between the two frames.
+
+    Compares one fingerprint per column instead of the cells, so columns
+    that never change (descriptions, static attributes) cost one hash pass.
+    Columns mixing value types are always reported, as their hashes do not
+    tell 1 from "1".
+
+    Args:
+        df1 (DataFrame): File1 data
+        df2 (DataFrame): File2 data
+        columns (list, optional): Columns to check. Defaults to the shared ones, in df1 order.
+        rows1, rows2 (array, optional): Paired row positions, e.g. from
+            matched keys. Default row i with row i.
+
+    Returns:
+        list: Changed columns, in the order given
+    """
+    if columns is None:
+        columns = [col for col in df1.columns if col in df2.columns]
+    if rows1 is None or rows2 is None:
+        rows1 = rows2 = np.arange(min(len(df1), len(df2)))
+    types1 = column_types(df1)
+    types2 = column_types(df2)
+
+    changed = []
+    for col in columns:
+        if COLUMN_MIXED in (types1[col], types2[col]) or \
+                column_fingerprint(df1[col], rows1) != column_fingerprint(df2[col], rows2):
+            changed.append(col)
+    return changed
+
+
+def diff_frames(df1, df2, columns=None, rows1=None, rows2=None):
+    """
+    Compare two row-aligned frames cell by cell over their common columns.
+
+    Row i of df1 is compared with row i of df2 by position, so pass frames
+    that are already aligned (padded, or reordered by matched keys), or give
+    the pairs as rows1/rows2. Rows beyond the shorter frame are not compared.
+
+    Columns whose fingerprints match (see changed_columns) are skipped.
+    Every row is then fingerprinted over the remaining columns (see
+    row_fingerprints); only pairs whose fingerprints differ are compared cell
+    by cell, so the work follows the number of changed rows. Columns mixing
+    value types are always compared per cell, as their hashes do not tell 1
+    from "1".
+
+    Args:
+        df1 (DataFrame): File1 data
+        df2 (DataFrame): File2 data
+        columns (list, optional): Columns to compare. Defaults to the df1
+            columns that also exist in df2, in df1 order.
+        rows1, rows2 (array, optional): Paired row positions to compare,
+            e.g. from matched keys. Default row i with row i.
+
+    Returns:
+        tuple: (mask, rows, cols) where mask is a boolean DataFrame that is
+        True for differing cells (one row per compared pair), and rows/cols
+        are the int32 positions of those cells in the mask
+    """
+    if columns is None:
+        columns = [col for col in df1.columns if col in df2.columns]
+    if rows1 is None or rows2 is None:
+        rows1 = rows2 = np.arange(min(len(df1), len(df2)))
+    rows1 = np.asarray(rows1, dtype=np.int64)
+    rows2 = np.asarray(rows2, dtype=np.int64)
+    types1 = column_types(df1)
+    types2 = column_types(df2)
+
+    changed_cols = set(changed_columns(df1, df2, columns, rows1, rows2))
+    mixed = [col for col in changed_cols if COLUMN_MIXED in (types1[col], types2[col])]
+    hashed = [col for col in columns if col in changed_cols and col not in mixed]
+    changed = np.flatnonzero(row_fingerprints(df1, hashed)[rows1] != row_fingerprints(df2, hashed)[rows2])
+
+    mask = np.zeros((len(rows1), len(columns)), dtype=bool)
+    for c, col in enumerate(columns):
+        if col not in changed_cols:
+            continue
+        pairs = np.arange(len(rows1)) if col in mixed else changed
+        if not len(pairs):
+            continue
+        values1 = df1[col].array.take(rows1[pairs])
+        values2 = df2[col].array.take(rows2[pairs])
+        mask[pairs, c] = ~cells_equal(values1, values2, mixed=col in mixed)
+
+    rows, cols = np.nonzero(mask)
+    mask = pd.DataFrame(mask, columns=list(columns))
+    return mask, rows.astype(np.int32), cols.astype(np.int32)
+
+
+# Process exit codes of the check modes, as cmp and diff use them
+EXIT_EQUAL = 0
+EXIT_DIFFERENT = 1
+EXIT_ERROR = 2
+
+
+def make_verdict(equal, reason, differences=None):
+    """
+    Build the structured result of a check.
+
+    Returns:
+        dict: equal (bool), reason (str), differences (list of dicts with
+            row1, row2, column, value1, value2) and exit_code
+    """
+    return {
+        "equal": equal,
+        "reason": reason,
+        "differences": differences or [],
+        "exit_code": EXIT_EQUAL if equal else EXIT_DIFFERENT,
+    }
+
+
+def check_frames(df1, df2, columns=None, rows1=None, rows2=None, max_differences=1, first_row=1):
+    """
+    Decide whether two frames hold the same cells, stopping at the first differences.
+
+    Columns are taken one at a time: a column whose fingerprints match is
+    passed without looking at its cells, and the check ends as soon as
+    max_differences differing cells have been found. No report is built.
+
+    Args:
+        df1 (DataFrame): File1 data
+        df2 (DataFrame): File2 data
+        columns (list, optional): Columns to check. By default both frames
+            must have the same columns in the same order.
+        rows1, rows2 (array, optional): Paired row positions, e.g. from
+            matched keys. By default both frames must have the same number
+            of rows and row i is checked against row i.
+        max_differences (int, optional): Stop after this many differing
+            cells. Default 1; None collects all of them.
+        first_row (int): Number reported for the first row. Default 1.
+
+    Returns:
+        dict: Verdict, see make_verdict
+    """
+    if columns is None:
+        if list(df1.columns) != list(df2.columns):
+            return make_verdict(False, "columns differ")
+        columns = list(df1.columns)
+    if rows1 is None or rows2 is None:
+        if len(df1) != len(df2):
+            return make_verdict(False, f"row counts differ ({len(df1)} vs {len(df2)})")
+        rows1 = rows2 = np.arange(len(df1))
+    rows1 = np.asarray(rows1, dtype=np.int64)
+    rows2 = np.asarray(rows2, dtype=np.int64)
+    types1 = column_types(df1)
+    types2 = column_types(df2)
+
+    differences = []
+    for col in columns:
+        mixed = COLUMN_MIXED in (types1[col], types2[col])
+        if not mixed and column_fingerprint(df1[col], rows1) == column_fingerprint(df2[col], rows2):
+            continue
+
+        values1 = df1[col].array.take(rows1)
+        values2 = df2[col].array.take(rows2)
+        differing = np.flatnonzero(~cells_equal(values1, values2, mixed=mixed))
+        if max_differences is not None:
+            differing = differing[:max_differences - len(differences)]
+        for pos in differing.tolist():
+            differences.append({
+                "row1": int(rows1[pos]) + first_row,
+                "row2": int(rows2[pos]) + first_row,
+                "column": col,
+                "value1": values1[pos],
+                "value2": values2[pos],
+            })
+        if max_differences is not None and len(differences) >= max_differences:
+            break
+
+    if differences:
+        return make_verdict(False, "cells differ", differences)
+    return make_verdict(True, "equal cells")
+
+
+def diff_chunks(chunks1, chunks2, columns=None):
+    """
+    Compare two sheets streamed in chunks cell by cell, by row position.
+
+    Both streams must use the same chunk size so that chunk i of one sheet
+    holds the same rows as chunk i of the other. Rows beyond the shorter
+    sheet are not compared, like diff_frames.
+
+    Args:
+        chunks1 (iterable): DataFrames of file 1 in sheet order
+        chunks2 (iterable): DataFrames of file 2 in sheet order
+        columns (list, optional): Columns to compare. Defaults to the shared ones.
+
+    Yields:
+        tuple: (chunk1, chunk2, rows, cols) per chunk pair, where rows/cols are
+            the positions of differing cells within the chunk and the columns
+    """
+    for chunk1, chunk2 in zip(chunks1, chunks2):
+        _, rows, cols = diff_frames(chunk1, chunk2, columns)
+        yield chunk1, chunk2, rows, cols
+
+        # A short chunk is the last one of its sheet
+        if len(chunk1) != len(chunk2):
+            break
+
+
+def pair_key_rows(key_index1, key_index2):
+    """
+    Pair the first File1 and File2 row of every key found in both key indexes.
+
+    Rows without a key are not in the indexes (see build_key_index) and so
+    stay unpaired, although match_status labels them as matched when both
+    files have some.
+
+    Returns:
+        tuple: (row positions in file 1, row positions in file 2), ordered by file 1 position
+    """
+    pairs = [(rows[0], key_index2[key][0]) for key, rows in key_index1.items() if key in key_index2]
+    pairs.sort()
+    rows1 = np.array([row1 for row1, _ in pairs], dtype=np.int64)
+    rows2 = np.array([row2 for _, row2 in pairs], dtype=np.int64)
+    return rows1, rows2
+
+
+# Edit distance above which align_rows gives up and pairs rows by position
+MAX_ALIGN_EDITS = 2000
+
+
+def myers_matches(a, b, max_edits=MAX_ALIGN_EDITS):
+    """
+    Find a longest common subsequence of two sequences with Myers' O(ND) diff.
+
+    The work grows with the number of inserted and deleted items D, not
+    with the product of the lengths, so sequences with few edits are
+    aligned in about linear time.
+
+    Args:
+        a, b (list): Sequences of comparable items (e.g. row hashes)
+        max_edits (int, optional): Give up once more than this many
+            insertions plus deletions are needed. None never gives up.
+
+    Returns:
+        list: Matched (i, j) position pairs in increasing order, or None
+        when max_edits was exceeded
+    """
+    n, m = len(a), len(b)
+    limit = n + m if max_edits is None else min(n + m, max_edits)
+    offset = limit + 1
+    v = [0] * (2 * limit + 3)
+    trace = []
+
+    # Forward pass: v[k] is the furthest x reached on diagonal k = x - y
+    for d in range(limit + 1):
+        trace.append(v[offset - d - 1:offset + d + 2])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                break
+        else:
+            continue
+        break
+    else:
+        return None
+
+    # Walk back through the saved rounds, collecting the diagonal moves
+    matches = []
+    x, y = n, m
+    for d in range(len(trace) - 1, -1, -1):
+        saved = trace[d]
+        k = x - y
+        if k == -d or (k != d and saved[k - 1 + d + 1] < saved[k + 1 + d + 1]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = saved[prev_k + d + 1]
+        prev_y = prev_x - prev_k
+        while x > prev_x and y > prev_y:
+            x -= 1
+            y -= 1
+            matches.append((x, y))
+        x, y = prev_x, prev_y
+    matches.reverse()
+    return matches
+
+
+def align_rows(hashes1, hashes2, max_edits=MAX_ALIGN_EDITS):
+    """
+    Align two sequences of row hashes, finding inserted, deleted and changed rows.
+
+    The common prefix and suffix are cut off first; the rest is aligned
+    with myers_matches. Between two matched rows, the removed and added rows
+    are paired up as changed rows as far as they go; the remainder is
+    deleted (File1 only) or inserted (File2 only). When more than max_edits
+    edits would be needed the files have little in common, and the rows of
+    the remaining middle part are paired by position instead.
+
+    Args:
+        hashes1, hashes2 (array): One hash per row, e.g. from row_fingerprints
+        max_edits (int, optional): Edit limit of the O(ND) search. Default MAX_ALIGN_EDITS.
+
+    Returns:
+        tuple: (slots1, slots2) int64 arrays of the same length holding the
+        File1 and File2 row position of every aligned slot, in order; -1
+        marks an inserted (slots1) or deleted (slots2) row
+    """
+    hashes1 = np.asarray(hashes1)
+    hashes2 = np.asarray(hashes2)
+    n1, n2 = len(hashes1), len(hashes2)
+
+    shortest = min(n1, n2)
+    differ = np.flatnonzero(hashes1[:shortest] != hashes2[:shortest])
+    prefix = int(differ[0]) if len(differ) else shortest
+    rest = shortest - prefix
+    differ = np.flatnonzero(hashes1[n1 - rest:][::-1] != hashes2[n2 - rest:][::-1])
+    suffix = int(differ[0]) if len(differ) else rest
+
+    # Small integer codes make the element comparisons of the search cheap
+    middle1 = hashes1[prefix:n1 - suffix]
+    middle2 = hashes2[prefix:n2 - suffix]
+    codes, _ = pd.factorize(np.concatenate([middle1, middle2]))
+    matches = myers_matches(codes[:len(middle1)].tolist(), codes[len(middle1):].tolist(), max_edits)
+    if matches is None:
+        matches = []
+
+    slots1 = list(range(prefix))
+    slots2 = list(range(prefix))
+    i = j = 0
+    for next_i, next_j in matches + [(len(middle1), len(middle2))]:
+        changed = min(next_i - i, next_j - j)
+        slots1.extend(range(prefix + i, prefix + next_i))
+        slots2.extend(range(prefix + j, prefix + j + changed))
+        slots2.extend([-1] * (next_i - i - changed))
+        slots1.extend([-1] * (next_j - j - changed))
+        slots2.extend(range(prefix + j + changed, prefix + next_j))
+        slots1.append(prefix + next_i)
+        slots2.append(prefix + next_j)
+        i, j = next_i + 1, next_j + 1
+    # Drop the end sentinel, then add the common suffix
+    slots1.pop()
+    slots2.pop()
+    slots1.extend(range(n1 - suffix, n1))
+    slots2.extend(range(n2 - suffix, n2))
+    return np.array(slots1, dtype=np.int64), np.array(slots2, dtype=np.int64)
+
+
+def align_frames(df1, df2, columns=None, max_edits=MAX_ALIGN_EDITS):
+    """
+    Align the rows of two frames by their content instead of their position.
+
+    Every row is hashed over the given columns (see row_fingerprints) and
+    the hash sequences are aligned with align_rows, so one inserted row no
+    longer shifts every later row out of place. Numeric columns read with
+    different dtypes (int in one file, float in the other) are hashed as
+    floats so that equal numbers still match.
+
+    Args:
+        df1 (DataFrame): File1 data
+        df2 (DataFrame): File2 data
+        columns (list, optional): Columns to hash. Defaults to the df1
+            columns that also exist in df2, in df1 order.
+        max_edits (int, optional): See align_rows
+
+    Returns:
+        tuple: (slots1, slots2), see align_rows
+    """
+    if columns is None:
+        columns = [col for col in df1.columns if col in df2.columns]
+
+    hashes1 = row_fingerprints(df1, columns)
+    hashes2 = row_fingerprints(df2, columns)
+    return align_rows(hashes1, hashes2, max_edits)
+
+
+NUMERIC_DIFF_COLUMNS = ["File1 Row", "File2 Row", "File1 Value", "File2 Value", "Absolute Diff", "Relative Diff"]
+
+
+def numeric_differences(df1, df2, columns, rows1=None, rows2=None, top_k=None):
+    """
+    Compute absolute and relative differences of numeric columns over paired rows.
+
+    Rows are paired by the given positions (normally from matched keys), or
+    by position when no pairs are given. Cells that are empty in either file
+    or equal are left out, as in the per-cell comparison.
+
+    Args:
+        df1 (DataFrame): File1 data
+        df2 (DataFrame): File2 data
+        columns (list): Numeric columns present in both frames
+        rows1, rows2 (array, optional): Paired row positions in df1 and df2
+        top_k (int, optional): Keep only the K largest absolute differences
+            per column, found with a partial sort. None or 0 keeps all.
+
+    Returns:
+        dict: Column -> DataFrame with NUMERIC_DIFF_COLUMNS (rows are 1-based).
+        Capped columns are ordered by absolute difference, largest first;
+        the others keep File1 row order.
+    """
+    if rows1 is None or rows2 is None:
+        rows1 = rows2 = np.arange(min(len(df1), len(df2)))
+
+    differences = {}
+    for col in columns:
+        values1 = df1[col].to_numpy()[rows1]
+        values2 = df2[col].to_numpy()[rows2]
+        a = pd.to_numeric(pd.Series(values1), errors="coerce").to_numpy(dtype=float)
+        b = pd.to_numeric(pd.Series(values2), errors="coerce").to_numpy(dtype=float)
+
+        idx = np.flatnonzero(~np.isnan(a) & ~np.isnan(b) & (a != b))
+        abs_diff = np.abs(a[idx] - b[idx])
+        scale = np.maximum(np.abs(a[idx]), np.abs(b[idx]))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rel_diff = np.where(scale != 0, abs_diff / scale, np.inf)
+
+        if top_k and len(idx) > top_k:
+            keep = np.argpartition(abs_diff, len(idx) - top_k)[len(idx) - top_k:]
+            keep = keep[np.argsort(-abs_diff[keep], kind="stable")]
+            idx, abs_diff, rel_diff = idx[keep], abs_diff[keep], rel_diff[keep]
+
+        differences[col] = pd.DataFrame({
+            "File1 Row": rows1[idx] + 1,
+            "File2 Row": rows2[idx] + 1,
+            "File1 Value": values1[idx],
+            "File2 Value": values2[idx],
+            "Absolute Diff": abs_diff,
+            "Relative Diff": rel_diff,
+        }, columns=NUMERIC_DIFF_COLUMNS)
+
+    return differences
@@ -1,9 +1,13 @@
 import pandas as pd
 import numpy as np
-from openpyxl import Workbook, load_workbook
+from openpyxl import Workbook
 from openpyxl.styles import PatternFill, Font, Border, Side, Alignment
-from openpyxl.utils import get_column_letter
 from datetime import datetime
+from itertools import zip_longest
+from comparison_engine import build_concat_keys, string_columns, numeric_columns, build_key_index, match_status, diff_frames, changed_columns, pair_key_rows, numeric_differences, hash_chunk_keys, diff_chunks, check_frames, make_verdict
+from sheet_loader import read_sheets, read_headers, project_columns, sheet_names, iter_sheet_chunks, scan_sheet_columns, same_file, same_sheet, CHUNK_ROWS
+from disk_cache import DiskSheetCache
+from report_writer import new_report_workbook, styled_row, set_column_widths
 
 # Define highlighting styles
 HEADER_DIFF_FILL = PatternFill(start_color="FFD700", end_color="FFD700", fill_type="solid")  # Gold
@@ -19,10 +23,16 @@ THIN_BORDER = Border(left=Side(style='thin'),
                      top=Side(style='thin'), 
                      bottom=Side(style='thin'))
 
+# Column widths of large sheets are measured on a sample of this many rows
+AUTO_WIDTH_SAMPLE = 10000
+
 class ExcelComparator:
     def __init__(self, file1_path, file2_path, sheet1_name=None, sheet2_name=None, 
                  highlight_missing=True, highlight_cell_diffs=True, 
-                 highlight_row_matches=True, create_num_table=True):
+                 highlight_row_matches=True, create_num_table=True, max_num_diffs=None,
+                 cache_dir=None, header_only=False, include_columns=None, exclude_columns=None,
+                 common_columns_only=False, xml_reader=False, string_ids=False, categorical_strings=True,
+                 short_circuit=True):
         """
         Initialize the ExcelComparator with file paths and options.
         
@@ -35,6 +45,22 @@ class ExcelComparator:
             highlight_cell_diffs (bool): Whether to highlight cell differences. Default True.
             highlight_row_matches (bool): Whether to highlight row matches/mismatches. Default True.
             create_num_table (bool): Whether to create numerical differences table. Default True.
+            max_num_diffs (int, optional): Keep only this many of the largest numerical differences per column. Defaults to all.
+            cache_dir (str, optional): Directory of the persistent parsed-sheet cache, so later runs on the
+                same workbooks skip parsing. Use disk_cache.default_cache_dir() for the shared one. Default no cache.
+            header_only (bool): Only read the header rows and create the Header Comparison sheet. Default False.
+            include_columns (list, optional): Only read and compare these columns. Defaults to all.
+            exclude_columns (list, optional): Never read these columns, e.g. wide free-text ones.
+            common_columns_only (bool): Only read the columns both sheets share. Default False.
+                The Header Comparison sheet always lists every column.
+            xml_reader (bool): Parse .xlsx inputs with the direct sheet-XML reader instead of
+                pd.read_excel. Same frames, read without building cell objects. Default False.
+            string_ids (bool): Encode the string columns of both files into one shared integer ID
+                space, so keys, matching and cell diffs of strings compare int32 codes. Default False.
+            categorical_strings (bool): Load low-cardinality string columns (codes such as region or
+                currency) as categoricals sharing one category set across both files. Default True.
+            short_circuit (bool): Before reading any cells, check whether the files or the compared sheets
+                are byte-identical; if so, only write a one-page summary. Default True.
         """
         self.file1_path = file1_path
         self.file2_path = file2_path
@@ -44,19 +70,28 @@ class ExcelComparator:
         self.highlight_cell_diffs = highlight_cell_diffs
         self.highlight_row_matches = highlight_row_matches
         self.create_num_table = create_num_table
+        self.max_num_diffs = max_num_diffs
+        self.disk_cache = DiskSheetCache(cache_dir) if cache_dir else None
+        self.header_only = header_only
+        self.include_columns = include_columns
+        self.exclude_columns = exclude_columns
+        self.common_columns_only = common_columns_only
+        self.xml_reader = xml_reader
+        self.string_ids = string_ids
+        self.categorical_strings = categorical_strings
+        self.short_circuit = short_circuit
+        self.identical = None
+        self.matched_pairs = None
+        self.changed_columns = None
         self.df1 = None
         self.df2 = None
         
         # If sheet names not provided, get first sheet name
         if not self.sheet1_name:
-            wb = load_workbook(file1_path, read_only=True)
-            self.sheet1_name = wb.sheetnames[0]
-            wb.close()
+            self.sheet1_name = sheet_names(file1_path)[0]
             
         if not self.sheet2_name:
-            wb = load_workbook(file2_path, read_only=True)
-            self.sheet2_name = wb.sheetnames[0]
-            wb.close()
+            self.sheet2_name = sheet_names(file2_path)[0]
     
     def are_equal(self, a, b):
         """Check if two values are equal, handling NaN cases"""
@@ -71,19 +106,8 @@ class ExcelComparator:
         return isinstance(value, (datetime, pd.Timestamp))
     
     def get_string_columns(self, df):
-        """Get all string columns that are not dates"""
-        string_cols = []
-        for col in df.columns:
-            # Skip date columns
-            if pd.api.types.is_datetime64_any_dtype(df[col]):
-                continue
-            
-            # Include string columns and object columns that are likely strings
-            if pd.api.types.is_string_dtype(df[col]) or \
-               (pd.api.types.is_object_dtype(df[col]) and 
-                all(isinstance(x, str) or pd.isna(x) for x in df[col].head(100))):
-                string_cols.append(col)
-        return string_cols
+        """Get all string columns that are not dates, classified over the full columns"""
+        return string_columns(df)
     
     def create_side_by_side_sheet(self, df1, df2, output_wb):
         """Create side-by-side comparison sheet with row matching column"""
@@ -98,44 +122,27 @@ class ExcelComparator:
         str_cols2 = self.get_string_columns(df2)
         all_str_cols = list(set(str_cols1) | set(str_cols2))
         
-        # Create concatenation keys using all string columns
-        concat_keys1 = {}
-        concat_keys2 = {}
-        
-        # Create keys for df1
-        for idx, row in df1.iterrows():
-            key_parts = []
-            for col in all_str_cols:
-                if col in df1.columns:
-                    val = row[col]
-                    if pd.notna(val) and not self.is_date(val):
-                        key_parts.append(str(val))
-            concat_keys1[idx] = "_".join(key_parts) if key_parts else None
-        
-        # Create keys for df2
-        for idx, row in df2.iterrows():
-            key_parts = []
-            for col in all_str_cols:
-                if col in df2.columns:
-                    val = row[col]
-                    if pd.notna(val) and not self.is_date(val):
-                        key_parts.append(str(val))
-            concat_keys2[idx] = "_".join(key_parts) if key_parts else None
-        
-        # Create sets of keys for matching
-        keys1_set = set(concat_keys1.values())
-        keys2_set = set(concat_keys2.values())
-        
-        # Create match status columns in original dataframes
-        df1['Match Status'] = "Not Matched"
-        df2['Match Status'] = "Not Matched"
-        
-        # Mark matched rows in both dataframes
-        for key in keys1_set:
-            if key in keys2_set:
-                # Mark all rows with this key in both files as matched
-                df1.loc[df1.index.isin([idx for idx, k in concat_keys1.items() if k == key]), 'Match Status'] = "Matched"
-                df2.loc[df2.index.isin([idx for idx, k in concat_keys2.items() if k == key]), 'Match Status'] = "Matched"
+        # Create concatenation keys using all string columns, column by column
+        concat_keys1 = build_concat_keys(df1, all_str_cols)
+        concat_keys2 = build_concat_keys(df2, all_str_cols)
+        
+        # Keep the first matched row pair of every key for the numeric comparison;
+        # without string columns or matched keys, rows are compared by position
+        pairs = pair_key_rows(build_key_index(concat_keys1), build_key_index(concat_keys2)) if all_str_cols else None
+        if pairs is not None and len(pairs[0]):
+            self.matched_pairs = pairs
+            
+            # Columns whose values differ between matched rows, compared by column fingerprints
+            self.changed_columns = changed_columns(df1, df2, [col for col in df1.columns if col in common_cols],
+                                                   *pairs)
+        else:
+            self.matched_pairs = None
+            self.changed_columns = None
+        
+        # Mark matched rows in both dataframes in one pass over the key arrays
+        status1, status2 = match_status(concat_keys1, concat_keys2)
+        df1['Match Status'] = status1
+        df2['Match Status'] = status2
         
         # Write headers
         header_row = list(df1.columns) + list(df2.columns)
@@ -147,6 +154,9 @@ class ExcelComparator:
             cell.font = Font(bold=True)
             cell.border = THIN_BORDER
         
+        # Find differing cells over the common columns in one pass
+        diff_values = diff_frames(df1, df2, common_cols)[0].to_numpy()
+        
         # Write data row by row
         max_rows = max(len(df1), len(df2))
         for i in range(max_rows):
@@ -194,40 +204,23 @@ class ExcelComparator:
                         ws.cell(row=i+2, column=col_idx).fill = ROW_MISSING_FILL
             
             # Apply cell difference highlighting
-            if self.highlight_cell_diffs:
-                if i < len(df1) and i < len(df2):
-                    for col in common_cols:
-                        val1 = df1.at[i, col]
-                        val2 = df2.at[i, col]
-                        
-                        if not self.are_equal(val1, val2):
-                            col_idx1 = list(df1.columns).index(col) + 1
-                            col_idx2 = list(df2.columns).index(col) + len(df1.columns) + 1
-                            
-                            ws.cell(row=i+2, column=col_idx1).fill = CELL_DIFF_FILL
-                            ws.cell(row=i+2, column=col_idx2).fill = CELL_DIFF_FILL
+            if self.highlight_cell_diffs and i < len(diff_values):
+                for c in np.flatnonzero(diff_values[i]):
+                    col = common_cols[c]
+                    col_idx1 = list(df1.columns).index(col) + 1
+                    col_idx2 = list(df2.columns).index(col) + len(df1.columns) + 1
+                    
+                    ws.cell(row=i+2, column=col_idx1).fill = CELL_DIFF_FILL
+                    ws.cell(row=i+2, column=col_idx2).fill = CELL_DIFF_FILL
             
             # Apply borders
             for col_idx in range(1, len(header_row) + 1):
                 ws.cell(row=i+2, column=col_idx).border = THIN_BORDER
         
-        # Auto-size columns
-        for col_idx in range(1, len(header_row) + 1):
-            max_length = 0
-            col_letter = get_column_letter(col_idx)
-            
-            for row in ws.iter_rows(min_row=1, max_row=ws.max_row, min_col=col_idx, max_col=col_idx):
-                for cell in row:
-                    try:
-                        if cell.value is not None:
-                            cell_length = len(str(cell.value))
-                            if cell_length > max_length:
-                                max_length = cell_length
-                    except:
-                        pass
-            
-            adjusted_width = (max_length + 2) * 1.2
-            ws.column_dimensions[col_letter].width = adjusted_width
+        # Auto-size columns from the data rather than the written cells
+        set_column_widths(ws, [[[col], df1[col]] for col in df1.columns] +
+                              [[[col], df2[col]] for col in df2.columns],
+                          sample_size=AUTO_WIDTH_SAMPLE)
         
         # Freeze panes
         ws.freeze_panes = "A2"
@@ -266,23 +259,14 @@ class ExcelComparator:
                 cell.font = Font(bold=(cell.row == 1))
                 cell.border = THIN_BORDER
         
-        # Auto-size columns
-        for col_idx in range(1, 5):  # We have 4 columns in this sheet
-            max_length = 0
-            col_letter = get_column_letter(col_idx)
-            
-            for row in ws.iter_rows(min_row=1, max_row=ws.max_row, min_col=col_idx, max_col=col_idx):
-                for cell in row:
-                    try:
-                        if cell.value is not None:
-                            cell_length = len(str(cell.value))
-                            if cell_length > max_length:
-                                max_length = cell_length
-                    except:
-                        pass
-            
-            adjusted_width = (max_length + 2) * 1.2
-            ws.column_dimensions[col_letter].width = adjusted_width
+        # Auto-size columns from the listed headers
+        listed = sorted(common) + (sorted(unique1) + sorted(unique2) if self.highlight_missing else [])
+        set_column_widths(ws, [
+            [["Header"], listed],
+            [["Status", "Common"] + (["Unique to File 1"] if self.highlight_missing and unique1 else [])],
+            [["File 1 Presence"]],
+            [["File 2 Presence"]],
+        ])
     
     def analyze_row_matches(self, df1, df2, output_wb, matched_count, unmatched1_count, unmatched2_count):
         """Analyze and highlight row matches between files"""
@@ -305,6 +289,15 @@ class ExcelComparator:
         ws.append([""])
         ws.append(["Note: Rows are considered matched if any row in File1 matches any row in File2"])
         
+        # Columns with at least one differing value between matched rows
+        changed = self.changed_columns or []
+        if self.changed_columns is not None:
+            ws.append([""])
+            ws.append(["Changed Columns", len(changed)])
+            for col in changed:
+                ws.append(["", col])
+            ws.cell(ws.max_row - len(changed), 1).font = Font(bold=True)
+        
         # Apply styling to summary
         for row in ws.iter_rows(min_row=1, max_row=1):
             for cell in row:
@@ -314,38 +307,30 @@ class ExcelComparator:
             for cell in row:
                 cell.font = Font(bold=(cell.column == 1))
         
-        # Auto-size columns
-        for col_idx in range(1, 3):  # We have 2 columns in this sheet
-            max_length = 0
-            col_letter = get_column_letter(col_idx)
-            
-            for row in ws.iter_rows(min_row=1, max_row=ws.max_row, min_col=col_idx, max_col=col_idx):
-                for cell in row:
-                    try:
-                        if cell.value is not None:
-                            cell_length = len(str(cell.value))
-                            if cell_length > max_length:
-                                max_length = cell_length
-                    except:
-                        pass
-            
-            adjusted_width = (max_length + 2) * 1.2
-            ws.column_dimensions[col_letter].width = adjusted_width
+        # Auto-size columns from the summary and notes
+        set_column_widths(ws, [
+            [["Row Matching Summary", "Total Rows in File1", "Total Rows in File2", "Matched Rows",
+              "Unmatched Rows in File1", "Unmatched Rows in File2", "Key Generation Method:",
+              "Automatically concatenated all non-date string columns",
+              "Note: Rows are considered matched if any row in File1 matches any row in File2", "Changed Columns"]],
+            [[len(df1), len(df2), matched_count, unmatched1_count, unmatched2_count, len(changed)], changed],
+        ])
     
     def compare_numeric_values(self, df1, df2, output_wb):
         """Create numerical comparison table for common numeric columns"""
-        # Identify common numeric columns
-        common_cols = list(set(df1.columns) & set(df2.columns))
-        num_cols = [col for col in common_cols 
-                    if pd.api.types.is_numeric_dtype(df1[col]) and 
-                    pd.api.types.is_numeric_dtype(df2[col])]
+        # Identify common numeric columns (also numbers stored as text on one side)
+        num_cols = numeric_columns(df1, df2)
         
         if not num_cols:
             return
         
+        # Columns without any changed value between matched rows have no differences to list
+        if self.changed_columns is not None:
+            num_cols = [col for col in num_cols if col in self.changed_columns]
+        
         # Create sheet
         ws = output_wb.create_sheet("Numeric Comparison")
-        headers = ["Column", "Row", "File1 Value", "File2 Value", "Absolute Diff", "Relative Diff"]
+        headers = ["Column", "File1 Row", "File2 Row", "File1 Value", "File2 Value", "Absolute Diff", "Relative Diff"]
         ws.append(headers)
         
         # Apply header formatting
@@ -354,48 +339,31 @@ class ExcelComparator:
             cell.fill = HEADER_FILL
             cell.border = THIN_BORDER
         
-        # Compare values
+        # Compare values of key-matched rows (by position if matching has not run)
+        rows1, rows2 = self.matched_pairs if self.matched_pairs is not None else (None, None)
+        differences = numeric_differences(df1, df2, num_cols, rows1, rows2, top_k=self.max_num_diffs)
+        
         for col in num_cols:
-            for i in range(min(len(df1), len(df2))):
-                val1 = df1[col].iloc[i]
-                val2 = df2[col].iloc[i]
-                
-                if pd.isna(val1) or pd.isna(val2) or val1 == val2:
-                    continue
-                    
-                abs_diff = abs(val1 - val2)
-                rel_diff = abs_diff / max(abs(val1), abs(val2)) if max(abs(val1), abs(val2)) != 0 else float('inf')
-                
-                ws.append([col, i+1, val1, val2, abs_diff, rel_diff])
+            for row in differences[col].itertuples(index=False):
+                ws.append([col] + list(row))
                 
                 # Highlight significant differences (>10%)
-                if rel_diff > 0.1:
-                    for col_idx in range(1, 7):
+                if row[-1] > 0.1:
+                    for col_idx in range(1, len(headers) + 1):
                         cell = ws.cell(ws.max_row, col_idx)
                         cell.fill = NUM_DIFF_FILL
                 
                 # Apply borders
-                for col_idx in range(1, 7):
+                for col_idx in range(1, len(headers) + 1):
                     cell = ws.cell(ws.max_row, col_idx)
                     cell.border = THIN_BORDER
         
-        # Auto-size columns
-        for col_idx in range(1, 7):  # We have 6 columns in this sheet
-            max_length = 0
-            col_letter = get_column_letter(col_idx)
-            
-            for row in ws.iter_rows(min_row=1, max_row=ws.max_row, min_col=col_idx, max_col=col_idx):
-                for cell in row:
-                    try:
-                        if cell.value is not None:
-                            cell_length = len(str(cell.value))
-                            if cell_length > max_length:
-                                max_length = cell_length
-                    except:
-                        pass
-            
-            adjusted_width = (max_length + 2) * 1.2
-            ws.column_dimensions[col_letter].width = adjusted_width
+        # Auto-size columns from the differences rather than the written cells
+        listed = [col for col in num_cols if len(differences[col])]
+        set_column_widths(ws, [[[headers[0]], listed]] + [
+            [[header]] + [differences[col][header] for col in listed]
+            for header in headers[1:]
+        ], sample_size=AUTO_WIDTH_SAMPLE)
     
     def compare(self, output_file=None):
         """
@@ -409,16 +377,41 @@ class ExcelComparator:
             str: If output_file is provided, returns the path to saved file
         """
         try:
+            # Unchanged inputs need no parsing: compare the file bytes, then the sheet XML
+            if self.short_circuit:
+                checked_by = self.identical_inputs()
+                if checked_by:
+                    self.identical = True
+                    return self.create_identical_report(output_file, checked_by)
+            
+            if self.header_only:
+                return self.compare_header_rows(output_file)
+            
+            # Probe the headers first so only the needed columns are parsed
+            usecols1 = usecols2 = None
+            if self.include_columns is not None or self.exclude_columns or self.common_columns_only:
+                headers1 = read_headers(self.file1_path, self.sheet1_name)
+                headers2 = read_headers(self.file2_path, self.sheet2_name)
+                usecols1 = project_columns(headers1.columns, self.include_columns, self.exclude_columns,
+                                           headers2.columns if self.common_columns_only else None)
+                usecols2 = project_columns(headers2.columns, self.include_columns, self.exclude_columns,
+                                           headers1.columns if self.common_columns_only else None)
+            
             # Read data
-            df1 = pd.read_excel(self.file1_path, sheet_name=self.sheet1_name)
-            df2 = pd.read_excel(self.file2_path, sheet_name=self.sheet2_name)
+            df1, df2 = read_sheets([(self.file1_path, self.sheet1_name, usecols1),
+                                    (self.file2_path, self.sheet2_name, usecols2)],
+                                   disk_cache=self.disk_cache, engine="xml" if self.xml_reader else None,
+                                   string_ids=self.string_ids, categorical=self.categorical_strings)
             
             # Create comparison workbook
             output_wb = Workbook()
             output_wb.remove(output_wb.active)
             
-            # 1. Compare headers
-            self.compare_headers(df1, df2, output_wb)
+            # 1. Compare headers (all of them, also the columns that were not read)
+            if usecols1 is not None or usecols2 is not None:
+                self.compare_headers(headers1, headers2, output_wb)
+            else:
+                self.compare_headers(df1, df2, output_wb)
             
             # 2. Create side-by-side comparison sheet
             matched_count, unmatched1_count, unmatched2_count = self.create_side_by_side_sheet(df1, df2, output_wb)
@@ -438,6 +431,220 @@ class ExcelComparator:
                 
         except Exception as e:
             raise Exception(f"An error occurred during comparison: {str(e)}")
+    
+    def check(self, max_differences=1, chunk_rows=CHUNK_ROWS):
+        """
+        Answer whether the compared sheets hold the same data, without building a report.
+        
+        Identical inputs are recognised from their hashes first. Otherwise both
+        sheets are streamed in chunks and checked cell by cell by row position;
+        reading stops as soon as max_differences differing cells are found.
+        Trailing rows without any value are ignored.
+        
+        Args:
+            max_differences (int, optional): Stop after this many differing cells. Default 1;
+                None checks the whole sheets and lists every difference.
+            chunk_rows (int): Rows per chunk. Default CHUNK_ROWS.
+        
+        Returns:
+            dict: Verdict with equal, reason, differences and exit_code (0 equal, 1 different),
+                see comparison_engine.make_verdict
+        """
+        if self.short_circuit:
+            checked_by = self.identical_inputs()
+            if checked_by:
+                self.identical = True
+                return make_verdict(True, f"identical inputs ({checked_by})")
+        
+        # Different headers settle it before any data row is read
+        headers1 = read_headers(self.file1_path, self.sheet1_name)
+        headers2 = read_headers(self.file2_path, self.sheet2_name)
+        if list(headers1.columns) != list(headers2.columns):
+            return make_verdict(False, "columns differ")
+        
+        def trim(chunk, other):
+            """Drop trailing rows holding no value; a finished stream counts as an empty chunk"""
+            if chunk is None:
+                return other.iloc[:0]
+            filled = np.flatnonzero(chunk.notna().any(axis=1).to_numpy())
+            return chunk.iloc[:filled[-1] + 1] if len(filled) else chunk.iloc[:0]
+        
+        stream1 = iter_sheet_chunks(self.file1_path, self.sheet1_name, chunk_rows)
+        stream2 = iter_sheet_chunks(self.file2_path, self.sheet2_name, chunk_rows)
+        differences = []
+        offset = 0
+        try:
+            for chunk1, chunk2 in zip_longest(stream1, stream2):
+                # Only the last chunks can differ in length
+                if chunk1 is None or chunk2 is None or len(chunk1) != len(chunk2):
+                    chunk1, chunk2 = trim(chunk1, chunk2), trim(chunk2, chunk1)
+                    if len(chunk1) != len(chunk2):
+                        return make_verdict(False, "row counts differ", differences)
+                
+                remaining = max_differences - len(differences) if max_differences is not None else None
+                verdict = check_frames(chunk1, chunk2, max_differences=remaining, first_row=offset + 1)
+                differences.extend(verdict["differences"])
+                if max_differences is not None and len(differences) >= max_differences:
+                    break
+                offset += len(chunk1)
+        finally:
+            stream1.close()
+            stream2.close()
+        
+        if differences:
+            return make_verdict(False, "cells differ", differences)
+        return make_verdict(True, "equal cells")
+    
+    def identical_inputs(self):
+        """
+        Check if the compared sheets are identical without reading their cells.
+        
+        Returns:
+            str: How identity was shown ("file hash" or "sheet hash"), or None
+        """
+        if self.sheet1_name == self.sheet2_name and same_file(self.file1_path, self.file2_path):
+            return "file hash"
+        if same_sheet(self.file1_path, self.sheet1_name, self.file2_path, self.sheet2_name):
+            return "sheet hash"
+        return None
+    
+    def create_identical_report(self, output_file, checked_by):
+        """Write the one-page summary of identical inputs instead of the full report"""
+        output_wb = Workbook()
+        ws = output_wb.active
+        ws.title = "Comparison Summary"
+        
+        summary = [
+            ("File 1", self.file1_path),
+            ("Sheet 1", self.sheet1_name),
+            ("File 2", self.file2_path),
+            ("Sheet 2", self.sheet2_name),
+            ("Result", "Identical"),
+            ("Checked by", checked_by),
+        ]
+        set_column_widths(ws, [
+            [["Comparison Summary"], [label for label, _ in summary]],
+            [[value for _, value in summary]],
+        ])
+        ws.append(["Comparison Summary"])
+        ws.append(["", ""])
+        for row in summary:
+            ws.append(list(row))
+        ws.cell(1, 1).font = Font(bold=True, size=14)
+        for row in ws.iter_rows(min_row=3, max_row=ws.max_row, max_col=1):
+            row[0].font = Font(bold=True)
+        
+        if output_file:
+            output_wb.save(output_file)
+            return output_file
+        return output_wb
+    
+    def compare_streamed(self, output_file, chunk_rows=CHUNK_ROWS):
+        """
+        Compare sheets too large to load, streaming them in chunks.
+        
+        Each sheet is read three times, one chunk at a time: once to fix the
+        column dtypes and classes of the whole sheet, once to hash the row keys
+        and once to diff the cells by row position. Peak memory therefore depends
+        on chunk_rows, not on the sheet size. The report is written while the
+        sheets are read and holds a Row Matching Analysis and a Cell Differences sheet.
+        
+        Args:
+            output_file (str): Path to save comparison results
+            chunk_rows (int): Rows per chunk. Default CHUNK_ROWS.
+        
+        Returns:
+            str: The path to the saved file
+        """
+        # Every chunk gets the dtypes of its whole sheet, so keys do not depend on chunk boundaries
+        schema1 = scan_sheet_columns(self.file1_path, self.sheet1_name, chunk_rows)
+        schema2 = scan_sheet_columns(self.file2_path, self.sheet2_name, chunk_rows)
+        
+        def chunks(path, sheet_name, schema):
+            return iter_sheet_chunks(path, sheet_name, chunk_rows, schema=schema)
+        
+        def first_chunk(path, sheet_name, schema):
+            stream = chunks(path, sheet_name, schema)
+            chunk = next(stream, pd.DataFrame())
+            stream.close()
+            return chunk
+        
+        # Key and common columns from the first chunk of each sheet, classified over the whole sheet
+        first1 = first_chunk(self.file1_path, self.sheet1_name, schema1)
+        first2 = first_chunk(self.file2_path, self.sheet2_name, schema2)
+        str_cols1 = self.get_string_columns(first1)
+        str_cols2 = self.get_string_columns(first2)
+        key_cols = str_cols1 + [col for col in str_cols2 if col not in str_cols1]
+        common_cols = [col for col in first1.columns if col in first2.columns]
+        
+        # Pass 1: row keys, kept as one 64-bit hash per row
+        hashes1, has_key1 = hash_chunk_keys(chunks(self.file1_path, self.sheet1_name, schema1), key_cols)
+        hashes2, has_key2 = hash_chunk_keys(chunks(self.file2_path, self.sheet2_name, schema2), key_cols)
+        
+        # Rows without key parts match each other, as in match_status
+        matched1 = np.where(has_key1, np.isin(hashes1, hashes2[has_key2]), (~has_key2).any())
+        matched2 = np.where(has_key2, np.isin(hashes2, hashes1[has_key1]), (~has_key1).any())
+        
+        output_wb = new_report_workbook(streaming=True)
+        summary_ws = output_wb.create_sheet("Row Matching Analysis")
+        ws = output_wb.create_sheet("Cell Differences")
+        headers = ["Row", "Column", "File1 Value", "File2 Value"]
+        set_column_widths(ws, [[[headers[0]], [len(hashes1)]], [[headers[1]], common_cols],
+                               [[headers[2]]], [[headers[3]]]])
+        ws.append(styled_row(ws, headers, fill=HEADER_FILL, font=Font(bold=True), border=THIN_BORDER))
+        
+        # Pass 2: cell differences by row position, written chunk by chunk
+        diff_count = 0
+        for chunk1, chunk2, rows, cols in diff_chunks(chunks(self.file1_path, self.sheet1_name, schema1),
+                                                      chunks(self.file2_path, self.sheet2_name, schema2), common_cols):
+            values1 = chunk1[common_cols].to_numpy(dtype=object)
+            values2 = chunk2[common_cols].to_numpy(dtype=object)
+            for r, c in zip(rows.tolist(), cols.tolist()):
+                value1 = None if pd.isna(values1[r, c]) else values1[r, c]
+                value2 = None if pd.isna(values2[r, c]) else values2[r, c]
+                cells = styled_row(ws, [int(chunk1.index[r]) + 1, common_cols[c], value1, value2], border=THIN_BORDER)
+                cells[2].fill = CELL_DIFF_FILL
+                cells[3].fill = CELL_DIFF_FILL
+                ws.append(cells)
+            diff_count += len(rows)
+        
+        summary = [
+            ("Total Rows in File1", len(hashes1)),
+            ("Total Rows in File2", len(hashes2)),
+            ("Matched Rows", int(matched1.sum())),
+            ("Unmatched Rows in File1", int((~matched1).sum())),
+            ("Unmatched Rows in File2", int((~matched2).sum())),
+            ("Differing Cells", diff_count),
+        ]
+        note = "Note: Cells are compared by row position over the common columns"
+        set_column_widths(summary_ws, [[["Row Matching Summary", note], [label for label, _ in summary]],
+                                       [[value for _, value in summary]]])
+        summary_ws.append(styled_row(summary_ws, ["Row Matching Summary"], font=Font(bold=True, size=14)))
+        summary_ws.append(["", ""])
+        for label, value in summary:
+            cells = styled_row(summary_ws, [label, value])
+            cells[0].font = Font(bold=True)
+            summary_ws.append(cells)
+        summary_ws.append([""])
+        summary_ws.append([note])
+        
+        output_wb.save(output_file)
+        return output_file
+    
+    def compare_header_rows(self, output_file=None):
+        """Create only the Header Comparison sheet, reading just the header row of each sheet"""
+        df1 = read_headers(self.file1_path, self.sheet1_name)
+        df2 = read_headers(self.file2_path, self.sheet2_name)
+        
+        output_wb = Workbook()
+        output_wb.remove(output_wb.active)
+        self.compare_headers(df1, df2, output_wb)
+        
+        if output_file:
+            output_wb.save(output_file)
+            return output_file
+        else:
+            return output_wb
 
 # Example usage:
 if __name__ == "__main__":
@@ -450,7 +657,8 @@ if __name__ == "__main__":
         highlight_missing=True,
         highlight_cell_diffs=True,
         highlight_row_matches=True,
-        create_num_table=True
+        create_num_table=True,
+        max_num_diffs=None  # optional
     )
     
     # Run comparison and save results
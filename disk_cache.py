@@ -0,0 +1,364 @@
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from itertools import repeat
+import numpy as np
+import pandas as pd
+
+# Bumped whenever the on-disk layout changes; older entries are ignored
+CACHE_FORMAT = 2
+
+# Default size budget of the cache directory
+DISK_CACHE_BYTES = 2 << 30
+
+# Cell types of object columns and column labels, which are saved without pickle:
+# every cell is tagged with the position of its type here, and the cells of one
+# type are saved together as one plain array
+CELL_TYPES = (type(None), float, str, bool, int, datetime.datetime, pd.Timestamp, datetime.date,
+              datetime.time, datetime.timedelta, pd.Timedelta, type(pd.NaT), type(pd.NA))
+CELL_TAGS = {cell_type: tag for tag, cell_type in enumerate(CELL_TYPES)}
+UNKNOWN_TAG = 255
+
+# NumPy scalars found in object columns, stored as the Python type they stand for
+SCALAR_TYPES = ((np.bool_, bool), (np.integer, int), (np.floating, float), (np.str_, str))
+
+# Cell types that are one and the same value
+CONSTANT_CELLS = {type(None): None, type(pd.NaT): pd.NaT, type(pd.NA): pd.NA}
+
+
+def default_cache_dir():
+    """Cache location: $FILECOMPARISON_CACHE_DIR, else ~/.cache/filecomparison"""
+    return os.environ.get("FILECOMPARISON_CACHE_DIR") or \
+        os.path.join(os.path.expanduser("~"), ".cache", "filecomparison")
+
+
+def encode_texts(texts):
+    """
+    Strings as one UTF-8 buffer, separated by NULs. If a string holds a NUL
+    itself, they are not separated and the end offset (in characters) of
+    every string is added instead.
+    """
+    text = "\0".join(texts)
+    if text.count("\0") == max(len(texts) - 1, 0):
+        return {"data": np.frombuffer(text.encode("utf-8", "surrogatepass"), dtype=np.uint8)}
+    ends = np.cumsum([len(string) for string in texts], dtype=np.int64)
+    data = "".join(texts).encode("utf-8", "surrogatepass")
+    return {"data": np.frombuffer(data, dtype=np.uint8), "ends": ends}
+
+
+def decode_texts(arrays, count):
+    """Inverse of encode_texts"""
+    text = arrays["data"].tobytes().decode("utf-8", "surrogatepass")
+    if "ends" not in arrays:
+        return text.split("\0") if count else []
+    ends = arrays["ends"].tolist()
+    return [text[start:end] for start, end in zip([0] + ends[:-1], ends)]
+
+
+def encode_cells(cell_type, cells):
+    """
+    Plain NumPy arrays holding cells of one type.
+
+    Raises:
+        TypeError: for timezone-aware values, which have no plain array form
+    """
+    if cell_type is str:
+        return encode_texts(cells)
+    if cell_type is int:
+        try:
+            return {"data": np.array(cells, dtype=np.int64)}
+        except OverflowError:
+            # Integers past the int64 range are kept as their digits
+            return {**encode_texts([str(cell) for cell in cells]), "digits": np.array(True)}
+    if cell_type in (float, bool):
+        return {"data": np.array(cells, dtype=cell_type)}
+    if cell_type in (datetime.datetime, pd.Timestamp, datetime.time) \
+            and any(cell.tzinfo is not None for cell in cells):
+        raise TypeError(f"timezone-aware {cell_type.__name__} values are not cached")
+    if cell_type is datetime.datetime:
+        return {"data": np.array(cells, dtype="datetime64[us]")}
+    if cell_type is pd.Timestamp:
+        return {"data": np.array([cell.to_datetime64() for cell in cells], dtype="datetime64[ns]")}
+    if cell_type is datetime.date:
+        return {"data": np.array(cells, dtype="datetime64[D]")}
+    if cell_type is datetime.time:
+        micros = [((cell.hour * 60 + cell.minute) * 60 + cell.second) * 1_000_000 + cell.microsecond
+                  for cell in cells]
+        return {"data": np.array(micros, dtype=np.int64)}
+    if cell_type is datetime.timedelta:
+        return {"data": np.array(cells, dtype="timedelta64[us]")}
+    if cell_type is pd.Timedelta:
+        return {"data": np.array([cell.to_timedelta64() for cell in cells], dtype="timedelta64[ns]")}
+    return {}
+
+
+def decode_cells(cell_type, arrays, count):
+    """Inverse of encode_cells; returns a list of count cells"""
+    if cell_type in CONSTANT_CELLS:
+        return [CONSTANT_CELLS[cell_type]] * count
+    if "digits" in arrays:
+        return [int(digits) for digits in decode_texts(arrays, count)]
+    if cell_type is str:
+        return decode_texts(arrays, count)
+    data = arrays["data"]
+    if cell_type is pd.Timestamp:
+        return list(pd.DatetimeIndex(data))
+    if cell_type is pd.Timedelta:
+        return list(pd.TimedeltaIndex(data))
+    if cell_type is datetime.time:
+        return [(datetime.datetime.min + datetime.timedelta(microseconds=micros)).time() for micros in data.tolist()]
+    return data.tolist()
+
+
+def encode_objects(values):
+    """
+    Encode an object array as plain NumPy arrays, so it can be saved without pickle.
+
+    Returns:
+        dict: Array name -> array; "tags" holds the CELL_TYPES position of every
+            cell, "<tag>_data" (and "<tag>_ends" for strings) the cells of each type
+
+    Raises:
+        TypeError: for a cell type outside CELL_TYPES
+    """
+    tags = np.fromiter(map(CELL_TAGS.get, map(type, values), repeat(UNKNOWN_TAG)), dtype=np.uint8,
+                       count=len(values))
+    unknown = np.flatnonzero(tags == UNKNOWN_TAG)
+    if len(unknown):
+        values = values.copy()
+        for i in unknown.tolist():
+            value = values[i]
+            cell_type = next((python_type for scalar_type, python_type in SCALAR_TYPES
+                              if isinstance(value, scalar_type)), None)
+            if cell_type is None:
+                raise TypeError(f"{type(value).__name__} values are not cached")
+            values[i] = cell_type(value)
+            tags[i] = CELL_TAGS[cell_type]
+
+    arrays = {"tags": tags}
+    for tag in np.unique(tags).tolist():
+        for name, array in encode_cells(CELL_TYPES[tag], values[tags == tag].tolist()).items():
+            arrays[f"{tag}_{name}"] = array
+    return arrays
+
+
+def decode_objects(arrays):
+    """Inverse of encode_objects; returns an object array"""
+    tags = arrays["tags"]
+    values = np.empty(len(tags), dtype=object)
+    for tag in np.unique(tags).tolist():
+        rows = np.flatnonzero(tags == tag)
+        prefix = f"{tag}_"
+        cell_arrays = {name[len(prefix):]: arrays[name] for name in arrays if name.startswith(prefix)}
+        values[rows] = decode_cells(CELL_TYPES[tag], cell_arrays, len(rows))
+    return values
+
+
+def file_digest(path):
+    """Hash of the file content, the part of the key that survives copies and renames"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DiskSheetCache:
+    """
+    Persistent cache of parsed worksheets, stored column by column.
+
+    Every sheet becomes a directory holding one .npy file per column plus a
+    meta.json with the dtypes, keyed by the content hash of the workbook and
+    the sheet name. Object, string and categorical columns and the column
+    labels are saved as .npz files of plain arrays (see encode_objects), so
+    nothing is pickled and loading never runs code from the cache directory.
+    Loading a sheet back is a handful of array reads instead of parsing the
+    sheet XML again. Least recently used entries are removed once the
+    directory outgrows its size budget.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DISK_CACHE_BYTES):
+        """
+        Args:
+            cache_dir (str, optional): Cache directory. Defaults to default_cache_dir().
+            max_bytes (int): Size budget of the cache directory. Default 2 GiB.
+        """
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+
+    def entry_dir(self, digest, sheet_name):
+        """Directory of one sheet; sheet names are hashed as they may not be valid file names"""
+        name = hashlib.blake2b(f"{CACHE_FORMAT}:{digest}:{sheet_name!r}".encode("utf-8"),
+                               digest_size=16).hexdigest()
+        return os.path.join(self.cache_dir, name)
+
+    def load(self, digest, sheet_name):
+        """Return the cached frame of a sheet, or None"""
+        entry = self.entry_dir(digest, sheet_name)
+        meta_path = os.path.join(entry, "meta.json")
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            with np.load(os.path.join(entry, "columns.npz"), allow_pickle=False) as arrays:
+                labels = decode_objects(arrays).tolist()
+            data = {}
+            for i, (dtype, storage) in enumerate(zip(meta["dtypes"], meta["storage"])):
+                if storage == "array":
+                    values = np.load(os.path.join(entry, f"col{i}.npy"), allow_pickle=False)
+                    data[i] = pd.Series(values, dtype=dtype, copy=False)
+                    continue
+                with np.load(os.path.join(entry, f"col{i}.npz"), allow_pickle=False) as arrays:
+                    arrays = dict(arrays)
+                if storage == "categorical":
+                    categories = pd.Index(decode_objects({name[4:]: array for name, array in arrays.items()
+                                                          if name.startswith("cat_")}),
+                                          dtype=str(arrays["categories_dtype"]))
+                    data[i] = pd.Series(pd.Categorical.from_codes(arrays["codes"], categories,
+                                                                  ordered=bool(arrays["ordered"])))
+                else:
+                    data[i] = pd.Series(decode_objects(arrays), dtype=dtype, copy=False)
+        except (OSError, ValueError, KeyError):
+            return None
+
+        # Mark the entry as recently used for eviction
+        os.utime(meta_path)
+        df = pd.DataFrame(data, index=pd.RangeIndex(meta["rows"]))
+        df.columns = labels
+        return df
+
+    def save(self, digest, sheet_name, df, source=None):
+        """
+        Store a parsed sheet, then evict old entries over the size budget.
+
+        Args:
+            digest (str): Content hash of the workbook (see file_digest)
+            sheet_name (str or int): Sheet the frame was parsed from
+            df (DataFrame): Frame as returned by pd.read_excel
+            source (str, optional): Workbook path, only shown by the list command
+
+        Frames holding cells without a plain array form (e.g. timezone-aware
+        timestamps) are not cached.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry = self.entry_dir(digest, sheet_name)
+
+        # Write into a scratch directory first so readers never see half an entry
+        tmp = tempfile.mkdtemp(dir=self.cache_dir, prefix=".tmp-")
+        try:
+            np.savez(os.path.join(tmp, "columns.npz"), **encode_objects(df.columns.to_numpy(dtype=object)))
+            dtypes = []
+            storage = []
+            for i in range(df.shape[1]):
+                values = df.iloc[:, i]
+                dtypes.append(str(values.dtype))
+                if isinstance(values.dtype, pd.CategoricalDtype):
+                    # Codes plus the full category set, which may be shared with other sheets
+                    storage.append("categorical")
+                    categories = encode_objects(values.cat.categories.to_numpy(dtype=object))
+                    np.savez(os.path.join(tmp, f"col{i}.npz"), codes=values.cat.codes.to_numpy(),
+                             ordered=np.array(values.cat.ordered),
+                             categories_dtype=np.array(str(values.cat.categories.dtype)),
+                             **{f"cat_{name}": array for name, array in categories.items()})
+                elif isinstance(values.dtype, np.dtype) and values.dtype != object:
+                    storage.append("array")
+                    np.save(os.path.join(tmp, f"col{i}.npy"), values.to_numpy(), allow_pickle=False)
+                else:
+                    # Object columns and extension dtypes (e.g. pandas strings) are encoded
+                    # cell by cell and restored by dtype name
+                    storage.append("objects")
+                    np.savez(os.path.join(tmp, f"col{i}.npz"), **encode_objects(values.to_numpy(dtype=object)))
+
+            meta = {
+                "format": CACHE_FORMAT,
+                "digest": digest,
+                "sheet": sheet_name,
+                "source": source,
+                "rows": len(df),
+                "dtypes": dtypes,
+                "storage": storage,
+                "created": time.time(),
+            }
+            with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+
+            shutil.rmtree(entry, ignore_errors=True)
+            os.replace(tmp, entry)
+        except TypeError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+        self.evict()
+
+    def entries(self):
+        """
+        Describe the cached sheets, most recently used first.
+
+        Returns:
+            list: Dicts with path, source, sheet, rows, bytes and last_used
+        """
+        if not os.path.isdir(self.cache_dir):
+            return []
+
+        found = []
+        for name in os.listdir(self.cache_dir):
+            entry = os.path.join(self.cache_dir, name)
+            meta_path = os.path.join(entry, "meta.json")
+            if name.startswith(".") or not os.path.isfile(meta_path):
+                continue
+            try:
+                with open(meta_path, encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            size = sum(entry_file.stat().st_size for entry_file in os.scandir(entry))
+            found.append({
+                "path": entry,
+                "source": meta.get("source"),
+                "sheet": meta.get("sheet"),
+                "rows": meta.get("rows"),
+                "bytes": size,
+                "last_used": os.path.getmtime(meta_path),
+            })
+        found.sort(key=lambda e: e["last_used"], reverse=True)
+        return found
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits its budget"""
+        entries = self.entries()
+        total = sum(e["bytes"] for e in entries)
+        while entries and total > self.max_bytes:
+            oldest = entries.pop()
+            shutil.rmtree(oldest["path"], ignore_errors=True)
+            total -= oldest["bytes"]
+
+    def clear(self):
+        """Remove every cached sheet; returns the number of entries removed"""
+        entries = self.entries()
+        for e in entries:
+            shutil.rmtree(e["path"], ignore_errors=True)
+        return len(entries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect the persistent parsed-sheet cache")
+    parser.add_argument("command", choices=["list", "clear"])
+    parser.add_argument("--dir", help="Cache directory (default: %(default)s)", default=default_cache_dir())
+    args = parser.parse_args()
+
+    cache = DiskSheetCache(args.dir)
+    if args.command == "list":
+        entries = cache.entries()
+        for e in entries:
+            last_used = time.strftime("%Y-%m-%d %H:%M", time.localtime(e["last_used"]))
+            print(f"{e['bytes'] / 1e6:>9.1f} MB  {e['rows']:>9} rows  {last_used}  {e['source']} [{e['sheet']}]")
+        print(f"{len(entries)} sheets, {sum(e['bytes'] for e in entries) / 1e6:.1f} MB in {cache.cache_dir}")
+    else:
+        print(f"Removed {cache.clear()} sheets from {cache.cache_dir}")
@@ -1,3 +1,7 @@
+import numpy as np
+from comparison_engine import diff_frames
+
+
 def create_side_by_side_sheet(self, df1, df2, output_wb):
     """Optimized side-by-side comparison with total row."""
     ws = output_wb.create_sheet("Side by Side Comparison")
@@ -42,17 +46,17 @@ def create_side_by_side_sheet(self, df1, df2, output_wb):
     match_status_col = len(header_row)
     file2_start_col = len(df1.columns) + 2
     
+    diff_values = diff_frames(df1, df2, common_cols)[0].to_numpy()
+    
     match_status, diff_positions, is_missing_list = [], [], []
     for i in range(max(len(df1), len(df2))):
         row_match, diffs_in_row = True, []
-        if i < len(df1) and i < len(df2):
-            for col in common_cols:
-                val1, val2 = df1.at[i, col], df2.at[i, col]
-                if not self.are_equal(val1, val2):
-                    row_match = False
-                    col_idx1 = df1.columns.get_loc(col) + 1
-                    col_idx2 = df2.columns.get_loc(col) + file2_start_col
-                    diffs_in_row.append((col_idx1, col_idx2))
+        if i < len(diff_values):
+            for c in np.flatnonzero(diff_values[i]):
+                row_match = False
+                col_idx1 = df1.columns.get_loc(common_cols[c]) + 1
+                col_idx2 = df2.columns.get_loc(common_cols[c]) + file2_start_col
+                diffs_in_row.append((col_idx1, col_idx2))
             is_missing = False
         else:
             row_match = False
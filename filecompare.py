@@ -7,6 +7,8 @@ from openpyxl.styles import PatternFill, Font, Border, Side, Alignment
 from openpyxl.utils import get_column_letter
 import os
 from datetime import datetime
+from comparison_engine import build_concat_keys, string_columns, numeric_columns, diff_frames
+from sheet_loader import read_sheets, sheet_names
 
 # Define highlighting styles
 HEADER_DIFF_FILL = PatternFill(start_color="FFD700", end_color="FFD700", fill_type="solid")  # Gold
@@ -366,17 +368,13 @@ class ExcelComparator:
             if file_num == 1:
                 self.file1_path.set(file_path)
                 try:
-                    wb = load_workbook(file_path, read_only=True)
-                    self.sheet1_name.set(wb.sheetnames[0])
-                    wb.close()
+                    self.sheet1_name.set(sheet_names(file_path)[0])
                 except:
                     self.sheet1_name.set("Sheet1")
             else:
                 self.file2_path.set(file_path)
                 try:
-                    wb = load_workbook(file_path, read_only=True)
-                    self.sheet2_name.set(wb.sheetnames[0])
-                    wb.close()
+                    self.sheet2_name.set(sheet_names(file_path)[0])
                 except:
                     self.sheet2_name.set("Sheet1")
     
@@ -393,19 +391,8 @@ class ExcelComparator:
         return isinstance(value, (datetime, pd.Timestamp))
     
     def get_string_columns(self, df):
-        """Get all string columns that are not dates"""
-        string_cols = []
-        for col in df.columns:
-            # Skip date columns
-            if pd.api.types.is_datetime64_any_dtype(df[col]):
-                continue
-            
-            # Include string columns and object columns that are likely strings
-            if pd.api.types.is_string_dtype(df[col]) or \
-               (pd.api.types.is_object_dtype(df[col]) and 
-                all((isinstance(x, str) or pd.isna(x)) for x in df[col].head(100))):
-                string_cols.append(col)
-        return string_cols
+        """Get all string columns that are not dates, classified over the full columns"""
+        return string_columns(df)
     
     def create_side_by_side_sheet(self, df1, df2, output_wb):
         """Create side-by-side comparison sheet with row matching column and totals"""
@@ -425,33 +412,13 @@ class ExcelComparator:
         num_cols2 = [col for col in df2.columns if pd.api.types.is_numeric_dtype(df2[col])]
         common_num_cols = list(set(num_cols1) & set(num_cols2))
         
-        # Create concatenation keys using all string columns
-        concat_keys1 = {}
-        concat_keys2 = {}
-        
-        # Create keys for df1
-        for idx, row in df1.iterrows():
-            key_parts = []
-            for col in all_str_cols:
-                if col in df1.columns:
-                    val = row[col]
-                    if pd.notna(val) and not self.is_date(val):
-                        key_parts.append(str(val))
-            concat_keys1[idx] = "_".join(key_parts) if key_parts else None
-        
-        # Create keys for df2
-        for idx, row in df2.iterrows():
-            key_parts = []
-            for col in all_str_cols:
-                if col in df2.columns:
-                    val = row[col]
-                    if pd.notna(val) and not self.is_date(val):
-                        key_parts.append(str(val))
-            concat_keys2[idx] = "_".join(key_parts) if key_parts else None
+        # Create concatenation keys using all string columns, column by column
+        concat_keys1 = build_concat_keys(df1, all_str_cols)
+        concat_keys2 = build_concat_keys(df2, all_str_cols)
         
         # Create sets of keys for matching
-        keys1_set = set(concat_keys1.values())
-        keys2_set = set(concat_keys2.values())
+        keys1_set = set(concat_keys1)
+        keys2_set = set(concat_keys2)
         
         # Create match status for each row in File1
         df1_match_status = []
@@ -515,6 +482,9 @@ class ExcelComparator:
             cell.font = Font(bold=True)
             cell.border = THIN_BORDER
         
+        # Find differing cells over the common columns in one pass
+        diff_values = diff_frames(df1, df2, common_cols)[0].to_numpy()
+        
         # Write data row by row
         max_rows = max(len(df1), len(df2))
         for i in range(max_rows):
@@ -552,17 +522,14 @@ class ExcelComparator:
                             ws.cell(row=i+3, column=col_idx).fill = ROW_MISSING_FILL
             
             # Apply cell difference highlighting
-            if self.highlight_cell_diffs.get() and i < len(df1) and i < len(df2):
-                for col in common_cols:
-                    val1 = df1.at[i, col]
-                    val2 = df2.at[i, col]
+            if self.highlight_cell_diffs.get() and i < len(diff_values):
+                for c in np.flatnonzero(diff_values[i]):
+                    col = common_cols[c]
+                    col_idx1 = list(df1.columns).index(col) + 1
+                    col_idx2 = list(df2.columns).index(col) + len(df1.columns) + 1
                     
-                    if not self.are_equal(val1, val2):
-                        col_idx1 = list(df1.columns).index(col) + 1
-                        col_idx2 = list(df2.columns).index(col) + len(df1.columns) + 1
-                        
-                        ws.cell(row=i+3, column=col_idx1).fill = CELL_DIFF_FILL
-                        ws.cell(row=i+3, column=col_idx2).fill = CELL_DIFF_FILL
+                    ws.cell(row=i+3, column=col_idx1).fill = CELL_DIFF_FILL
+                    ws.cell(row=i+3, column=col_idx2).fill = CELL_DIFF_FILL
             
             # Apply borders
             for col_idx in range(1, len(header_row) + 1):
@@ -608,8 +575,7 @@ class ExcelComparator:
         
         try:
             # Read data
-            df1 = pd.read_excel(file1, sheet_name=sheet1)
-            df2 = pd.read_excel(file2, sheet_name=sheet2)
+            df1, df2 = read_sheets([(file1, sheet1), (file2, sheet2)])
             
             # Create comparison workbook
             output_wb = Workbook()
@@ -745,11 +711,8 @@ class ExcelComparator:
     
     def compare_numeric_values(self, df1, df2, output_wb):
         """Create numerical comparison table for common numeric columns"""
-        # Identify common numeric columns
-        common_cols = list(set(df1.columns) & set(df2.columns))
-        num_cols = [col for col in common_cols 
-                    if pd.api.types.is_numeric_dtype(df1[col]) and 
-                    pd.api.types.is_numeric_dtype(df2[col])]
+        # Identify common numeric columns (also numbers stored as text on one side)
+        num_cols = numeric_columns(df1, df2)
         
         if not num_cols:
             return
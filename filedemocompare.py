@@ -2,11 +2,13 @@ import pandas as pd
 import numpy as np
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from openpyxl import Workbook, load_workbook
 from openpyxl.styles import PatternFill, Font, Border, Side, Alignment
 from openpyxl.utils import get_column_letter
 import os
 from datetime import datetime
+from comparison_engine import build_concat_keys, string_columns, numeric_columns, build_key_index, hash_row_keys, match_row_hashes, verify_hash_matches, diff_frames, changed_columns, numeric_differences
+from sheet_loader import read_sheets, read_headers, project_columns, sheet_names
+from report_writer import new_report_workbook, is_streaming, styled_row, merge_cells, set_column_widths, add_highlight_rule
 import re
 
 # Define highlighting styles
@@ -24,6 +26,12 @@ THIN_BORDER = Border(left=Side(style='thin'),
                      top=Side(style='thin'), 
                      bottom=Side(style='thin'))
 
+# Rows converted to Python values at a time when writing the side-by-side sheet
+SIDE_BY_SIDE_CHUNK = 10000
+
+# Column widths of large sheets are measured on a sample of this many rows
+AUTO_WIDTH_SAMPLE = 10000
+
 class ExcelComparator:
     def __init__(self, root):
         self.root = root
@@ -38,6 +46,8 @@ class ExcelComparator:
         self.sheet2_name = tk.StringVar()
         self.status = tk.StringVar(value="Ready to compare files")
         self.df1 = None
+        self.matched_pairs = None
+        self.changed_columns = None
         self.df2 = None
         self.side_by_side_df = None
         
@@ -231,6 +241,27 @@ class ExcelComparator:
             font=("Arial", 10)
         ).pack(anchor="w", pady=3)
         
+        num_limit_frame = tk.Frame(options_frame, bg="#f0f2f5")
+        num_limit_frame.pack(anchor="w", pady=3)
+        
+        tk.Label(
+            num_limit_frame, 
+            text="Largest numerical differences per column (0 = all):", 
+            font=("Arial", 10), 
+            bg="#f0f2f5"
+        ).pack(side="left")
+        
+        self.num_diff_limit = tk.IntVar(value=0)
+        tk.Spinbox(
+            num_limit_frame, 
+            from_=0, 
+            to=1000000, 
+            increment=100, 
+            textvariable=self.num_diff_limit, 
+            width=10, 
+            font=("Arial", 10)
+        ).pack(side="left", padx=5)
+        
         self.create_totals = tk.BooleanVar(value=True)
         tk.Checkbutton(
             options_frame, 
@@ -240,6 +271,69 @@ class ExcelComparator:
             font=("Arial", 10)
         ).pack(anchor="w", pady=3)
         
+        self.use_hash_keys = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            options_frame, 
+            text="Use hashed row keys (lower memory on large files)", 
+            variable=self.use_hash_keys, 
+            bg="#f0f2f5", 
+            font=("Arial", 10)
+        ).pack(anchor="w", pady=3)
+        
+        self.streaming_report = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            options_frame, 
+            text="Stream report to disk (write-only, flat memory)", 
+            variable=self.streaming_report, 
+            bg="#f0f2f5", 
+            font=("Arial", 10)
+        ).pack(anchor="w", pady=3)
+        
+        self.common_columns_only = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            options_frame, 
+            text="Only read columns present in both files", 
+            variable=self.common_columns_only, 
+            bg="#f0f2f5", 
+            font=("Arial", 10)
+        ).pack(anchor="w", pady=3)
+        
+        self.conditional_highlights = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            options_frame, 
+            text="Highlight with conditional formatting (faster on large reports)", 
+            variable=self.conditional_highlights, 
+            bg="#f0f2f5", 
+            font=("Arial", 10)
+        ).pack(anchor="w", pady=3)
+        
+        self.xml_reader = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            options_frame, 
+            text="Fast XML reader (.xlsx only)", 
+            variable=self.xml_reader, 
+            bg="#f0f2f5", 
+            font=("Arial", 10)
+        ).pack(anchor="w", pady=3)
+        
+        self.string_ids = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            options_frame, 
+            text="Compare text as shared integer IDs", 
+            variable=self.string_ids, 
+            bg="#f0f2f5", 
+            font=("Arial", 10)
+        ).pack(anchor="w", pady=3)
+        
+        self.categorical_strings = tk.BooleanVar(value=True)
+        tk.Checkbutton(
+            options_frame, 
+            text="Load repeated codes as categories (less memory)", 
+            variable=self.categorical_strings, 
+            bg="#f0f2f5", 
+            font=("Arial", 10)
+        ).pack(anchor="w", pady=3)
+        
         # Action buttons
         button_frame = tk.Frame(main_frame, bg="#f0f2f5")
         button_frame.pack(fill="x", pady=20)
@@ -256,6 +350,17 @@ class ExcelComparator:
         )
         compare_btn.pack(pady=10)
         
+        headers_btn = tk.Button(
+            button_frame, 
+            text="Compare Headers Only", 
+            command=self.compare_headers_only, 
+            bg="#3498db", 
+            fg="white",
+            font=("Arial", 10, "bold"),
+            width=20
+        )
+        headers_btn.pack()
+        
         # Status bar
         status_frame = tk.Frame(self.root, bg="#e0e0e0", height=30)
         status_frame.pack(fill="x", side="bottom")
@@ -377,17 +482,13 @@ class ExcelComparator:
             if file_num == 1:
                 self.file1_path.set(file_path)
                 try:
-                    wb = load_workbook(file_path, read_only=True)
-                    self.sheet1_name.set(wb.sheetnames[0])
-                    wb.close()
+                    self.sheet1_name.set(sheet_names(file_path)[0])
                 except:
                     self.sheet1_name.set("Sheet1")
             else:
                 self.file2_path.set(file_path)
                 try:
-                    wb = load_workbook(file_path, read_only=True)
-                    self.sheet2_name.set(wb.sheetnames[0])
-                    wb.close()
+                    self.sheet2_name.set(sheet_names(file_path)[0])
                 except:
                     self.sheet2_name.set("Sheet1")
     
@@ -404,19 +505,23 @@ class ExcelComparator:
         return isinstance(value, (datetime, pd.Timestamp))
     
     def get_string_columns(self, df):
-        """Get all string columns that are not dates"""
-        string_cols = []
-        for col in df.columns:
-            # Skip date columns
-            if pd.api.types.is_datetime64_any_dtype(df[col]):
-                continue
-            
-            # Include string columns and object columns that are likely strings
-            if pd.api.types.is_string_dtype(df[col]) or \
-               (pd.api.types.is_object_dtype(df[col]) and 
-                all(isinstance(x, str) or pd.isna(x) for x in df[col].head(100))):
-                string_cols.append(col)
-        return string_cols
+        """Get all string columns that are not dates, classified over the full columns"""
+        return string_columns(df)
+    
+    def match_concat_keys(self, df1, df2, key_cols):
+        """Pair the first File1 and File2 row of every concatenation key found in both files"""
+        # Index both files by concatenation key once
+        key_index1 = build_key_index(build_concat_keys(df1, key_cols))
+        key_index2 = build_key_index(build_concat_keys(df2, key_cols))
+        
+        # If we have at least one row in both files, take the first of each
+        matched_rows = []
+        for key, df1_rows in key_index1.items():
+            df2_rows = key_index2.get(key)
+            if df2_rows:
+                matched_rows.append((df1.index[df1_rows[0]], df2.index[df2_rows[0]]))
+        
+        return matched_rows
     
     def create_side_by_side_sheet(self, df1, df2, output_wb):
         """Create side-by-side comparison sheet with totals and row matching"""
@@ -431,144 +536,45 @@ class ExcelComparator:
         str_cols2 = self.get_string_columns(df2)
         all_str_cols = list(set(str_cols1) | set(str_cols2))
         
-        # Create concatenation keys using all string columns
-        concat_keys1 = {}
-        concat_keys2 = {}
-        
-        # Create keys for df1
-        for idx, row in df1.iterrows():
-            key_parts = []
-            for col in all_str_cols:
-                if col in df1.columns:
-                    val = row[col]
-                    if pd.notna(val) and not self.is_date(val):
-                        key_parts.append(str(val))
-            concat_keys1[idx] = "_".join(key_parts) if key_parts else None
-        
-        # Create keys for df2
-        for idx, row in df2.iterrows():
-            key_parts = []
-            for col in all_str_cols:
-                if col in df2.columns:
-                    val = row[col]
-                    if pd.notna(val) and not self.is_date(val):
-                        key_parts.append(str(val))
-            concat_keys2[idx] = "_".join(key_parts) if key_parts else None
-        
-        # Create sets of keys for matching
-        keys1_set = set(concat_keys1.values())
-        keys2_set = set(concat_keys2.values())
-        
-        # Prepare data for side-by-side comparison
-        side_by_side_data = []
-        
-        # Create a mapping of keys to row indices
-        key_to_df1 = {}
-        for idx, key in concat_keys1.items():
-            if key is not None and key != "":
-                key_to_df1.setdefault(key, []).append(idx)
-        
-        key_to_df2 = {}
-        for idx, key in concat_keys2.items():
-            if key is not None and key != "":
-                key_to_df2.setdefault(key, []).append(idx)
-        
-        # Find all unique keys
-        all_keys = set(list(concat_keys1.values()) + list(concat_keys2.values()))
-        all_keys.discard(None)
-        all_keys.discard("")
-        
-        # Process each key to find matches
-        matched_rows = []
-        for key in all_keys:
-            df1_rows = key_to_df1.get(key, [])
-            df2_rows = key_to_df2.get(key, [])
+        if self.use_hash_keys.get():
+            # Match on 64-bit row hashes, checking matched pairs against the real values
+            hashes1, has_key1 = hash_row_keys(df1, all_str_cols)
+            hashes2, has_key2 = hash_row_keys(df2, all_str_cols)
+            rows1, rows2 = match_row_hashes(hashes1, has_key1, hashes2, has_key2)
+            verify_hash_matches(df1, rows1, df2, rows2, all_str_cols)
+            matched_rows = list(zip(df1.index[rows1], df2.index[rows2]))
+        else:
+            matched_rows = self.match_concat_keys(df1, df2, all_str_cols)
+        
+        # Keep the matched row positions for the numeric comparison
+        rows1 = df1.index.get_indexer([idx for idx, _ in matched_rows])
+        rows2 = df2.index.get_indexer([idx for _, idx in matched_rows])
+        # Without string columns or matched keys, the numeric comparison pairs rows by position
+        if all_str_cols and len(rows1):
+            self.matched_pairs = (rows1, rows2)
             
-            # If we have at least one row in both files, it's a match
-            if df1_rows and df2_rows:
-                # Take the first matching row from each file
-                matched_rows.append((df1_rows[0], df2_rows[0]))
-        
-        # Create sets of matched indices
-        matched_df1_indices = set()
-        matched_df2_indices = set()
-        for df1_idx, df2_idx in matched_rows:
-            matched_df1_indices.add(df1_idx)
-            matched_df2_indices.add(df2_idx)
-        
-        # Create list of unmatched rows
-        unmatched_df1 = [idx for idx in df1.index if idx not in matched_df1_indices]
-        unmatched_df2 = [idx for idx in df2.index if idx not in matched_df2_indices]
-        
-        # Prepare side-by-side data
-        # First add matched rows
-        for df1_idx, df2_idx in matched_rows:
-            row_data = []
-            # Add File1 data
-            for col in df1.columns:
-                row_data.append(df1.at[df1_idx, col])
-            # Add File2 data
-            for col in df2.columns:
-                row_data.append(df2.at[df2_idx, col])
-            row_data.append("Matched")
-            side_by_side_data.append(row_data)
-        
-        # Then add unmatched from File1
-        for idx in unmatched_df1:
-            row_data = []
-            # Add File1 data
-            for col in df1.columns:
-                row_data.append(df1.at[idx, col])
-            # Add blank for File2
-            for _ in df2.columns:
-                row_data.append(None)
-            row_data.append("Not Matched (File1)")
-            side_by_side_data.append(row_data)
-        
-        # Then add unmatched from File2
-        for idx in unmatched_df2:
-            row_data = []
-            # Add blank for File1
-            for _ in df1.columns:
-                row_data.append(None)
-            # Add File2 data
-            for col in df2.columns:
-                row_data.append(df2.at[idx, col])
-            row_data.append("Not Matched (File2)")
-            side_by_side_data.append(row_data)
-        
-        # Create DataFrame for side-by-side view
-        columns = [f"File1_{col}" for col in df1.columns] + \
-                  [f"File2_{col}" for col in df2.columns] + \
-                  ["Match Status"]
-        self.side_by_side_df = pd.DataFrame(side_by_side_data, columns=columns)
-        
-        # Write headers
-        header_row = ["File1"] * len(df1.columns) + ["File2"] * len(df2.columns) + [""]
-        ws.append(header_row)
-        
-        col_names = [col for col in df1.columns] + [col for col in df2.columns] + ["Match Status"]
-        ws.append(col_names)
-        
-        # Apply header styling
-        for row in ws.iter_rows(min_row=1, max_row=2, max_col=len(col_names)):
-            for cell in row:
-                cell.fill = HEADER_FILL
-                cell.font = Font(bold=True)
-                cell.border = THIN_BORDER
-        
-        # Merge header cells
-        ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=len(df1.columns))
-        ws.merge_cells(start_row=1, start_column=len(df1.columns)+1, 
-                      end_row=1, end_column=len(df1.columns)+len(df2.columns))
-        
-        # Set alignment for merged headers
-        ws.cell(row=1, column=1).value = "File1"
-        ws.cell(row=1, column=1).alignment = Alignment(horizontal='center')
-        ws.cell(row=1, column=len(df1.columns)+1).value = "File2"
-        ws.cell(row=1, column=len(df1.columns)+1).alignment = Alignment(horizontal='center')
-        
-        # Add totals row if enabled
+            # Columns whose values differ between matched rows, compared by column fingerprints
+            self.changed_columns = changed_columns(df1, df2, [col for col in df1.columns if col in common_cols],
+                                                   rows1, rows2)
+        else:
+            self.matched_pairs = None
+            self.changed_columns = None
+        
+        # Find unmatched row positions, in file order
+        unmatched_df1 = np.setdiff1d(np.arange(len(df1)), rows1)
+        unmatched_df2 = np.setdiff1d(np.arange(len(df2)), rows2)
+        
+        # Find differing cells of matched rows over the common columns; identical rows are skipped by fingerprint
+        compare_cols = [col for col in df1.columns if col in common_cols]
+        conditional = self.conditional_highlights.get()
+        diff_values = np.zeros((len(matched_rows), len(compare_cols)), dtype=bool)
+        if self.highlight_cell_diffs.get() and matched_rows and not conditional:
+            diff_values = diff_frames(df1, df2, compare_cols, rows1, rows2)[0].to_numpy()
+        diff_pos1 = [df1.columns.get_loc(col) for col in compare_cols]
+        diff_pos2 = [len(df1.columns) + df2.columns.get_loc(col) for col in compare_cols]
+        
+        # Build the totals row if enabled
+        totals_row = None
         if self.create_totals.get():
             totals_row = []
             
@@ -587,71 +593,137 @@ class ExcelComparator:
                     totals_row.append("")
             
             totals_row.append("Totals")
-            ws.append(totals_row)
+        
+        # Freeze panes and size columns from the data (write-only sheets need this before any row)
+        ws.freeze_panes = "C3"
+        header_row = ["File1"] + [None] * (len(df1.columns) - 1) + \
+                     ["File2"] + [None] * (len(df2.columns) - 1) + [""]
+        col_names = [col for col in df1.columns] + [col for col in df2.columns] + ["Match Status"]
+        statuses = []
+        if len(matched_rows):
+            statuses.append("Matched")
+        if len(unmatched_df1):
+            statuses.append("Not Matched (File1)")
+        if len(unmatched_df2):
+            statuses.append("Not Matched (File2)")
+        data_columns = [df1[col] for col in df1.columns] + [df2[col] for col in df2.columns] + [statuses]
+        totals = totals_row or [None] * len(col_names)
+        set_column_widths(ws, [
+            # Merged title cells do not widen their first column
+            [[name], [total], values]
+            for name, total, values in zip(col_names, totals, data_columns)
+        ], sample_size=AUTO_WIDTH_SAMPLE)
+        
+        # Write headers
+        header_cells = styled_row(ws, header_row, fill=HEADER_FILL, font=Font(bold=True), border=THIN_BORDER)
+        header_cells[0].alignment = Alignment(horizontal='center')
+        header_cells[len(df1.columns)].alignment = Alignment(horizontal='center')
+        ws.append(header_cells)
+        
+        ws.append(styled_row(ws, col_names, fill=HEADER_FILL, font=Font(bold=True), border=THIN_BORDER))
+        
+        # Merge header cells
+        merge_cells(ws, 1, 1, 1, len(df1.columns))
+        merge_cells(ws, 1, len(df1.columns)+1, 1, len(df1.columns)+len(df2.columns))
+        
+        # Add totals row if enabled
+        if totals_row is not None:
+            ws.append(styled_row(ws, totals_row, fill=TOTAL_FILL, font=Font(bold=True), border=THIN_BORDER))
+        
+        # Write each data row once with its final style: matched rows first,
+        # then unmatched rows from File1 and from File2
+        match_fill = ROW_MATCH_FILL if self.highlight_row_matches.get() else None
+        missing_fill = ROW_MISSING_FILL if self.highlight_row_matches.get() else None
+        sections = [
+            (rows1, rows2, "Matched", match_fill),
+            (unmatched_df1, None, "Not Matched (File1)", missing_fill),
+            (None, unmatched_df2, "Not Matched (File2)", missing_fill),
+        ]
+        
+        # The full side-by-side table is only kept in memory for normal reports
+        side_by_side_data = None if is_streaming(ws) else []
+        
+        for section_rows1, section_rows2, status, fill in sections:
+            n_rows = len(section_rows1 if section_rows1 is not None else section_rows2)
             
-            # Apply styling to totals row
-            totals_row_num = ws.max_row
-            for col_idx in range(1, len(totals_row) + 1):
-                cell = ws.cell(row=totals_row_num, column=col_idx)
-                cell.fill = TOTAL_FILL
-                cell.font = Font(bold=True)
-                cell.border = THIN_BORDER
-        
-        # Write data
-        for _, row in self.side_by_side_df.iterrows():
-            ws.append(row.tolist())
-        
-        # Apply styling and formatting
-        for row_idx, row in enumerate(ws.iter_rows(min_row=3, max_row=ws.max_row), 3):
-            # Skip totals row
-            if self.create_totals.get() and row_idx == 3:
-                continue
+            # Convert rows to Python values a chunk at a time
+            for start in range(0, n_rows, SIDE_BY_SIDE_CHUNK):
+                stop = min(start + SIDE_BY_SIDE_CHUNK, n_rows)
+                if section_rows1 is not None:
+                    block1 = df1.iloc[section_rows1[start:stop]].to_numpy(dtype=object).tolist()
+                else:
+                    block1 = [[None] * len(df1.columns)] * (stop - start)
+                if section_rows2 is not None:
+                    block2 = df2.iloc[section_rows2[start:stop]].to_numpy(dtype=object).tolist()
+                else:
+                    block2 = [[None] * len(df2.columns)] * (stop - start)
                 
-            match_status = ws.cell(row=row_idx, column=len(col_names)).value
-            
-            # Apply row matching highlighting
-            if self.highlight_row_matches.get():
-                if match_status == "Matched":
-                    for cell in row:
-                        cell.fill = ROW_MATCH_FILL
-                elif "Not Matched" in match_status:
-                    for cell in row:
-                        cell.fill = ROW_MISSING_FILL
-            
-            # Apply cell difference highlighting
-            if self.highlight_cell_diffs.get() and match_status == "Matched":
-                # Only compare common columns for matched rows
-                for col_idx, col_name in enumerate(df1.columns, 1):
-                    if col_name in common_cols:
-                        file1_val = ws.cell(row=row_idx, column=col_idx).value
-                        file2_val = ws.cell(row=row_idx, column=col_idx + len(df1.columns)).value
-                        
-                        if not self.are_equal(file1_val, file2_val):
-                            ws.cell(row=row_idx, column=col_idx).fill = CELL_DIFF_FILL
-                            ws.cell(row=row_idx, column=col_idx + len(df1.columns)).fill = CELL_DIFF_FILL
-            
-            # Apply borders
-            for cell in row:
-                cell.border = THIN_BORDER
-        
-        # Auto-size columns
-        for col in ws.columns:
-            max_length = 0
-            column = col[0].column_letter
-            for cell in col:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = (max_length + 2) * 1.2
-            ws.column_dimensions[column].width = adjusted_width
+                for i, (values1, values2) in enumerate(zip(block1, block2), start):
+                    row_data = values1 + values2 + [status]
+                    if side_by_side_data is not None:
+                        side_by_side_data.append(row_data)
+                    
+                    # Conditional formatting styles the rows once they are all written
+                    if conditional:
+                        ws.append(row_data)
+                        continue
+                    
+                    cells = styled_row(ws, row_data, fill=fill, border=THIN_BORDER)
+                    
+                    # Apply cell difference highlighting
+                    if status == "Matched":
+                        for c in np.flatnonzero(diff_values[i]):
+                            cells[diff_pos1[c]].fill = CELL_DIFF_FILL
+                            cells[diff_pos2[c]].fill = CELL_DIFF_FILL
+                    
+                    ws.append(cells)
         
-        # Freeze panes
-        ws.freeze_panes = "C3"
+        if conditional:
+            first_row = 4 if totals_row is not None else 3
+            # Columns that never differ need no difference rule
+            rule_cols = compare_cols if self.changed_columns is None else \
+                [col for col in compare_cols if col in self.changed_columns]
+            self.add_side_by_side_rules(ws, df1, df2, rule_cols, first_row,
+                                        first_row + len(matched_rows) + len(unmatched_df1) + len(unmatched_df2) - 1)
+        
+        # Create DataFrame for side-by-side view
+        if side_by_side_data is not None:
+            columns = [f"File1_{col}" for col in df1.columns] + \
+                      [f"File2_{col}" for col in df2.columns] + \
+                      ["Match Status"]
+            self.side_by_side_df = pd.DataFrame(side_by_side_data, columns=columns)
+        else:
+            self.side_by_side_df = None
         
         return len(matched_rows), len(unmatched_df1), len(unmatched_df2)
     
+    def add_side_by_side_rules(self, ws, df1, df2, compare_cols, first_row, last_row):
+        """Highlight the side-by-side data rows with conditional formatting keyed on Match Status"""
+        if last_row < first_row:
+            return
+        
+        status_col = get_column_letter(len(df1.columns) + len(df2.columns) + 1)
+        status = f"${status_col}{first_row}"
+        data_range = f"A{first_row}:{status_col}{last_row}"
+        
+        # Differing cells of matched rows come first so they win over the row fills
+        if self.highlight_cell_diffs.get():
+            for col in compare_cols:
+                col1 = get_column_letter(df1.columns.get_loc(col) + 1)
+                col2 = get_column_letter(len(df1.columns) + df2.columns.get_loc(col) + 1)
+                add_highlight_rule(
+                    ws,
+                    f"{col1}{first_row}:{col1}{last_row} {col2}{first_row}:{col2}{last_row}",
+                    f'AND({status}="Matched",NOT(EXACT(${col1}{first_row},${col2}{first_row})))',
+                    fill=CELL_DIFF_FILL,
+                )
+        
+        if self.highlight_row_matches.get():
+            add_highlight_rule(ws, data_range, f'{status}="Matched"', fill=ROW_MATCH_FILL)
+            add_highlight_rule(ws, data_range, f'LEFT({status},11)="Not Matched"', fill=ROW_MISSING_FILL)
+        
+        add_highlight_rule(ws, data_range, "TRUE", border=THIN_BORDER)
+    
     def compare_files(self):
         file1 = self.file1_path.get()
         file2 = self.file2_path.get()
@@ -667,15 +739,27 @@ class ExcelComparator:
         
         try:
             # Read data
-            df1 = pd.read_excel(file1, sheet_name=sheet1)
-            df2 = pd.read_excel(file2, sheet_name=sheet2)
+            # Probe the headers first so only the shared columns are parsed
+            usecols1 = usecols2 = None
+            if self.common_columns_only.get():
+                headers1 = read_headers(file1, sheet1)
+                headers2 = read_headers(file2, sheet2)
+                usecols1 = project_columns(headers1.columns, other_columns=headers2.columns)
+                usecols2 = project_columns(headers2.columns, other_columns=headers1.columns)
+            
+            df1, df2 = read_sheets([(file1, sheet1, usecols1), (file2, sheet2, usecols2)],
+                                   engine="xml" if self.xml_reader.get() else None,
+                                   string_ids=self.string_ids.get(),
+                                   categorical=self.categorical_strings.get())
             
             # Create comparison workbook
-            output_wb = Workbook()
-            output_wb.remove(output_wb.active)
+            output_wb = new_report_workbook(streaming=self.streaming_report.get())
             
-            # 1. Compare headers
-            self.compare_headers(df1, df2, output_wb)
+            # 1. Compare headers (all of them, also the columns that were not read)
+            if usecols1 is not None or usecols2 is not None:
+                self.compare_headers(headers1, headers2, output_wb)
+            else:
+                self.compare_headers(df1, df2, output_wb)
             
             # 2. Create side-by-side comparison sheet
             matched_count, unmatched1_count, unmatched2_count = self.create_side_by_side_sheet(df1, df2, output_wb)
@@ -705,6 +789,42 @@ class ExcelComparator:
             messagebox.showerror("Error", f"An error occurred:\n{str(e)}")
             self.status.set("Error occurred - see details in message")
     
+    def compare_headers_only(self):
+        """Create just the Header Comparison sheet from the header rows of both sheets"""
+        file1 = self.file1_path.get()
+        file2 = self.file2_path.get()
+        
+        if not file1 or not file2:
+            messagebox.showerror("Error", "Please select both Excel files")
+            return
+        
+        self.status.set("Reading headers...")
+        self.root.update()
+        
+        try:
+            df1 = read_headers(file1, self.sheet1_name.get())
+            df2 = read_headers(file2, self.sheet2_name.get())
+            
+            output_wb = new_report_workbook(streaming=self.streaming_report.get())
+            self.compare_headers(df1, df2, output_wb)
+            
+            output_file = filedialog.asksaveasfilename(
+                defaultextension=".xlsx",
+                filetypes=[("Excel files", "*.xlsx")],
+                title="Save Header Comparison"
+            )
+            
+            if output_file:
+                output_wb.save(output_file)
+                self.status.set(f"Header comparison saved to: {output_file}")
+                messagebox.showinfo("Success", f"Header comparison saved successfully!\n{output_file}")
+            else:
+                self.status.set("Comparison canceled")
+                
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred:\n{str(e)}")
+            self.status.set("Error occurred - see details in message")
+    
     def compare_headers(self, df1, df2, output_wb):
         """Compare and highlight header differences"""
         headers1 = set(df1.columns)
@@ -715,144 +835,124 @@ class ExcelComparator:
         
         # Create header comparison sheet
         ws = output_wb.create_sheet("Header Comparison")
-        ws.append(["Header", "Status", "File 1 Presence", "File 2 Presence"])
+        listed = sorted(common) + (sorted(unique1) + sorted(unique2) if self.highlight_missing.get() else [])
+        set_column_widths(ws, [
+            [["Header"], listed],
+            [["Status", "Common"] + (["Unique to File 1"] if self.highlight_missing.get() and unique1 else [])],
+            [["File 1 Presence"]],
+            [["File 2 Presence"]],
+        ])
+        ws.append(styled_row(ws, ["Header", "Status", "File 1 Presence", "File 2 Presence"],
+                             font=Font(bold=True), border=THIN_BORDER))
         
         # Add common headers
         for header in sorted(common):
-            ws.append([header, "Common", "✓", "✓"])
+            ws.append(styled_row(ws, [header, "Common", "✓", "✓"], border=THIN_BORDER))
         
         # Add unique headers if option is enabled
         if self.highlight_missing.get():
             for header in sorted(unique1):
-                ws.append([header, "Unique to File 1", "✓", ""])
-                ws.cell(ws.max_row, 1).fill = HEADER_DIFF_FILL
+                cells = styled_row(ws, [header, "Unique to File 1", "✓", ""], border=THIN_BORDER)
+                cells[0].fill = HEADER_DIFF_FILL
+                ws.append(cells)
             
             for header in sorted(unique2):
-                ws.append([header, "Unique to File 2", "", "✓"])
-                ws.cell(ws.max_row, 1).fill = HEADER_DIFF_FILL
-        
-        # Apply formatting
-        for row in ws.iter_rows():
-            for cell in row:
-                cell.font = Font(bold=(cell.row == 1))
-                cell.border = THIN_BORDER
-        
-        # Auto-size columns
-        for col in ws.columns:
-            max_length = 0
-            column = col[0].column_letter
-            for cell in col:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = (max_length + 2) * 1.2
-            ws.column_dimensions[column].width = adjusted_width
-    
+                cells = styled_row(ws, [header, "Unique to File 2", "", "✓"], border=THIN_BORDER)
+                cells[0].fill = HEADER_DIFF_FILL
+                ws.append(cells)
+            
     def analyze_row_matches(self, df1, df2, output_wb, matched_count, unmatched1_count, unmatched2_count):
         """Analyze and highlight row matches between files"""
         # Create row matching sheet
         ws = output_wb.create_sheet("Row Matching Analysis")
+        summary = [
+            ("Total Rows in File1", len(df1)),
+            ("Total Rows in File2", len(df2)),
+            ("Matched Rows", matched_count),
+            ("Rows Only in File1", unmatched1_count),
+            ("Rows Only in File2", unmatched2_count),
+        ]
+        notes = [
+            "Key Generation Method:",
+            "Automatically concatenated all non-date string columns",
+            "Note: Rows are considered matched if any row in File1 matches any row in File2",
+        ]
+        changed = self.changed_columns or []
+        set_column_widths(ws, [
+            [["Row Matching Summary", "Changed Columns"], [label for label, _ in summary], notes],
+            [[value for _, value in summary], [len(changed)], changed],
+        ])
         
         # Summary section
-        ws.append(["Row Matching Summary"])
+        ws.append(styled_row(ws, ["Row Matching Summary"], font=Font(bold=True, size=14)))
         ws.append(["", ""])
-        ws.append(["Total Rows in File1", len(df1)])
-        ws.append(["Total Rows in File2", len(df2)])
-        ws.append(["Matched Rows", matched_count])
-        ws.append(["Rows Only in File1", unmatched1_count])
-        ws.append(["Rows Only in File2", unmatched2_count])
+        for label, value in summary:
+            cells = styled_row(ws, [label, value], font=Font(bold=False))
+            cells[0].font = Font(bold=True)
+            ws.append(cells)
         ws.append([""])
         
         # Key generation method
-        ws.append(["Key Generation Method:"])
-        ws.append(["Automatically concatenated all non-date string columns"])
+        ws.append([notes[0]])
+        ws.append([notes[1]])
         ws.append([""])
-        ws.append(["Note: Rows are considered matched if any row in File1 matches any row in File2"])
-        
-        # Apply styling to summary
-        for row in ws.iter_rows(min_row=1, max_row=1):
-            for cell in row:
-                cell.font = Font(bold=True, size=14)
-        
-        for row in ws.iter_rows(min_row=3, max_row=7):
-            for cell in row:
-                cell.font = Font(bold=(cell.column == 1))
-        
-        # Auto-size columns
-        for col in ws.columns:
-            max_length = 0
-            column = col[0].column_letter
-            for cell in col:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = (max_length + 2) * 1.2
-            ws.column_dimensions[column].width = adjusted_width
-    
+        ws.append([notes[2]])
+        
+        # Columns with at least one differing value between matched rows
+        if self.changed_columns is not None:
+            ws.append([""])
+            cells = styled_row(ws, ["Changed Columns", len(changed)])
+            cells[0].font = Font(bold=True)
+            ws.append(cells)
+            for col in changed:
+                ws.append(["", col])
+            
     def compare_numeric_values(self, df1, df2, output_wb):
         """Create numerical comparison table for common numeric columns"""
-        # Identify common numeric columns
-        common_cols = list(set(df1.columns) & set(df2.columns))
-        num_cols = [col for col in common_cols 
-                    if pd.api.types.is_numeric_dtype(df1[col]) and 
-                    pd.api.types.is_numeric_dtype(df2[col])]
+        # Identify common numeric columns (also numbers stored as text on one side)
+        num_cols = numeric_columns(df1, df2)
         
         if not num_cols:
             return
         
+        # Columns without any changed value between matched rows have no differences to list
+        if self.changed_columns is not None:
+            num_cols = [col for col in num_cols if col in self.changed_columns]
+        
         # Create sheet
         ws = output_wb.create_sheet("Numeric Comparison")
-        headers = ["Column", "Row", "File1 Value", "File2 Value", "Absolute Diff", "Relative Diff"]
-        ws.append(headers)
+        headers = ["Column", "File1 Row", "File2 Row", "File1 Value", "File2 Value", "Absolute Diff", "Relative Diff"]
+        
+        # Compare values of key-matched rows (by position if matching has not run)
+        rows1, rows2 = self.matched_pairs if self.matched_pairs is not None else (None, None)
+        differences = numeric_differences(df1, df2, num_cols, rows1, rows2, top_k=self.num_diff_limit.get())
         
-        # Apply header formatting
-        for cell in ws[1]:
-            cell.font = Font(bold=True)
-            cell.fill = HEADER_FILL
-            cell.border = THIN_BORDER
+        # Size columns from the differences before the first row is written
+        listed = [col for col in num_cols if len(differences[col])]
+        set_column_widths(ws, [[[headers[0]], listed]] + [
+            [[header]] + [differences[col][header] for col in listed]
+            for header in headers[1:]
+        ], sample_size=AUTO_WIDTH_SAMPLE)
         
-        # Compare values
+        ws.append(styled_row(ws, headers, fill=HEADER_FILL, font=Font(bold=True), border=THIN_BORDER))
+        
+        conditional = self.conditional_highlights.get()
         for col in num_cols:
-            for i in range(min(len(df1), len(df2))):
-                val1 = df1[col].iloc[i]
-                val2 = df2[col].iloc[i]
-                
-                if pd.isna(val1) or pd.isna(val2) or val1 == val2:
+            for row in differences[col].itertuples(index=False):
+                if conditional:
+                    ws.append([col] + list(row))
                     continue
-                    
-                abs_diff = abs(val1 - val2)
-                rel_diff = abs_diff / max(abs(val1), abs(val2)) if max(abs(val1), abs(val2)) != 0 else float('inf')
-                
-                ws.append([col, i+1, val1, val2, abs_diff, rel_diff])
                 
                 # Highlight significant differences (>10%)
-                if rel_diff > 0.1:
-                    for col_idx in range(1, 7):
-                        cell = ws.cell(ws.max_row, col_idx)
-                        cell.fill = NUM_DIFF_FILL
-                
-                # Apply borders
-                for col_idx in range(1, 7):
-                    cell = ws.cell(ws.max_row, col_idx)
-                    cell.border = THIN_BORDER
-        
-        # Auto-size columns
-        for col in ws.columns:
-            max_length = 0
-            column = col[0].column_letter
-            for cell in col:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = (max_length + 2) * 1.2
-            ws.column_dimensions[column].width = adjusted_width
-
+                fill = NUM_DIFF_FILL if row[-1] > 0.1 else None
+                ws.append(styled_row(ws, [col] + list(row), fill=fill, border=THIN_BORDER))
+        
+        n_rows = sum(len(differences[col]) for col in num_cols)
+        if conditional and n_rows:
+            data_range = f"A2:{get_column_letter(len(headers))}{n_rows + 1}"
+            add_highlight_rule(ws, data_range, f"${get_column_letter(len(headers))}2>0.1", fill=NUM_DIFF_FILL)
+            add_highlight_rule(ws, data_range, "TRUE", border=THIN_BORDER)
+        
 if __name__ == "__main__":
     root = tk.Tk()
     app = ExcelComparator(root)
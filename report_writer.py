@@ -0,0 +1,122 @@
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.formatting.rule import FormulaRule
+from openpyxl.worksheet._write_only import WriteOnlyWorksheet
+from openpyxl.worksheet.cell_range import CellRange
+from openpyxl.utils import get_column_letter
+
+
+def new_report_workbook(streaming=False):
+    """
+    Create an empty output workbook.
+
+    Args:
+        streaming (bool): Create a write-only workbook whose rows are flushed
+            as they are appended, so memory stays flat. Default False.
+
+    Returns:
+        Workbook: Workbook without any sheets
+    """
+    if streaming:
+        return Workbook(write_only=True)
+
+    wb = Workbook()
+    wb.remove(wb.active)
+    return wb
+
+
+def is_streaming(ws):
+    """Check if a worksheet belongs to a write-only workbook"""
+    return isinstance(ws, WriteOnlyWorksheet)
+
+
+def styled_row(ws, values, fill=None, font=None, border=None, alignment=None):
+    """
+    Wrap row values in cells that already carry their final style.
+
+    The cells can be passed straight to ws.append() on both normal and
+    write-only worksheets, so every row is written once, fully styled.
+    Styles of single cells can still be changed on the returned list.
+
+    Returns:
+        list: One WriteOnlyCell per value
+    """
+    cells = []
+    for value in values:
+        cell = WriteOnlyCell(ws, value=value)
+        if fill is not None:
+            cell.fill = fill
+        if font is not None:
+            cell.font = font
+        if border is not None:
+            cell.border = border
+        if alignment is not None:
+            cell.alignment = alignment
+        cells.append(cell)
+    return cells
+
+
+def merge_cells(ws, start_row, start_column, end_row, end_column):
+    """Merge a cell range on normal and write-only worksheets alike"""
+    if is_streaming(ws):
+        # Write-only sheets only record the range; it is written when the sheet closes
+        ws.merged_cells.add(CellRange(min_col=start_column, min_row=start_row,
+                                      max_col=end_column, max_row=end_row))
+    else:
+        ws.merge_cells(start_row=start_row, start_column=start_column,
+                       end_row=end_row, end_column=end_column)
+
+
+def text_width(values, sample_size=None):
+    """
+    Return the longest text length of the non-empty values.
+
+    Args:
+        values (list or Series): Values of one output column
+        sample_size (int, optional): Only measure a fixed random sample of this many values
+
+    Returns:
+        int: Length of the longest str(value), 0 when there are no values
+    """
+    values = pd.Series(values, dtype=object).dropna()
+    if sample_size and len(values) > sample_size:
+        values = values.sample(sample_size, random_state=0)
+    if values.empty:
+        return 0
+    return int(values.astype(str).str.len().max())
+
+
+def set_column_widths(ws, columns, sample_size=None):
+    """
+    Size worksheet columns from the data written to them, not from the cells.
+
+    Works on write-only sheets as long as it is called before the first row
+    is appended.
+
+    Args:
+        ws (Worksheet): Sheet to size
+        columns (list): One entry per output column, each a list of value
+            sequences (header texts, Series, ...) that end up in that column
+        sample_size (int, optional): Measure large sequences on a sample
+    """
+    for col_idx, parts in enumerate(columns, 1):
+        max_length = max((text_width(part, sample_size) for part in parts), default=0)
+        ws.column_dimensions[get_column_letter(col_idx)].width = (max_length + 2) * 1.2
+
+
+def add_highlight_rule(ws, cell_range, formula, fill=None, font=None, border=None):
+    """
+    Style a whole range with one conditional-formatting rule.
+
+    Cells covered by a rule need no style of their own, which keeps both the
+    write time and styles.xml small. The formula is written for the top-left
+    cell of the range; use $-anchored columns when the range has several parts.
+    Rules added first take precedence over later ones.
+
+    Args:
+        ws (Worksheet): Sheet to format, normal or write-only
+        cell_range (str): Range such as "A3:I100", or several separated by spaces
+        formula (str): Excel formula without the leading "="
+    """
+    ws.conditional_formatting.add(cell_range, FormulaRule(formula=[formula], fill=fill, font=font, border=border))
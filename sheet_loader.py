@@ -0,0 +1,578 @@
+import hashlib
+import os
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.utils.cell import range_boundaries
+from disk_cache import file_digest
+from comparison_engine import share_string_ids, is_numeric_text, INFERRED_TYPES, \
+    COLUMN_EMPTY, COLUMN_STRING, COLUMN_NUMERIC, COLUMN_NUMERIC_TEXT, COLUMN_DATE, COLUMN_MIXED
+
+# Below this total input size the process start-up costs more than it saves
+PARALLEL_MIN_BYTES = 1 << 20
+
+# Rows per chunk when streaming a sheet
+CHUNK_ROWS = 50000
+
+# Default memory budget of a SheetCache
+SHEET_CACHE_BYTES = 512 << 20
+
+# String columns with at most this share of distinct values become categoricals
+CATEGORICAL_MAX_RATIO = 0.1
+
+
+class SheetCache:
+    """
+    In-process LRU cache of parsed worksheets.
+
+    Entries are keyed by the file identity plus the sheet name, so a sheet is
+    parsed once per session no matter how many stages need it. The identity
+    is path, mtime and size by default, or a hash of the file content.
+    Least recently used sheets are evicted once the frames outgrow the budget.
+    """
+
+    def __init__(self, max_bytes=SHEET_CACHE_BYTES, content_hash=False):
+        """
+        Args:
+            max_bytes (int): Memory budget for the cached frames. Default 512 MiB.
+            content_hash (bool): Identify files by a hash of their bytes instead
+                of path, mtime and size; survives copies and touch. Default False.
+        """
+        self.max_bytes = max_bytes
+        self.content_hash = content_hash
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def file_id(self, path):
+        """Identity of a file as it is on disk right now"""
+        if self.content_hash:
+            return file_digest(path)
+
+        stat = os.stat(path)
+        return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+    def get(self, key):
+        """Return a copy of the cached frame, or None"""
+        df = self.entries.get(key)
+        if df is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        # Callers add columns and edit cells; keep the cached frame pristine
+        return df.copy()
+
+    def put(self, key, df):
+        """Cache a frame, evicting the least recently used ones over budget"""
+        if key in self.entries:
+            self.total_bytes -= self.frame_bytes(self.entries.pop(key))
+        size = self.frame_bytes(df)
+        if size > self.max_bytes:
+            return
+
+        self.entries[key] = df.copy()
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.total_bytes -= self.frame_bytes(evicted)
+
+    def clear(self):
+        """Drop all cached frames"""
+        self.entries.clear()
+        self.total_bytes = 0
+
+    @staticmethod
+    def frame_bytes(df):
+        """Memory held by a frame, including the Python objects in object columns"""
+        return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def read_sheet(path, sheet_name=0, usecols=None, engine=None, string_ids=False):
+    """
+    Parse one worksheet into a DataFrame (runs inside the worker processes).
+
+    engine "xml" reads .xlsx files with the direct sheet-XML reader
+    (xlsx_reader.read_xlsx); anything else goes through pd.read_excel.
+    With string_ids the XML reader keeps string columns as Categoricals over
+    the workbook's string table.
+    """
+    if engine == "xml" and str(path).lower().endswith((".xlsx", ".xlsm")):
+        # Imported here as xlsx_reader builds on the probing helpers of this module
+        from xlsx_reader import read_xlsx
+        return read_xlsx(path, sheet_name=sheet_name, usecols=usecols, categorical_strings=string_ids)
+    return pd.read_excel(path, sheet_name=sheet_name, usecols=list(usecols) if usecols is not None else None)
+
+
+# <dimension ref="A1:D100"/> sits before <sheetData> at the top of every sheet part
+DIMENSION_RE = re.compile(rb'<(?:\w+:)?dimension\s+ref="([^"]*)"')
+SHEET_DATA_RE = re.compile(rb'<(?:\w+:)?sheetData[\s>/]')
+
+# How much of a sheet part is searched for its dimension before giving up
+DIMENSION_SCAN_BYTES = 64 << 10
+
+
+def local_name(tag):
+    """Tag name without its XML namespace"""
+    return tag.rsplit("}", 1)[-1]
+
+
+def sheet_dimension(zf, part):
+    """
+    Read the used range of a sheet from its <dimension> element.
+
+    Only the first few kilobytes of the sheet part are decompressed.
+
+    Returns:
+        tuple: (rows, columns) of the used range, or (None, None) when the
+            sheet does not record one
+    """
+    head = b""
+    with zf.open(part) as f:
+        while len(head) < DIMENSION_SCAN_BYTES:
+            block = f.read(4096)
+            if not block:
+                break
+            head += block
+            match = DIMENSION_RE.search(head)
+            if match:
+                try:
+                    min_col, min_row, max_col, max_row = range_boundaries(match.group(1).decode("ascii"))
+                except (TypeError, ValueError):
+                    return None, None
+                return max_row - min_row + 1, max_col - min_col + 1
+            if SHEET_DATA_RE.search(head):
+                break
+    return None, None
+
+
+def probe_workbook(path):
+    """
+    List the worksheets of an .xlsx file with their sizes, without parsing cells.
+
+    Reads xl/workbook.xml, its relationships and the <dimension> element at
+    the top of each sheet straight from the zip, so it takes milliseconds
+    whatever the size of the workbook.
+
+    Args:
+        path (str): Path of the workbook
+
+    Returns:
+        list: One dict per worksheet in workbook order with name, rows and
+            columns (the used range including header rows; None if unknown)
+            and part (the zip member holding the sheet XML)
+    """
+    with zipfile.ZipFile(path) as zf:
+        workbook = ET.fromstring(zf.read("xl/workbook.xml"))
+        rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+
+        targets = {}
+        for rel in rels:
+            target = rel.get("Target", "")
+            # Targets are relative to xl/ unless they start at the package root
+            targets[rel.get("Id")] = target.lstrip("/") if target.startswith("/") \
+                else posixpath.normpath(posixpath.join("xl", target))
+
+        sheets = []
+        for sheet in workbook.iter():
+            if local_name(sheet.tag) != "sheet":
+                continue
+            rel_id = next((value for key, value in sheet.attrib.items() if local_name(key) == "id"), None)
+            part = targets.get(rel_id)
+            rows, columns = sheet_dimension(zf, part) if part in zf.NameToInfo else (None, None)
+            sheets.append({"name": sheet.get("name"), "rows": rows, "columns": columns, "part": part})
+        return sheets
+
+
+def read_headers(path, sheet_name=0):
+    """
+    Read only the header row of a worksheet.
+
+    The sheet is streamed and reading stops after the header, so this takes
+    the same time for ten rows or millions.
+
+    Returns:
+        DataFrame: Empty frame with the column names pd.read_excel would give
+    """
+    return pd.read_excel(path, sheet_name=sheet_name, nrows=0)
+
+
+def header_names(values):
+    """Name header cells the way pd.read_excel does: blanks become "Unnamed: i", repeats get ".1", ".2", ..."""
+    names = []
+    seen = {}
+    for i, value in enumerate(values):
+        name = f"Unnamed: {i}" if value is None else value
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        seen.setdefault(name, 0)
+        names.append(name)
+    return names
+
+
+def iter_row_blocks(path, sheet_name=0, chunk_rows=CHUNK_ROWS, usecols=None):
+    """
+    Stream the raw cell values of a worksheet in blocks of at most chunk_rows rows.
+
+    Rows are read with openpyxl's read-only iter_rows, so peak memory depends
+    on the block size rather than the sheet size. The first row is the header.
+
+    Yields:
+        tuple: (column names, sheet position of the first row, list of row value lists)
+    """
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[sheet_name] if isinstance(sheet_name, int) else wb[sheet_name]
+        rows = ws.iter_rows(values_only=True)
+
+        header = next(rows, None)
+        if header is None:
+            return
+        positions = list(usecols) if usecols is not None else list(range(len(header)))
+        columns = header_names([header[pos] for pos in positions])
+
+        offset = 0
+        block = []
+        for row in rows:
+            block.append([row[pos] if pos < len(row) else None for pos in positions])
+            if len(block) == chunk_rows:
+                yield columns, offset, block
+                offset += len(block)
+                block = []
+        if block:
+            yield columns, offset, block
+    finally:
+        wb.close()
+
+
+def scan_sheet_columns(path, sheet_name=0, chunk_rows=CHUNK_ROWS, usecols=None):
+    """
+    Find the dtype and class every column has over the whole sheet, streaming it once.
+
+    Chunks infer their dtypes from their own rows only: an integer column
+    with a blank cell in one chunk turns float there and int elsewhere, so
+    the same value would become key part "5" in one chunk and "5.0" in the
+    next. Passing the result as the schema of iter_sheet_chunks gives every
+    chunk the dtypes and column classes of the full sheet read at once.
+
+    Returns:
+        tuple: (dtypes, types) where dtypes maps the columns that need a cast
+        to their sheet-wide dtype and types maps every column to its COLUMN_* class
+    """
+    kinds = {}
+    blank = {}
+    numeric_text = {}
+    columns = []
+    for columns, _, block in iter_row_blocks(path, sheet_name, chunk_rows, usecols):
+        for i, col in enumerate(columns):
+            values = pd.Series([row[i] for row in block], dtype=object)
+            inferred = pd.api.types.infer_dtype(values, skipna=True)
+            blank[col] = blank.get(col, False) or bool(values.isna().any())
+            if inferred != "empty":
+                kinds.setdefault(col, set()).add(inferred)
+            if inferred == "string":
+                texts = pd.Series(values.dropna().unique())
+                numeric_text[col] = numeric_text.get(col, True) and is_numeric_text(texts)
+
+    dtypes = {}
+    types = {}
+    for col in columns:
+        found = kinds.get(col, set())
+        if not found:
+            types[col] = COLUMN_EMPTY
+        elif found == {"integer"} and not blank[col]:
+            dtypes[col] = "int64"
+            types[col] = COLUMN_NUMERIC
+        elif found <= {"integer", "floating", "mixed-integer-float"}:
+            dtypes[col] = "float64"
+            types[col] = COLUMN_NUMERIC
+        elif found == {"boolean"} and not blank[col]:
+            dtypes[col] = "bool"
+            types[col] = COLUMN_NUMERIC
+        elif found == {"datetime"}:
+            dtypes[col] = "datetime64[us]"
+            types[col] = COLUMN_DATE
+        elif found == {"string"}:
+            types[col] = COLUMN_NUMERIC_TEXT if numeric_text[col] else COLUMN_STRING
+        else:
+            # Values of several kinds stay Python objects, as when the whole sheet is read
+            dtypes[col] = object
+            types[col] = INFERRED_TYPES.get(found.pop(), COLUMN_MIXED) if len(found) == 1 else COLUMN_MIXED
+    return dtypes, types
+
+
+def iter_sheet_chunks(path, sheet_name=0, chunk_rows=CHUNK_ROWS, usecols=None, schema=None):
+    """
+    Stream a worksheet as DataFrames of at most chunk_rows rows.
+
+    Peak memory depends on the chunk size rather than the sheet size (see
+    iter_row_blocks). Each chunk is indexed by the position of its rows in
+    the whole sheet, so positions found in a chunk can be used directly as
+    sheet row positions.
+
+    Args:
+        path (str): Path of the workbook
+        sheet_name (str or int): Sheet name or position. Default the first sheet.
+        chunk_rows (int): Rows per chunk. Default CHUNK_ROWS.
+        usecols (list, optional): Positions of the columns to keep
+        schema (tuple, optional): Sheet-wide (dtypes, types) from
+            scan_sheet_columns. Without it dtypes are inferred per chunk.
+
+    Yields:
+        DataFrame: Next chunk
+    """
+    for columns, offset, block in iter_row_blocks(path, sheet_name, chunk_rows, usecols):
+        chunk = pd.DataFrame(block, columns=columns,
+                             index=pd.RangeIndex(offset, offset + len(block))).infer_objects()
+        if schema is not None:
+            dtypes, types = schema
+            chunk = chunk.astype(dtypes)
+            # Seeds the column_types cache, so no chunk classifies its columns on its own
+            chunk.attrs["column_types"] = dict(types)
+        yield chunk
+
+
+def project_columns(columns, include=None, exclude=None, other_columns=None):
+    """
+    Work out which columns of a sheet a comparison has to read.
+
+    Args:
+        columns (Index or list): Header of the sheet, as read by read_headers
+        include (list, optional): Only keep these columns
+        exclude (list, optional): Drop these columns, e.g. wide free-text ones
+        other_columns (Index or list, optional): Header of the sheet it is
+            compared with; only the columns both sheets share are kept
+
+    Returns:
+        list: Positions of the kept columns for read_sheets, or None when
+            every column is needed
+    """
+    include = set(include) if include is not None else None
+    exclude = set(exclude or ())
+    other_columns = set(other_columns) if other_columns is not None else None
+
+    keep = [pos for pos, col in enumerate(columns)
+            if (include is None or col in include)
+            and col not in exclude
+            and (other_columns is None or col in other_columns)]
+    return None if len(keep) == len(columns) else keep
+
+
+def sheet_names(path):
+    """List the worksheet names of a workbook without loading its cells"""
+    return [sheet["name"] for sheet in probe_workbook(path)]
+
+
+# Parts shared by every sheet that change how its cells read (string values, date formats)
+SHEET_CONTEXT_PARTS = ("xl/sharedStrings.xml", "xl/styles.xml")
+
+# The workbook properties hold the date system (1900 or 1904)
+WORKBOOK_PR_RE = re.compile(rb'<(?:\w+:)?workbookPr\b[^>]*>')
+
+
+def same_file(path1, path2):
+    """Check if two files have identical bytes (size first, then the content hash)"""
+    if os.path.abspath(path1) == os.path.abspath(path2):
+        return True
+    if os.path.getsize(path1) != os.path.getsize(path2):
+        return False
+    return file_digest(path1) == file_digest(path2)
+
+
+def same_sheet(path1, sheet1, path2, sheet2):
+    """
+    Check if two .xlsx worksheets hold the same cells, without parsing them.
+
+    Compares the sheet XML parts inside the zips together with the shared
+    strings, the styles and the date system they are read with. The CRC-32
+    and size stored in the zip directory rule out most different parts at
+    no cost; parts that agree there are confirmed by hashing their content.
+    A False result only means the sheets could not be shown identical this way.
+
+    Args:
+        path1, path2 (str): Workbook paths
+        sheet1, sheet2 (str or int): Sheet names or positions
+
+    Returns:
+        bool: True when the sheets are byte-identical with the same context
+    """
+    try:
+        parts = []
+        for path, sheet_name in ((path1, sheet1), (path2, sheet2)):
+            sheets = probe_workbook(path)
+            if isinstance(sheet_name, int):
+                sheet = sheets[sheet_name] if sheet_name < len(sheets) else None
+            else:
+                sheet = next((s for s in sheets if s["name"] == sheet_name), None)
+            if sheet is None or sheet["part"] is None:
+                return False
+            parts.append((sheet["part"],) + SHEET_CONTEXT_PARTS)
+
+        with zipfile.ZipFile(path1) as zf1, zipfile.ZipFile(path2) as zf2:
+            pairs = [(zf1.NameToInfo.get(part1), zf2.NameToInfo.get(part2))
+                     for part1, part2 in zip(*parts)]
+            for info1, info2 in pairs:
+                if (info1 is None) != (info2 is None):
+                    return False
+                if info1 is not None and (info1.CRC, info1.file_size) != (info2.CRC, info2.file_size):
+                    return False
+
+            if WORKBOOK_PR_RE.findall(zf1.read("xl/workbook.xml")) != \
+                    WORKBOOK_PR_RE.findall(zf2.read("xl/workbook.xml")):
+                return False
+
+            for info1, info2 in pairs:
+                if info1 is not None and part_digest(zf1, info1) != part_digest(zf2, info2):
+                    return False
+        return True
+    except (OSError, KeyError, zipfile.BadZipFile, ET.ParseError):
+        # Not an .xlsx package (e.g. .xls); only a full comparison can tell
+        return False
+
+
+def part_digest(zf, info):
+    """Content hash of one zip member, read in blocks"""
+    digest = hashlib.blake2b(digest_size=16)
+    with zf.open(info) as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_sheets(requests, max_workers=None, parallel=None, cache=None, disk_cache=None, engine=None,
+                string_ids=False, categorical=False):
+    """
+    Parse several worksheets concurrently, one worker process per sheet.
+
+    XML parsing is CPU bound, so separate processes (not threads) are used to
+    load both inputs - and every sheet of a multi-sheet run - at the same time.
+
+    Args:
+        requests (list): (path, sheet_name) pairs, or (path, sheet_name, usecols)
+            to read only the columns at the given positions (see
+            project_columns). A sheet_name of None loads every sheet of that
+            workbook, like pd.read_excel(sheet_name=None).
+        max_workers (int, optional): Size of the process pool. Defaults to
+            the number of sheets, capped at the CPU count.
+        parallel (bool, optional): Use (True) or avoid (False) the process
+            pool. By default it is used for more than one sheet once the input
+            files add up to PARALLEL_MIN_BYTES. It is never used when only one
+            worker is available.
+        cache (SheetCache, optional): Reuse sheets parsed earlier in the
+            session and remember the newly parsed ones.
+        disk_cache (DiskSheetCache, optional): Persistent cache consulted
+            after the in-process one; newly parsed sheets are stored in it.
+        engine (str, optional): "xml" to parse .xlsx files with the direct
+            sheet-XML reader. It follows pd.read_excel's type inference, but
+            cached sheets are kept per engine, so a frame is always the one
+            its own engine parsed.
+        string_ids (bool): Return the string columns of all sheets encoded
+            into one global integer ID space (see
+            comparison_engine.share_string_ids). Default False.
+        categorical (bool): Only encode the low-cardinality string columns
+            (at most CATEGORICAL_MAX_RATIO distinct values), as categoricals
+            with one category set shared by all sheets. Default False.
+
+    Returns:
+        list: One result per request, in request order; a DataFrame, or a
+            dict of sheet name -> DataFrame for requests with sheet_name None
+    """
+    normalized = []
+    for path, sheet_name, *usecols in requests:
+        usecols = usecols[0] if usecols else None
+        normalized.append((path, sheet_name, tuple(usecols) if usecols is not None else None))
+    requests = normalized
+
+    # Expand "all sheets" requests into one task per sheet; the same sheet is only parsed once
+    expanded = {path: sheet_names(path) for path, sheet_name, _ in requests if sheet_name is None}
+    tasks = []
+    for path, sheet_name, usecols in requests:
+        if sheet_name is None:
+            tasks.extend((path, name, usecols) for name in expanded[path])
+        else:
+            tasks.append((path, sheet_name, usecols))
+    tasks = list(dict.fromkeys(tasks))
+
+    # A projected, string-encoded or XML-engine read is cached separately from the plain sheet
+    def sheet_key(sheet_name, usecols):
+        if string_ids:
+            return sheet_name, usecols, engine, "string-ids"
+        if engine == "xml":
+            return sheet_name, usecols, engine
+        return sheet_name if usecols is None else (sheet_name, usecols)
+
+    # Only parse sheets the cache does not hold yet
+    loaded = {}
+    if cache is not None:
+        file_ids = {path: cache.file_id(path) for path in {task[0] for task in tasks}}
+        keys = {task: (file_ids[task[0]], sheet_key(*task[1:])) for task in tasks}
+        for task in tasks:
+            df = cache.get(keys[task])
+            if df is not None:
+                loaded[task] = df
+        tasks = [task for task in tasks if task not in loaded]
+
+    # Then the sheets parsed by earlier runs
+    fresh = {}
+    if disk_cache is not None:
+        digests = {path: file_digest(path) for path in {task[0] for task in tasks}}
+        for task in tasks:
+            df = disk_cache.load(digests[task[0]], sheet_key(*task[1:]))
+            if df is not None:
+                fresh[task] = df
+        tasks = [task for task in tasks if task not in fresh]
+
+    if parallel is None:
+        total_bytes = sum(os.path.getsize(path) for path in {task[0] for task in tasks})
+        parallel = len(tasks) > 1 and total_bytes >= PARALLEL_MIN_BYTES
+
+    # A single worker would only add the start-up cost
+    workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+    if parallel and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            frames = list(pool.map(partial(read_sheet, engine=engine, string_ids=string_ids), *zip(*tasks)))
+    else:
+        frames = [read_sheet(*task, engine=engine, string_ids=string_ids) for task in tasks]
+
+    for task, df in zip(tasks, frames):
+        if disk_cache is not None:
+            disk_cache.save(digests[task[0]], sheet_key(*task[1:]), df, source=os.path.abspath(task[0]))
+        fresh[task] = df
+
+    for task, df in fresh.items():
+        if cache is not None:
+            cache.put(keys[task], df)
+        loaded[task] = df
+
+    # Regroup the per-sheet frames by request; a sheet requested twice
+    # (e.g. a file compared with itself) gets its own copy each time
+    handed_out = set()
+
+    def take(task):
+        if task in handed_out:
+            return loaded[task].copy()
+        handed_out.add(task)
+        return loaded[task]
+
+    results = []
+    for path, sheet_name, usecols in requests:
+        if sheet_name is None:
+            results.append({name: take((path, name, usecols)) for name in expanded[path]})
+        else:
+            results.append(take((path, sheet_name, usecols)))
+
+    # Each workbook has its own string table; bring all of them into one ID space
+    if string_ids or categorical:
+        frames = [df for result in results for df in (result.values() if isinstance(result, dict) else [result])]
+        shared = iter(share_string_ids(frames, max_unique_ratio=None if string_ids else CATEGORICAL_MAX_RATIO))
+        results = [{name: next(shared) for name in result} if isinstance(result, dict) else next(shared)
+                   for result in results]
+    return results
@@ -0,0 +1,45 @@
+import datetime as dt
+import os
+import sys
+
+import pytest
+from openpyxl import Workbook
+
+# The modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# A sheet covering error cells, dates, times of day, durations and booleans
+TYPED_ROWS = [
+    ["Err", "ErrMix", "Date", "Time", "Duration", "Bool", "BoolBlank", "BoolNum", "DateMix", "Num", "Text"],
+    ["#N/A", 1, dt.datetime(2024, 1, 2, 3, 4, 5), dt.time(10, 30), dt.timedelta(hours=30),
+     True, True, True, dt.datetime(2024, 5, 6), 1.5, "a"],
+    ["#DIV/0!", "#REF!", dt.datetime(2023, 12, 31), dt.time(0, 0, 1), dt.timedelta(minutes=5),
+     False, None, 2, "x", 2, "b"],
+    [None, 3, None, None, None, True, False, 3, 7, None, None],
+    ["#VALUE!", None, None, None, None, False, None, 4, None, None, None],
+]
+TYPED_ERRORS = ("A2", "A3", "B3", "A5")
+
+
+@pytest.fixture
+def make_workbook(tmp_path):
+    """Factory saving rows (header first) to a one-sheet workbook in tmp_path"""
+    def make(name, rows, iso_dates=False, errors=()):
+        wb = Workbook()
+        wb.iso_dates = iso_dates
+        ws = wb.active
+        for row in rows:
+            ws.append(row)
+        # Cells listed in errors hold error values such as #N/A
+        for coordinate in errors:
+            ws[coordinate].data_type = "e"
+        path = tmp_path / name
+        wb.save(path)
+        return str(path)
+    return make
+
+
+@pytest.fixture(params=[False, True], ids=["serial-dates", "iso-dates"])
+def typed_workbook(request, make_workbook):
+    """The typed sheet, with dates stored as serial numbers or as ISO 8601 cells (t="d")"""
+    return make_workbook("typed.xlsx", TYPED_ROWS, iso_dates=request.param, errors=TYPED_ERRORS)
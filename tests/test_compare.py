@@ -0,0 +1,38 @@
+import pytest
+
+from compare import check_excel_files
+from comparison_engine import EXIT_DIFFERENT, EXIT_EQUAL
+
+
+@pytest.fixture
+def keyed(make_workbook):
+    """Factory writing ID/v rows to a workbook"""
+    def make(name, rows):
+        return make_workbook(name, [["ID", "v"]] + rows)
+    return make
+
+
+def test_duplicate_keys_in_file2_are_checked(keyed):
+    path1 = keyed("k1.xlsx", [["A", 1], ["A", 1], ["B", 2]])
+    path2 = keyed("k2.xlsx", [["A", 1], ["B", 2], ["B", 9]])
+    verdict = check_excel_files(path1, path2, key_columns=["ID"], max_differences=None)
+    assert verdict["exit_code"] == EXIT_DIFFERENT
+    assert verdict["reason"] == "rows removed or added"
+    assert [(d["row1"], d["row2"]) for d in verdict["differences"]] == [(2, None), (None, 3)]
+
+
+def test_duplicate_keys_pair_by_occurrence(keyed):
+    path1 = keyed("k1.xlsx", [["A", 1], ["A", 1], ["B", 2]])
+    assert check_excel_files(path1, keyed("same.xlsx", [["B", 2], ["A", 1], ["A", 1]]),
+                             key_columns=["ID"])["exit_code"] == EXIT_EQUAL
+
+    verdict = check_excel_files(path1, keyed("changed.xlsx", [["B", 2], ["A", 1], ["A", 5]]),
+                                key_columns=["ID"], max_differences=None)
+    assert [(d["row1"], d["row2"], d["value1"], d["value2"]) for d in verdict["differences"]] == [(2, 3, 1, 5)]
+
+
+def test_positional_check(keyed):
+    path1 = keyed("p1.xlsx", [["A", 1], ["B", 2]])
+    assert check_excel_files(path1, path1)["reason"] == "identical inputs (file hash)"
+    verdict = check_excel_files(path1, keyed("p2.xlsx", [["A", 1], ["B", None]]))
+    assert verdict["differences"][0]["column"] == "v"
@@ -0,0 +1,202 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from comparison_engine import (
+    COLUMN_MIXED, COLUMN_NUMERIC, COLUMN_NUMERIC_TEXT, COLUMN_STRING, EXIT_DIFFERENT, EXIT_EQUAL,
+    align_frames, align_rows, build_concat_keys, build_key_index, cells_equal, changed_columns,
+    check_frames, column_fingerprint, column_types, diff_frames, hash_row_keys, match_row_hashes,
+    match_status, myers_matches, numeric_differences, pair_key_rows, string_columns,
+)
+
+
+@pytest.fixture
+def frames():
+    df1 = pd.DataFrame({
+        "ID": ["a", "b", "c", "d"],
+        "Qty": [1, 2, 3, 4],
+        "Price": [1.5, np.nan, 3.0, np.nan],
+        "Note": ["x", None, "z", None],
+    })
+    df2 = pd.DataFrame({
+        "ID": ["a", "b", "c", "d"],
+        "Qty": [1.0, 2.0, 30.0, 4.0],
+        "Price": [1.5, np.nan, 3.0, 9.0],
+        "Note": ["x", None, "z", "w"],
+    })
+    return df1, df2
+
+
+def differing_cells(df1, df2, *args):
+    _, rows, cols = diff_frames(df1, df2, *args)
+    columns = args[0] if args else [col for col in df1.columns if col in df2.columns]
+    return sorted((int(r), columns[c]) for r, c in zip(rows, cols))
+
+
+def test_column_types():
+    df = pd.DataFrame({"s": ["a", None], "n": [1, 2], "t": ["1", "2.5"], "m": [1, "a"]})
+    assert column_types(df) == {"s": COLUMN_STRING, "n": COLUMN_NUMERIC, "t": COLUMN_NUMERIC_TEXT, "m": COLUMN_MIXED}
+
+
+def test_cells_equal_blanks():
+    values1 = np.array([1, "a", None, np.nan, 1], dtype=object)
+    values2 = np.array([1.0, "b", np.nan, 5, "1"], dtype=object)
+    assert cells_equal(values1, values2).tolist() == [True, False, True, False, False]
+    assert cells_equal(values1, values2, mixed=True).tolist() == [True, False, True, False, False]
+
+
+def test_diff_frames_blank_cells(frames):
+    df1, df2 = frames
+    # Blank against blank is equal, blank against a value differs; int and float of one number are equal
+    assert differing_cells(df1, df2) == [(2, "Qty"), (3, "Note"), (3, "Price")]
+
+
+def test_diff_frames_paired_rows(frames):
+    df1, df2 = frames
+    rows1 = np.array([0, 3])
+    rows2 = np.array([3, 0])
+    _, rows, cols = diff_frames(df1, df2, ["ID", "Qty"], rows1, rows2)
+    assert sorted(zip(rows.tolist(), cols.tolist())) == [(0, 0), (0, 1), (1, 0), (1, 1)]
+
+
+
+def test_fingerprints_ignore_int_float_dtype(frames):
+    df1, df2 = frames
+    assert column_fingerprint(df1["Qty"].iloc[[0, 1, 3]]) == column_fingerprint(df2["Qty"].iloc[[0, 1, 3]])
+    assert changed_columns(df1, df2) == ["Qty", "Price", "Note"]
+    assert changed_columns(df1, df2, rows1=[0, 1], rows2=[0, 1]) == []
+
+
+def test_check_frames(frames):
+    df1, df2 = frames
+    assert check_frames(df1, df1.copy())["exit_code"] == EXIT_EQUAL
+
+    verdict = check_frames(df1, df2)
+    assert verdict["exit_code"] == EXIT_DIFFERENT
+    assert len(verdict["differences"]) == 1
+
+    everything = check_frames(df1, df2, max_differences=None)["differences"]
+    assert sorted((d["row1"], d["column"]) for d in everything) == [(3, "Qty"), (4, "Note"), (4, "Price")]
+
+    assert check_frames(df1, df2.iloc[:3])["reason"].startswith("row counts differ")
+    assert check_frames(df1, df2.drop(columns="Note"))["reason"] == "columns differ"
+
+
+def test_check_frames_paired_rows_with_duplicate_keys():
+    df1 = pd.DataFrame({"ID": ["A", "A", "B"], "v": [1, 1, 2]})
+    df2 = pd.DataFrame({"ID": ["B", "A", "A"], "v": [2, 1, 5]})
+    verdict = check_frames(df1, df2, ["v"], [0, 1, 2], [1, 2, 0], max_differences=None)
+    assert [(d["row1"], d["row2"], d["value1"], d["value2"]) for d in verdict["differences"]] == [(2, 3, 1, 5)]
+
+
+@pytest.fixture
+def keyed_frames():
+    df1 = pd.DataFrame({"ID": [1, "A2", None, 1], "Name": ["x", "y", "z", "x"], "Qty": [1, 2, 3, 4]})
+    df2 = pd.DataFrame({"ID": ["A2", 1], "Name": ["y", "x"], "Qty": [9, 9]})
+    return df1, df2
+
+
+def test_diff_frames_mixed_column():
+    df1 = pd.DataFrame({"Code": [1, "a", 2]})
+    df2 = pd.DataFrame({"Code": ["1", "a", 2]})
+    # 1 and "1" hash alike but are different cells
+    assert differing_cells(df1, df2) == [(0, "Code")]
+
+
+def test_mixed_columns_are_key_columns(keyed_frames):
+    df1, _ = keyed_frames
+    assert string_columns(df1) == ["ID", "Name"]
+
+
+def test_build_concat_keys(keyed_frames):
+    df1, _ = keyed_frames
+    # Blank cells are skipped, other cells joined as text
+    assert build_concat_keys(df1, ["ID", "Name"]).tolist() == ["1_x", "A2_y", "z", "1_x"]
+
+
+def test_hashed_keys_match_concat_keys(keyed_frames):
+    df1, df2 = keyed_frames
+    hashes1, has_key1 = hash_row_keys(df1, ["ID", "Name"])
+    hashes2, has_key2 = hash_row_keys(df2, ["ID", "Name"])
+    assert has_key1.all()
+    assert hashes1[0] == hashes1[3]
+    # First File1 row of every key found in File2, as with the concatenation keys
+    rows1, rows2 = match_row_hashes(hashes1, has_key1, hashes2, has_key2)
+    assert rows1.tolist() == [0, 1]
+    assert rows2.tolist() == [1, 0]
+
+def test_numeric_differences(frames):
+    df1, df2 = frames
+    table = numeric_differences(df1, df2, ["Qty", "Price"])
+    assert table["Qty"]["File1 Row"].tolist() == [3]
+    assert table["Qty"]["Absolute Diff"].tolist() == [27.0]
+    # Blank cells are left out
+    assert table["Price"].empty
+
+
+def lcs_length(a, b):
+    lengths = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i in range(len(a) - 1, -1, -1):
+        for j in range(len(b) - 1, -1, -1):
+            lengths[i][j] = lengths[i + 1][j + 1] + 1 if a[i] == b[j] else max(lengths[i + 1][j], lengths[i][j + 1])
+    return lengths[0][0]
+
+
+def test_myers_matches_finds_a_longest_common_subsequence():
+    rng = random.Random(0)
+    for _ in range(300):
+        a = [rng.randint(0, 3) for _ in range(rng.randint(0, 15))]
+        b = [rng.randint(0, 3) for _ in range(rng.randint(0, 15))]
+        matches = myers_matches(a, b, max_edits=None)
+        assert all(a[i] == b[j] for i, j in matches)
+        assert all(i1 < i2 and j1 < j2 for (i1, j1), (i2, j2) in zip(matches, matches[1:]))
+        assert len(matches) == lcs_length(a, b)
+
+
+def test_myers_matches_gives_up_past_max_edits():
+    assert myers_matches([1, 2, 3], [4, 5, 6], max_edits=2) is None
+
+
+def test_align_rows_insert_delete_change():
+    hashes1 = np.array([1, 2, 3, 4, 5, 6], dtype=np.uint64)
+    hashes2 = np.array([1, 3, 40, 5, 7, 6], dtype=np.uint64)
+    slots1, slots2 = align_rows(hashes1, hashes2)
+    pairs = list(zip(slots1.tolist(), slots2.tolist()))
+    # Row 2 deleted, row 4 changed, File2 row 4 inserted
+    assert pairs == [(0, 0), (1, -1), (2, 1), (3, 2), (4, 3), (-1, 4), (5, 5)]
+
+
+@pytest.mark.parametrize("max_edits", [None, 2])
+def test_align_rows_keeps_every_row_once(max_edits):
+    rng = np.random.default_rng(1)
+    for _ in range(100):
+        hashes1 = rng.integers(0, 4, rng.integers(0, 12)).astype(np.uint64)
+        hashes2 = rng.integers(0, 4, rng.integers(0, 12)).astype(np.uint64)
+        slots1, slots2 = align_rows(hashes1, hashes2, max_edits=max_edits)
+        assert slots1[slots1 >= 0].tolist() == list(range(len(hashes1)))
+        assert slots2[slots2 >= 0].tolist() == list(range(len(hashes2)))
+        assert not ((slots1 < 0) & (slots2 < 0)).any()
+
+
+def test_align_frames_with_blank_cells():
+    df1 = pd.DataFrame({"ID": [1, 2, 3, 4], "Note": ["a", None, "c", "d"]})
+    df2 = pd.DataFrame({"ID": [1.0, 9.0, 2.0, 3.0, 4.0], "Note": ["a", "new", None, "c", "d"]})
+    slots1, slots2 = align_frames(df1, df2)
+    assert slots1.tolist() == [0, -1, 1, 2, 3]
+    assert slots2.tolist() == [0, 1, 2, 3, 4]
+
+
+def test_rows_without_key():
+    df1 = pd.DataFrame({"A": ["x", None, "y"], "B": ["1", None, None]})
+    df2 = pd.DataFrame({"A": [None, "x"], "B": [None, "1"]})
+    keys1 = build_concat_keys(df1, ["A", "B"])
+    keys2 = build_concat_keys(df2, ["A", "B"])
+    assert keys1[1] is None and keys2[0] is None
+    # Keyless rows count as matched, as in the original per-key loop, but are never paired
+    status1, status2 = match_status(keys1, keys2)
+    assert status1.tolist() == ["Matched", "Matched", "Not Matched"]
+    assert status2.tolist() == ["Matched", "Matched"]
+    rows1, rows2 = pair_key_rows(build_key_index(keys1), build_key_index(keys2))
+    assert rows1.tolist() == [0] and rows2.tolist() == [1]
@@ -0,0 +1,24 @@
+from demodatafinal import ExcelComparator
+
+
+def numeric_table(path1, path2):
+    comparator = ExcelComparator(path1, path2)
+    wb = comparator.compare()
+    rows = list(wb["Numeric Comparison"].iter_rows(min_row=2, values_only=True))
+    return comparator, [(col, row1, row2, value1, value2) for col, row1, row2, value1, value2, *_ in rows]
+
+
+def test_numeric_only_sheets_compare_by_position(make_workbook):
+    # Without string columns there are no keys, so rows are paired by position
+    path1 = make_workbook("a.xlsx", [["A", "B"], [1, 10], [2, 20], [3, 30], [4, 40]])
+    path2 = make_workbook("b.xlsx", [["A", "B"], [1, 10], [2, 20], [30, 30], [4, 45]])
+    comparator, table = numeric_table(path1, path2)
+    assert comparator.matched_pairs is None
+    assert sorted(table) == [("A", 3, 3, 3, 30), ("B", 4, 4, 40, 45)]
+
+
+def test_key_matched_rows(make_workbook):
+    path1 = make_workbook("a.xlsx", [["ID", "A"], ["x", 1], ["y", 2], ["z", 3]])
+    path2 = make_workbook("b.xlsx", [["ID", "A"], ["z", 30], ["x", 1], ["y", 2]])
+    _, table = numeric_table(path1, path2)
+    assert table == [("A", 3, 1, 3, 30)]
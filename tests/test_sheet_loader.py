@@ -0,0 +1,117 @@
+import datetime as dt
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from comparison_engine import hash_chunk_keys, hash_row_keys, string_columns
+from disk_cache import DiskSheetCache
+from sheet_loader import (
+    SheetCache, iter_sheet_chunks, read_headers, read_sheets, same_file, same_sheet, scan_sheet_columns,
+    sheet_names,
+)
+
+
+@pytest.fixture
+def chunked_workbook(make_workbook):
+    """A sheet whose integer column has one blank and whose code column turns from numbers to text"""
+    rows = [["Code", "Qty", "Name"]]
+    for i in range(10):
+        rows.append([i if i < 5 else f"C{i}", None if i == 7 else i, f"n{i % 3}"])
+    return make_workbook("chunked.xlsx", rows)
+
+
+def test_sheet_names_and_headers(make_workbook):
+    path = make_workbook("book.xlsx", [["A", None, "A"], [1, 2, 3]])
+    assert sheet_names(path) == ["Sheet"]
+    assert read_headers(path).columns.tolist() == pd.read_excel(path).columns.tolist()
+
+
+def test_chunks_use_sheet_wide_dtypes(chunked_workbook):
+    full = pd.read_excel(chunked_workbook)
+    schema = scan_sheet_columns(chunked_workbook, chunk_rows=4)
+    chunks = list(iter_sheet_chunks(chunked_workbook, chunk_rows=4, schema=schema))
+    assert [chunk.index[0] for chunk in chunks] == [0, 4, 8]
+    assert all(chunk["Qty"].dtype == full["Qty"].dtype for chunk in chunks)
+    assert string_columns(chunks[0]) == string_columns(full) == ["Code", "Name"]
+
+    columns = string_columns(full)
+    hashes, has_key = hash_chunk_keys(iter_sheet_chunks(chunked_workbook, chunk_rows=4, schema=schema), columns)
+    expected_hashes, expected_has_key = hash_row_keys(full, columns)
+    assert np.array_equal(hashes, expected_hashes)
+    assert np.array_equal(has_key, expected_has_key)
+
+
+def test_read_sheets_engines_agree(typed_workbook):
+    openpyxl_df, = read_sheets([(typed_workbook, 0)])
+    xml_df, = read_sheets([(typed_workbook, 0)], engine="xml")
+    pd.testing.assert_frame_equal(xml_df, openpyxl_df)
+
+
+def test_cached_sheets_are_kept_per_engine(make_workbook):
+    path = make_workbook("book.xlsx", [["A"], [1], [2]])
+    cache = SheetCache()
+    read_sheets([(path, 0)], cache=cache)
+    read_sheets([(path, 0)], cache=cache, engine="xml")
+    assert cache.hits == 0
+    read_sheets([(path, 0)], cache=cache, engine="xml")
+    assert cache.hits == 1
+
+
+def test_disk_cache_round_trip(tmp_path, typed_workbook):
+    df = pd.read_excel(typed_workbook)
+    df["Cells"] = pd.Series([None, 2 ** 70, dt.date(2024, 1, 2), pd.Timedelta(1)], dtype=object)
+    cache = DiskSheetCache(str(tmp_path / "cache"))
+    cache.save("digest", "Sheet", df, source=typed_workbook)
+    loaded = cache.load("digest", "Sheet")
+    pd.testing.assert_frame_equal(loaded, df)
+    assert [type(v) for v in loaded["Cells"]] == [type(v) for v in df["Cells"]]
+    assert cache.load("digest", "Other") is None
+    assert [entry["rows"] for entry in cache.entries()] == [len(df)]
+
+    # Nothing in the entry needs pickle to load
+    entry, = cache.entries()
+    for name in os.listdir(entry["path"]):
+        if name.endswith((".npy", ".npz")):
+            np.load(os.path.join(entry["path"], name), allow_pickle=False)
+    assert cache.clear() == 1
+
+
+def test_disk_cache_categorical_columns(tmp_path, typed_workbook):
+    df, = read_sheets([(typed_workbook, 0)], engine="xml", string_ids=True)
+    cache = DiskSheetCache(str(tmp_path / "cache"))
+    cache.save("digest", "Sheet", df)
+    loaded = cache.load("digest", "Sheet")
+    pd.testing.assert_frame_equal(loaded, df)
+
+
+def test_disk_cache_skips_timezone_aware_cells(tmp_path):
+    df = pd.DataFrame({"When": pd.Series([pd.Timestamp("2024-01-01", tz="UTC")], dtype=object)})
+    cache = DiskSheetCache(str(tmp_path / "cache"))
+    cache.save("digest", "Sheet", df)
+    assert cache.load("digest", "Sheet") is None
+    assert cache.entries() == []
+
+
+def test_sheet_cache(make_workbook):
+    path = make_workbook("cached.xlsx", [["A"], [1], [2]])
+    cache = SheetCache()
+    first, = read_sheets([(path, 0)], cache=cache)
+    first.loc[0, "A"] = 100
+    second, = read_sheets([(path, 0)], cache=cache)
+    assert cache.hits == 1
+    # Edits of a returned frame do not reach the cache
+    assert second["A"].tolist() == [1, 2]
+
+
+def test_identical_inputs(tmp_path, make_workbook):
+    path = make_workbook("a.xlsx", [["A"], [1]])
+    copy = str(tmp_path / "copy.xlsx")
+    shutil.copy(path, copy)
+    other = make_workbook("b.xlsx", [["A"], [2]])
+    assert same_file(path, copy)
+    assert same_sheet(path, 0, copy, "Sheet")
+    assert not same_file(path, other)
+    assert not same_sheet(path, 0, other, 0)
@@ -0,0 +1,120 @@
+import datetime as dt
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from xlsx_reader import read_xlsx
+
+
+def rewrite_sheet(path, replacements):
+    """Edit the sheet XML of a saved workbook, e.g. to store values openpyxl would not write"""
+    with zipfile.ZipFile(path) as zf:
+        parts = {name: zf.read(name) for name in zf.namelist()}
+    for old, new in replacements:
+        parts["xl/worksheets/sheet1.xml"] = parts["xl/worksheets/sheet1.xml"].replace(old, new)
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, data in parts.items():
+            zf.writestr(name, data)
+
+
+def assert_same_as_read_excel(path, **kwargs):
+    """Compare read_xlsx with pd.read_excel column by column, dtypes and cell types included"""
+    expected = pd.read_excel(path, **kwargs)
+    actual = read_xlsx(path, **kwargs)
+    assert actual.shape == expected.shape
+    for i in range(expected.shape[1]):
+        pd.testing.assert_series_equal(actual.iloc[:, i], expected.iloc[:, i], check_names=False)
+        assert [type(v) for v in actual.iloc[:, i]] == [type(v) for v in expected.iloc[:, i]]
+
+
+def test_matches_read_excel(typed_workbook):
+    assert_same_as_read_excel(typed_workbook)
+
+
+def test_matches_read_excel_on_selected_columns(typed_workbook):
+    assert_same_as_read_excel(typed_workbook, usecols=[0, 3, 6])
+
+
+def test_cell_types(typed_workbook):
+    df = read_xlsx(typed_workbook)
+    assert df["Err"].isna().all()
+    assert df["ErrMix"].tolist()[::2] == [1.0, 3.0]
+    assert df["Date"].dtype.kind == "M"
+    assert df["Time"].tolist()[:2] == [dt.time(10, 30), dt.time(0, 0, 1)]
+    assert df["Duration"].dtype.kind == "m"
+    assert df["Bool"].dtype == bool
+    assert df["BoolBlank"].dtype == float
+    assert df["BoolNum"].tolist() == [1, 2, 3, 4]
+    # Error cells still count as rows
+    assert len(df) == 4
+
+
+def test_header_cells(make_workbook):
+    path = make_workbook("header.xlsx", [["A", None, "A", 5], [1, 2, 3, 4]])
+    assert read_xlsx(path).columns.tolist() == pd.read_excel(path).columns.tolist()
+
+
+def test_shared_and_inline_strings(make_workbook):
+    path = make_workbook("strings.xlsx", [["Code", "Note"], ["a&b", "<x>"], ["a&b", None], [None, "\"q\""]])
+    assert_same_as_read_excel(path)
+
+
+def test_categorical_strings(make_workbook):
+    path = make_workbook("codes.xlsx", [["Code"], ["EU"], ["US"], [None], ["EU"]])
+    df = read_xlsx(path, categorical_strings=True)
+    assert isinstance(df["Code"].dtype, pd.CategoricalDtype)
+    assert df["Code"].astype(object).tolist()[:2] == ["EU", "US"]
+    assert pd.isna(df["Code"][2])
+
+
+def test_unknown_sheet(make_workbook):
+    path = make_workbook("one.xlsx", [["A"], [1]])
+    with pytest.raises(ValueError):
+        read_xlsx(path, sheet_name="Missing")
+
+
+def test_text_inference(make_workbook):
+    path = make_workbook("text.xlsx", [
+        ["Code", "Float", "Padded", "Word", "Blank", "Flag", "FlagBlank", "FlagFirst", "NumFlag"],
+        ["001", ".5", " 1 ", "NA", "NA", "True", "TRUE", True, 1],
+        ["2", "2", "2", "x", "null", "false", None, "False", "True"],
+        [3, "1e3", "3", "", None, "False", "false", True, 2],
+    ])
+    assert_same_as_read_excel(path)
+    df = read_xlsx(path)
+    # Numbers stored as text become numbers, NA texts become blanks
+    assert df["Code"].dtype == np.int64 and df["Code"].tolist() == [1, 2, 3]
+    assert df["Float"].dtype == float
+    assert df["Word"].isna().tolist() == [True, False, True]
+    assert df["Blank"].isna().all()
+    # Boolean texts become booleans, unless the first cell is a boolean cell
+    assert df["Flag"].dtype == bool
+    assert df["FlagBlank"].tolist()[::2] == [True, False]
+    assert df["FlagFirst"].tolist() == [True, "False", True]
+
+
+def test_sheet_without_rows(make_workbook):
+    path = make_workbook("empty.xlsx", [["A", "B"]])
+    assert_same_as_read_excel(path)
+    assert read_xlsx(path).dtypes.tolist() == [object, object]
+
+
+def test_integers_past_float_precision(make_workbook):
+    path = make_workbook("big.xlsx", [["A", "B", "C"], [111111, 222222, 333333], [1, 2, 3]])
+    rewrite_sheet(path, [(b"<v>111111</v>", b"<v>9007199254740993</v>"),
+                         (b"<v>222222</v>", b"<v>18446744073709551615</v>"),
+                         (b"<v>333333</v>", b"<v>-9223372036854775809</v>")])
+    assert_same_as_read_excel(path)
+    df = read_xlsx(path)
+    assert df["A"].dtype == np.int64 and df["A"][0] == 2 ** 53 + 1
+    assert df["B"].dtype == np.uint64
+    assert df["C"].tolist() == [-2 ** 63 - 1, 3]
+
+
+def test_character_references(make_workbook):
+    path = make_workbook("refs.xlsx", [["Note"], ["line1"], ["tab"]])
+    rewrite_sheet(path, [(b">line1<", b">line1&#10;line2 &amp; &#x41;<"), (b">tab<", b">a&#9;b\r\nc<")])
+    assert_same_as_read_excel(path)
+    assert read_xlsx(path)["Note"].tolist() == ["line1\nline2 & A", "a\tb\nc"]
@@ -0,0 +1,589 @@
+import datetime
+import re
+import zipfile
+from array import array
+import xml.etree.ElementTree as ET
+import numpy as np
+import pandas as pd
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_timedelta_format
+from openpyxl.utils.datetime import from_ISO8601, to_excel
+from sheet_loader import probe_workbook, header_names, local_name
+
+# Decompressed sheet XML is scanned in blocks of this size
+READ_BLOCK_BYTES = 4 << 20
+
+# One <c> element: its attributes, the <v> value when it comes first, and any other content
+CELL_RE = re.compile(rb'<(?:\w+:)?c\b([^>]*?)(?:/>|>(?:<(?:\w+:)?v>([^<]*)</(?:\w+:)?v>)?(.*?)</(?:\w+:)?c>)', re.S)
+REF_RE = re.compile(rb'\br="([A-Z]+)(\d+)"')
+TYPE_RE = re.compile(rb'\bt="(\w+)"')
+STYLE_RE = re.compile(rb'\bs="(\d+)"')
+VALUE_RE = re.compile(rb'<(?:\w+:)?v>([^<]*)</(?:\w+:)?v>')
+TEXT_RE = re.compile(rb'<(?:\w+:)?t(?:\s[^>]*)?>([^<]*)</(?:\w+:)?t>')
+ROW_END_RE = re.compile(rb'</(?:\w+:)?row>')
+
+# Entity and character references (&amp;, &#10;, &#xA;) in cell text
+REFERENCE_RE = re.compile(r"&(?:#(\d+)|#x([0-9a-fA-F]+)|(\w+));")
+XML_ENTITIES = {"amp": "&", "lt": "<", "gt": ">", "quot": '"', "apos": "'"}
+
+# Day zero of the two Excel date systems
+WINDOWS_EPOCH = np.datetime64("1899-12-30", "us")
+MAC_EPOCH = np.datetime64("1904-01-01", "us")
+
+# Built-in number formats that display dates or times
+DATE_FORMAT_IDS = set(range(14, 23)) | {45, 46, 47}
+
+# Cell kinds seen in a column, combined as bit flags
+KIND_NUMBER, KIND_STRING, KIND_BOOL, KIND_DATE = 1, 2, 4, 8
+KIND_TIME, KIND_DURATION, KIND_OBJECT = 16, 32, 64
+
+# Cell types (t="...") holding text instead of a number
+TEXT_TYPES = (b"s", b"str", b"inlineStr")
+
+# Milliseconds per day; openpyxl rounds date and time values to milliseconds
+DAY_MILLIS = 86_400_000
+
+# Text pd.read_excel reads as a blank cell (its default na_values)
+NA_TEXTS = ("", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+            "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null")
+
+# Text pd.read_excel turns into numbers or booleans when a whole column reads that way
+INT_TEXT_RE = re.compile(r"\s*[+-]?\d+\s*", re.ASCII)
+FLOAT_TEXT_RE = re.compile(r"\s*[+-]?(?:(?:\d+\.?\d*|\.\d+)(?:e[+-]?\d+)?|inf|infinity)\s*", re.ASCII | re.I)
+BOOL_TEXTS = {"True": True, "TRUE": True, "true": True, "False": False, "FALSE": False, "false": False}
+
+# Integers with more digits than this may not survive a float64
+EXACT_FLOAT_DIGITS = 15
+
+
+class StringTable:
+    """Interned strings of a workbook; every distinct text gets one integer ID"""
+
+    def __init__(self):
+        self.ids = {}
+        self.texts = []
+
+    def intern(self, text):
+        """Return the ID of a text, adding it on first sight"""
+        string_id = self.ids.get(text)
+        if string_id is None:
+            string_id = self.ids[text] = len(self.texts)
+            self.texts.append(text)
+        return string_id
+
+    def as_array(self):
+        """The texts as an object array, indexable by ID"""
+        return np.array(self.texts, dtype=object)
+
+    def ids_of(self, texts):
+        """IDs of those of the texts the table holds"""
+        return np.array([self.ids[text] for text in texts if text in self.ids], dtype=np.int32)
+
+
+def read_shared_strings(zf, table):
+    """
+    Intern sharedStrings.xml into the table in one streaming pass.
+
+    Returns:
+        ndarray: int32 table ID of every shared-string index
+    """
+    if "xl/sharedStrings.xml" not in zf.NameToInfo:
+        return np.zeros(0, dtype=np.int32)
+
+    ids = []
+    with zf.open("xl/sharedStrings.xml") as f:
+        for _, elem in ET.iterparse(f):
+            if local_name(elem.tag) != "si":
+                continue
+            # Plain <t>, or rich-text runs <r><t>; phonetic hints (<rPh>) are not part of the text
+            parts = []
+            for child in elem:
+                name = local_name(child.tag)
+                if name == "t":
+                    parts.append(child.text or "")
+                elif name == "r":
+                    parts.extend(t.text or "" for t in child if local_name(t.tag) == "t")
+            ids.append(table.intern("".join(parts)))
+            elem.clear()
+    return np.array(ids, dtype=np.int32)
+
+
+def is_date_format(code):
+    """Check if a custom number format displays a date or time"""
+    # Ignore quoted literals, escapes and [colour]/[$-locale] sections
+    code = re.sub(r'"[^"]*"|\\.|\[[^\]]*\]', "", code)
+    return re.search(r"[dmyhs]", code, re.I) is not None
+
+
+def read_date_styles(zf):
+    """
+    Find the cell style indexes (s="...") that format numbers as dates or durations.
+
+    Returns:
+        tuple: (set of date styles, set of the date styles that are durations such as [h]:mm)
+    """
+    if "xl/styles.xml" not in zf.NameToInfo:
+        return set(), set()
+
+    root = ET.fromstring(zf.read("xl/styles.xml"))
+    custom = {}
+    cell_xfs = []
+    for elem in root:
+        name = local_name(elem.tag)
+        if name == "numFmts":
+            for fmt in elem:
+                custom[int(fmt.get("numFmtId"))] = fmt.get("formatCode", "")
+        elif name == "cellXfs":
+            cell_xfs = [int(xf.get("numFmtId", 0)) for xf in elem]
+
+    date_styles = {
+        style for style, fmt_id in enumerate(cell_xfs)
+        if fmt_id in DATE_FORMAT_IDS or (fmt_id in custom and is_date_format(custom[fmt_id]))
+    }
+    duration_styles = {
+        style for style in date_styles
+        if is_timedelta_format(custom.get(cell_xfs[style], BUILTIN_FORMATS.get(cell_xfs[style])))
+    }
+    return date_styles, duration_styles
+
+
+def uses_1904_dates(zf):
+    """Check the workbook's date system (Mac workbooks may count days from 1904)"""
+    workbook = zf.read("xl/workbook.xml")
+    return re.search(rb'date1904="(1|true)"', workbook) is not None
+
+
+def column_index(letters, cache={}):
+    """Zero-based column position of column letters such as "A" or "AB" """
+    index = cache.get(letters)
+    if index is None:
+        index = 0
+        for ch in letters:
+            index = index * 26 + ch - 64
+        index = cache[letters] = index - 1
+    return index
+
+
+class ColumnBuffer:
+    """
+    Typed storage of one column while the sheet is scanned.
+
+    Every cell appends its row, its value (the number, or the string ID) and
+    its kind to unboxed arrays; they are scattered into full-length NumPy
+    columns once the sheet has been read.
+    """
+
+    def __init__(self):
+        self.rows = array("q")
+        self.values = array("d")
+        self.kinds = array("B")
+        # Rare cells without a numeric form (dates without a time), by row
+        self.objects = {}
+
+    def to_arrays(self, n_rows):
+        """
+        Returns:
+            tuple: (float64 numbers, int32 string IDs, uint8 kind per row, kinds seen, objects by row)
+        """
+        rows = np.frombuffer(self.rows, dtype=np.int64)
+        values = np.frombuffer(self.values, dtype=np.float64)
+        kinds = np.frombuffer(self.kinds, dtype=np.uint8)
+
+        numbers = np.full(n_rows, np.nan)
+        codes = np.full(n_rows, -1, dtype=np.int32)
+        row_kinds = np.zeros(n_rows, dtype=np.uint8)
+        is_text = kinds == KIND_STRING
+        codes[rows[is_text]] = values[is_text].astype(np.int32)
+        numbers[rows[~is_text]] = values[~is_text]
+        row_kinds[rows] = kinds
+        return numbers, codes, row_kinds, int(np.bitwise_or.reduce(np.unique(kinds), initial=0)), self.objects
+
+
+def read_xlsx(path, sheet_name=0, usecols=None, categorical_strings=False):
+    """
+    Read a worksheet straight from the xlsx XML into typed NumPy columns.
+
+    Strings are interned once per workbook and stored as integer IDs while
+    the sheet is scanned; numbers go straight into float64 buffers. No cell
+    objects are created. Columns come out with the dtypes pd.read_excel
+    gives: int64/float64 (booleans count as 1/0 next to numbers or blanks;
+    whole numbers past the int64 range give uint64 or Python ints),
+    datetime64, timedelta64 for duration formats, bool, strings, or object
+    when a column mixes kinds or holds times of day. Error cells and the
+    texts of NA_TEXTS are empty, and text columns that read as numbers or
+    booleans are converted, as pd.read_excel infers them. A sheet without
+    data rows gives empty object columns. The header row gives the column
+    names.
+
+    Args:
+        path (str): Path of the .xlsx workbook
+        sheet_name (str or int): Sheet name or position. Default the first sheet.
+        usecols (list, optional): Positions of the columns to keep
+        categorical_strings (bool): Return pure string columns as pandas
+            Categoricals whose codes are the interned string IDs, sharing one
+            category table. Default False (object columns that reference the
+            interned strings).
+
+    Returns:
+        DataFrame: The sheet data
+    """
+    sheets = probe_workbook(path)
+    if isinstance(sheet_name, int):
+        sheet = sheets[sheet_name]
+    else:
+        sheet = next((s for s in sheets if s["name"] == sheet_name), None)
+        if sheet is None:
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+
+    with zipfile.ZipFile(path) as zf:
+        table = StringTable()
+        shared_ids = read_shared_strings(zf, table)
+        date_styles, duration_styles = read_date_styles(zf)
+        epoch = MAC_EPOCH if uses_1904_dates(zf) else WINDOWS_EPOCH
+        wanted = set(usecols) if usecols is not None else None
+
+        buffers = {}
+        header = {}
+        # Error cells hold no value but still count as rows, as in pd.read_excel
+        last_error_row = -1
+        shared = shared_ids.tolist()
+
+        # The attributes besides r="..." repeat a lot; resolve each combination once
+        cell_kinds = {}
+
+        def cell_kind(attrs):
+            cell_type = TYPE_RE.search(attrs)
+            cell_type = cell_type.group(1) if cell_type is not None else b"n"
+            style = STYLE_RE.search(attrs)
+            style = int(style.group(1)) if style is not None else 0
+            if cell_type in TEXT_TYPES:
+                kind = KIND_STRING
+            elif cell_type == b"b":
+                kind = KIND_BOOL
+            elif cell_type in (b"e", b"d"):
+                # Errors are skipped, ISO dates are classified per value
+                kind = None
+            elif style in duration_styles:
+                kind = KIND_DURATION
+            else:
+                kind = KIND_DATE if style in date_styles else KIND_NUMBER
+            cell_kinds[attrs] = cell_type, kind
+            return cell_type, kind
+
+        with zf.open(sheet["part"]) as f:
+            pending = b""
+            next_col = next_row = 0
+            while True:
+                block = f.read(READ_BLOCK_BYTES)
+                data = pending + block
+                # Only scan up to the last complete row; the rest waits for the next block
+                if block:
+                    last = None
+                    for last in ROW_END_RE.finditer(data):
+                        pass
+                    if last is None:
+                        pending = data
+                        continue
+                    pending = data[last.end():]
+                    data = data[:last.end()]
+                else:
+                    pending = b""
+
+                for attrs, value, content in CELL_RE.findall(data):
+                    ref = REF_RE.search(attrs)
+                    if ref is not None:
+                        col = column_index(ref.group(1))
+                        row = int(ref.group(2)) - 1
+                        other = attrs[ref.end():] if ref.start() <= 1 else attrs[:ref.start()] + attrs[ref.end():]
+                    else:
+                        # Cells without a reference follow the previous one
+                        col, row, other = next_col, next_row, attrs
+                    next_col, next_row = col + 1, row
+                    if wanted is not None and col not in wanted:
+                        continue
+
+                    cell_type, kind = cell_kinds.get(other) or cell_kind(other)
+                    if not value:
+                        if not content:
+                            continue
+                        if cell_type == b"inlineStr":
+                            value = b"".join(TEXT_RE.findall(content))
+                        else:
+                            found = VALUE_RE.search(content)
+                            if found is None:
+                                continue
+                            value = found.group(1)
+
+                    if row == 0:
+                        header[col] = text_value(value, cell_type, shared_ids, table)
+                        continue
+                    if cell_type == b"e":
+                        last_error_row = max(last_error_row, row - 1)
+                        continue
+
+                    buffer = buffers.get(col)
+                    if buffer is None:
+                        buffer = buffers[col] = ColumnBuffer()
+                    if cell_type == b"d":
+                        kind, value = iso_value(value.decode("ascii"), epoch)
+                        if kind == KIND_OBJECT:
+                            buffer.objects[row - 1] = value
+                            value = 0.0
+                        buffer.values.append(value)
+                    elif kind == KIND_STRING:
+                        if cell_type == b"s":
+                            buffer.values.append(shared[int(value)])
+                        else:
+                            buffer.values.append(table.intern(xml_text(value)))
+                    else:
+                        number = float(value)
+                        if kind == KIND_DATE and 0 <= number and round(number * DAY_MILLIS) < DAY_MILLIS:
+                            # Serials within the first day are times of day, as openpyxl reads them
+                            kind = KIND_TIME
+                        elif kind == KIND_NUMBER and len(value) > EXACT_FLOAT_DIGITS and value.lstrip(b"-").isdigit():
+                            # openpyxl reads integers without a float round trip; keep the exact value
+                            buffer.objects[row - 1] = int(value)
+                        buffer.values.append(number)
+                    buffer.rows.append(row - 1)
+                    buffer.kinds.append(kind)
+
+                if not block:
+                    break
+
+    # Assemble the frame
+    n_rows = max((buffer.rows[-1] + 1 for buffer in buffers.values() if buffer.rows), default=0)
+    n_rows = max(n_rows, last_error_row + 1)
+    positions = sorted(usecols) if usecols is not None else range(max(list(buffers) + list(header), default=-1) + 1)
+    strings = table.as_array()
+    string_dtype = pd.CategoricalDtype(strings) if categorical_strings else None
+    na_ids = table.ids_of(NA_TEXTS)
+    names = header_names([header.get(pos) for pos in positions])
+    data = {}
+    for name, pos in zip(names, positions):
+        buffer = buffers.get(pos) or ColumnBuffer()
+        data[name] = finish_column(*buffer.to_arrays(n_rows), strings, epoch, string_dtype, na_ids)
+
+    return pd.DataFrame(data, index=pd.RangeIndex(n_rows))
+
+
+def text_value(text, cell_type, shared_ids, table):
+    """Python value of a single cell (used for the header row)"""
+    if cell_type == b"s":
+        return table.texts[shared_ids[int(text)]]
+    if cell_type == b"e":
+        # pd.read_excel reads error cells as NaN, which stays the column label
+        return float("nan")
+    if cell_type == b"d":
+        return from_ISO8601(text.decode("ascii"))
+    if cell_type in (b"str", b"inlineStr"):
+        return xml_text(text)
+    if cell_type == b"b":
+        return text == b"1"
+    if text.lstrip(b"-").isdigit():
+        return int(text)
+    number = float(text)
+    return int(number) if number.is_integer() else number
+
+
+def xml_text(text):
+    """Decode the raw text of a <v> or <t> element as an XML parser would"""
+    text = text.decode("utf-8")
+    if "\r" in text:
+        # XML line-end normalization
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    if "&" in text:
+        text = REFERENCE_RE.sub(resolve_reference, text)
+    return text
+
+
+def resolve_reference(match):
+    """Replacement text of one REFERENCE_RE match"""
+    decimal, hexadecimal, name = match.groups()
+    if decimal is not None:
+        return chr(int(decimal))
+    if hexadecimal is not None:
+        return chr(int(hexadecimal, 16))
+    return XML_ENTITIES.get(name, match.group(0))
+
+
+def text_number(text):
+    """The int or float a text cell reads as in pd.read_excel, or None"""
+    if INT_TEXT_RE.fullmatch(text):
+        return int(text)
+    if FLOAT_TEXT_RE.fullmatch(text):
+        return float(text)
+    return None
+
+
+def iso_value(text, epoch):
+    """
+    Classify an ISO 8601 cell (t="d") and give its value as stored in a ColumnBuffer.
+
+    Returns:
+        tuple: (kind, serial number), or (KIND_OBJECT, date) for a date without a time
+    """
+    value = from_ISO8601(text)
+    if isinstance(value, datetime.datetime):
+        return KIND_DATE, to_excel(value, epoch.item())
+    if isinstance(value, datetime.time):
+        return KIND_TIME, to_excel(value)
+    if isinstance(value, datetime.timedelta):
+        return KIND_DURATION, to_excel(value)
+    return KIND_OBJECT, value
+
+
+def excel_dates(numbers, epoch):
+    """Convert Excel date serials (days since the epoch) to datetime64, rounded to milliseconds like openpyxl"""
+    present = ~np.isnan(numbers)
+    days = np.floor(numbers[present])
+    millis = np.round((numbers[present] - days) * 86_400_000)
+    if epoch == WINDOWS_EPOCH:
+        # The 1900 system counts the non-existent 1900-02-29
+        days += (numbers[present] > 0) & (numbers[present] < 60)
+
+    values = np.full(len(numbers), np.datetime64("NaT"), dtype="datetime64[us]")
+    values[present] = epoch + days.astype("timedelta64[D]") + millis.astype("timedelta64[ms]")
+    return values
+
+
+def excel_durations(numbers):
+    """Convert Excel duration serials (days) to timedelta64, rounded to milliseconds like openpyxl"""
+    present = ~np.isnan(numbers)
+    values = np.full(len(numbers), np.timedelta64("NaT"), dtype="timedelta64[us]")
+    values[present] = np.round(numbers[present] * DAY_MILLIS).astype("timedelta64[ms]")
+    return values
+
+
+def convert_text_cells(numbers, codes, row_kinds, objects, strings, na_ids):
+    """
+    Apply the inference pd.read_excel runs on a column holding text cells.
+
+    Texts of NA_TEXTS become blanks. When every other text reads as a number
+    and the column holds nothing but numbers and booleans besides, the texts
+    become numbers; when they all read as booleans (and the first cell is no
+    boolean cell), booleans. The arrays are updated in place.
+
+    Returns:
+        tuple: (kinds seen, whether a text read as a float, keeping the column float64)
+    """
+    if na_ids is not None and len(na_ids):
+        blank = np.isin(codes, na_ids)
+        codes[blank] = -1
+        row_kinds[blank] = 0
+    kinds = int(np.bitwise_or.reduce(np.unique(row_kinds), initial=0))
+    is_text = row_kinds == KIND_STRING
+    if not kinds & KIND_STRING or kinds & ~(KIND_STRING | KIND_NUMBER | KIND_BOOL):
+        return kinds, False
+
+    text_codes = codes[is_text]
+    first = strings[text_codes[0]]
+    if text_number(first) is not None:
+        # Most text columns already fail on their first text; only parse the distinct texts otherwise
+        ids, inverse = np.unique(text_codes, return_inverse=True)
+        values = [text_number(text) for text in strings[ids].tolist()]
+        if None not in values:
+            numbers[is_text] = np.array(values, dtype=float)[inverse]
+            rows = np.flatnonzero(is_text)
+            for i, value in enumerate(values):
+                if isinstance(value, int) and abs(value) >= 2 ** 53:
+                    objects.update(dict.fromkeys(rows[inverse == i].tolist(), value))
+            codes[is_text] = -1
+            row_kinds[is_text] = KIND_NUMBER
+            return kinds & ~KIND_STRING | KIND_NUMBER, any(isinstance(value, float) for value in values)
+
+    if first in BOOL_TEXTS and not kinds & KIND_NUMBER and row_kinds[0] != KIND_BOOL:
+        ids, inverse = np.unique(text_codes, return_inverse=True)
+        texts = strings[ids].tolist()
+        if all(text in BOOL_TEXTS for text in texts):
+            values = np.array([BOOL_TEXTS[text] for text in texts])[inverse]
+            numbers[is_text] = values
+            codes[is_text] = -1
+            if row_kinds.all():
+                row_kinds[is_text] = KIND_BOOL
+                return KIND_BOOL, False
+            # Next to blanks the booleans stay Python values
+            objects.update(zip(np.flatnonzero(is_text).tolist(), values.tolist()))
+            row_kinds[is_text] = KIND_OBJECT
+            return kinds & ~KIND_STRING | KIND_OBJECT, False
+
+    return kinds, False
+
+
+def integer_column(numbers, exact):
+    """
+    Whole numbers as int64, as pd.read_excel gives them; uint64 or Python ints past the int64 range.
+
+    Args:
+        numbers (ndarray): float64 values, no blanks
+        exact (dict): Row -> int of the integers a float64 cannot hold exactly
+    """
+    if not exact and -2.0 ** 63 <= numbers.min() and numbers.max() < 2.0 ** 63:
+        return numbers.astype(np.int64)
+    values = [int(number) for number in numbers.tolist()]
+    for row, value in exact.items():
+        values[row] = value
+    for dtype in (np.int64, np.uint64):
+        info = np.iinfo(dtype)
+        if info.min <= min(values) and max(values) <= info.max:
+            return np.array(values, dtype=dtype)
+    return np.array(values, dtype=object)
+
+
+def finish_column(numbers, codes, row_kinds, kinds, objects, strings, epoch, string_dtype=None, na_ids=None):
+    """Turn the scattered column arrays into the array the DataFrame column is built from"""
+    n_rows = len(numbers)
+    if not n_rows:
+        # pd.read_excel gives object columns for a sheet without data rows
+        return np.empty(0, dtype=object)
+
+    float_text = False
+    if kinds & KIND_STRING:
+        kinds, float_text = convert_text_cells(numbers, codes, row_kinds, objects, strings, na_ids)
+
+    if kinds == KIND_STRING:
+        if string_dtype is not None:
+            return pd.Categorical.from_codes(codes, dtype=string_dtype)
+        values = np.full(n_rows, np.nan, dtype=object)
+        present = codes >= 0
+        values[present] = strings[codes[present]]
+        return values
+
+    if kinds == KIND_BOOL and not np.isnan(numbers).any():
+        return numbers.astype(bool)
+
+    # Booleans next to numbers or blanks become 1/0, as pd.read_excel converts them
+    if kinds in (0, KIND_NUMBER, KIND_BOOL, KIND_NUMBER | KIND_BOOL):
+        if not float_text and not np.isnan(numbers).any() and np.array_equal(numbers, np.round(numbers)):
+            return integer_column(numbers, objects)
+        return numbers.copy()
+
+    if kinds == KIND_DATE:
+        return excel_dates(numbers, epoch)
+
+    if kinds == KIND_DURATION:
+        return excel_durations(numbers)
+
+    # Mixed column or times of day: one Python value per cell, as pd.read_excel gives
+    values = np.full(n_rows, np.nan, dtype=object)
+    dates = excel_dates(numbers, epoch) if kinds & KIND_DATE else None
+    durations = excel_durations(numbers) if kinds & KIND_DURATION else None
+    for row in np.flatnonzero(row_kinds).tolist():
+        kind = row_kinds[row]
+        if kind == KIND_STRING:
+            values[row] = strings[codes[row]]
+        elif kind == KIND_DATE:
+            values[row] = dates[row].item()
+        elif kind == KIND_TIME:
+            millis = int(round(float(numbers[row]) * DAY_MILLIS))
+            values[row] = (datetime.datetime.min + datetime.timedelta(milliseconds=millis)).time()
+        elif kind == KIND_DURATION:
+            values[row] = pd.Timedelta(durations[row]).to_pytimedelta()
+        elif kind == KIND_OBJECT:
+            values[row] = objects[row]
+        elif kind == KIND_BOOL:
+            values[row] = bool(numbers[row])
+        elif row in objects:
+            values[row] = objects[row]
+        else:
+            number = float(numbers[row])
+            values[row] = int(number) if number.is_integer() else number
+    return values